@@ -1,8 +1,16 @@
 # app.py
 import os
-from flask import Flask, render_template, request, send_file, redirect, url_for, flash, jsonify
-from cipher import ciphers
+import time
+import uuid
+import shutil
+import tempfile
+import contextlib
+from flask import Flask, render_template, request, send_file, redirect, url_for, flash, jsonify, Response, stream_with_context, g, has_request_context
+from cipher import ciphers, parallel, container, batch, registry, jobs, metrics, analysis, pads, uploads
+from cipher.keycache import KEY_CACHE
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+from werkzeug.datastructures import ContentRange
 import io
 
 # Initialize app
@@ -13,17 +21,73 @@ UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 OUTPUT_FOLDER = os.path.join(BASE_DIR, 'outputs')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+app.config['STREAM_CHUNK_SIZE'] = ciphers.STREAM_CHUNK_SIZE  # bytes read per cipher step in file mode
+# Uploads of at least PARALLEL_THRESHOLD bytes are encrypted chunk-parallel on
+# CIPHER_WORKERS threads, reading PARALLEL_CHUNK_SIZE bytes per step. Off by
+# default (None): the serial translate is faster unless benchmarks say otherwise.
+app.config['CIPHER_WORKERS'] = parallel.DEFAULT_WORKERS
+app.config['PARALLEL_THRESHOLD'] = parallel.PARALLEL_THRESHOLD
+app.config['PARALLEL_CHUNK_SIZE'] = parallel.PARALLEL_CHUNK_SIZE
+# Encrypted uploads of at least MMAP_THRESHOLD bytes are decrypted from a
+# memory-mapped file instead of being read through the request stream.
+app.config['MMAP_THRESHOLD'] = 64 << 20
+# Format for encrypted files: 1 = legacy JSON header + separator (pack_encrypted_payload),
+# 2 = versioned container with length-prefixed header and chunk index. Both are readable.
+app.config['CONTAINER_VERSION'] = container.LEGACY_VERSION
+# File results are streamed straight to the client; set PERSIST_OUTPUTS to also
+# keep a copy in OUTPUT_FOLDER. Persisted files are pruned by age and total size.
+app.config['PERSIST_OUTPUTS'] = False
+app.config['OUTPUT_MAX_AGE'] = 24 * 3600  # seconds
+app.config['OUTPUT_MAX_BYTES'] = 1 << 30
+# Largest number of items accepted by one /api/v1/batch request.
+app.config['BATCH_MAX_ITEMS'] = 10000
+# Background file jobs (/jobs) run on this many local worker threads; read when
+# the first job is submitted, so it can be changed after import.
+app.config['JOB_WORKERS'] = jobs.DEFAULT_JOB_WORKERS
+JOBS = jobs.JobQueue(lambda: app.config['JOB_WORKERS'])
+# Phase timings and byte counts are served on /metrics; set METRICS_LOG_JSON to
+# also log one JSON line per request (logger 'cipher.metrics').
+app.config['METRICS_LOG_JSON'] = False
+# One-Time Pad key pads uploaded to /api/v1/pads live here as memory-mapped
+# letter files; every encryption consumes a fresh range of the pad.
+PAD_FOLDER = os.path.join(BASE_DIR, 'pads')
+PADS = pads.PadStore(PAD_FOLDER)
+# Resumable chunked uploads (/api/v1/uploads) keep their chunks in UPLOAD_FOLDER.
+# Finalized uploads up to UPLOAD_INLINE_MAX bytes are returned directly,
+# larger ones are handed to a background job.
+app.config['UPLOAD_CHUNK_SIZE'] = uploads.DEFAULT_UPLOAD_CHUNK_SIZE
+app.config['UPLOAD_INLINE_MAX'] = 16 << 20
+UPLOADS = uploads.UploadStore(UPLOAD_FOLDER)
 
-ALGO_INFO = {
-    'shift': {'name': 'Shift Cipher', 'mode': 'both'},
-    'substitution': {'name': 'Substitution Cipher', 'mode': 'both'},
-    'affine': {'name': 'Affine Cipher', 'mode': 'both'},
-    'vigenere': {'name': 'Vigenere Cipher', 'mode': 'text'},
-    'hill': {'name': 'Hill Cipher', 'mode': 'text'},
-    'permutation': {'name': 'Permutation Cipher', 'mode': 'both'},
-    'otp': {'name': 'One-Time Pad', 'mode': 'text'},
-    "playfair": {"name": "Playfair Cipher", 'mode': 'text'}
-}
+ALGO_INFO = {name: {'name': spec.label, 'mode': spec.mode} for name, spec in registry.REGISTRY.items()}
+
+@app.before_request
+def _start_trace():
+    g.trace = metrics.RequestTrace(request.endpoint or 'unknown', log_json=app.config['METRICS_LOG_JSON'])
+
+@app.after_request
+def _finish_trace(response):
+    trace = g.get('trace')
+    if trace is not None:
+        # streamed bodies are produced after this hook; finish once they are sent
+        response.call_on_close(lambda: trace.finish(response.status_code))
+    return response
+
+def _current_trace():
+    """Trace of the current request; a detached one outside of requests."""
+    if has_request_context() and 'trace' in g:
+        return g.trace
+    return metrics.RequestTrace('background', log_json=app.config['METRICS_LOG_JSON'])
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    cache = KEY_CACHE.stats()
+    gauges = [
+        ('cipher_key_cache_hits', 'Compiled key cache hits.', cache['hits']),
+        ('cipher_key_cache_misses', 'Compiled key cache misses.', cache['misses']),
+        ('cipher_key_cache_size', 'Compiled keys currently cached.', cache['size']),
+    ]
+    return Response(metrics.METRICS.render(gauges), mimetype='text/plain; version=0.0.4')
 
 @app.route('/', methods=['GET'])
 def index():
@@ -72,78 +136,35 @@ def process():
         plaintext = request.form.get('plaintext', '')
         ciphertext_input = request.form.get('ciphertext', '')
         grouped = request.form.get('grouped') == 'on'
+        trace = _current_trace()
+        trace.label(algo, 'text')
         try:
+            spec = registry.REGISTRY.get(algo)
+            if spec is None:
+                flash('Unknown algorithm')
+                return redirect(url_for('index'))
+            pad_id = request.form.get('pad_id', '').strip()
+            if algo == 'otp' and pad_id:
+                return _process_pad_text(pad_id, action, plaintext, ciphertext_input, grouped, trace)
+            textfile = request.files.get('textfile')
+            if textfile and textfile.filename != '':
+                return _process_text_file(spec, textfile, _text_form_key(algo, key, keyfile), action != 'encrypt', trace)
+            with trace.phase('key_setup'):
+                compiled = spec.text_key(_text_form_key(algo, key, keyfile))
             # ---------------- ENCRYPT (TEXT) ----------------
             if action == 'encrypt':
-                if algo == 'shift':
-                    out = ciphers.shift_encrypt_text(plaintext, key)
-                elif algo == 'substitution':
-                    out = ciphers.substitution_encrypt_text(plaintext, key)
-                elif algo == 'affine':
-                    out = ciphers.affine_encrypt_text(plaintext, key)
-                elif algo == 'vigenere':
-                    out = ciphers.vigenere_encrypt_text(plaintext, key)
-                elif algo == 'hill':
-                    hill_key = request.form.getlist("hill_key[]")
-                    if not hill_key or all(x.strip() == "" for x in hill_key):
-                        raise ValueError("Hill key matrix required")
-                    nums = [int(x) for x in hill_key if x.strip() != ""]
-                    size = int(len(nums) ** 0.5)
-                    if size * size != len(nums):
-                        raise ValueError("Hill key size must be n*n")
-                    # bentuk jadi matriks
-                    key_matrix = [nums[i*size:(i+1)*size] for i in range(size)]
-                    out = ciphers.hill_encrypt_text(plaintext, key_matrix)
-                elif algo == 'permutation':
-                    out = ciphers.permutation_encrypt_text(plaintext, key)
-                elif algo == 'otp':
-                    # if keyfile provided, read it
-                    if keyfile and keyfile.filename != '':
-                        keycontent = keyfile.read().decode('utf-8', errors='ignore')
-                    else:
-                        keycontent = key
-                    out = ciphers.otp_encrypt_text(plaintext, keycontent)
-                elif algo == 'playfair':
-                    out = ciphers.playfair_encrypt_text(plaintext, key)
-                else:
-                    flash('Unknown algorithm')
-                    return redirect(url_for('index'))
+                with trace.phase('cipher'):
+                    out = compiled.encrypt(plaintext)
+                trace.count(len(plaintext), len(out))
                 display = ciphers.group5(out) if grouped else out
-                return render_template('result.html', plaintext=plaintext, ciphertext=display, algo=ALGO_INFO[algo]['name'])
+                with trace.phase('render'):
+                    return render_template('result.html', plaintext=plaintext, ciphertext=display, algo=spec.label)
             # ---------------- DECRYPT (TEXT) ----------------
-            else:
-                if algo == 'shift':
-                    out = ciphers.shift_decrypt_text(ciphertext_input, key)
-                elif algo == 'substitution':
-                    out = ciphers.substitution_decrypt_text(ciphertext_input, key)
-                elif algo == 'affine':
-                    out = ciphers.affine_decrypt_text(ciphertext_input, key)
-                elif algo == 'vigenere':
-                    out = ciphers.vigenere_decrypt_text(ciphertext_input, key)
-                elif algo == 'hill':
-                    hill_key = request.form.getlist("hill_key[]")
-                    if not hill_key or all(x.strip() == "" for x in hill_key):
-                        raise ValueError("Hill key matrix required")
-                    nums = [int(x) for x in hill_key if x.strip() != ""]
-                    size = int(len(nums) ** 0.5)
-                    if size * size != len(nums):
-                        raise ValueError("Hill key size must be n*n")
-                    key_matrix = [nums[i*size:(i+1)*size] for i in range(size)]
-                    out = ciphers.hill_decrypt_text(ciphertext_input, key_matrix)
-                elif algo == 'permutation':
-                    out = ciphers.permutation_decrypt_text(ciphertext_input, key)
-                elif algo == 'otp':
-                    if keyfile and keyfile.filename != '':
-                        keycontent = keyfile.read().decode('utf-8', errors='ignore')
-                    else:
-                        keycontent = key
-                    out = ciphers.otp_decrypt_text(ciphertext_input, keycontent)
-                elif algo == 'playfair':
-                    out = ciphers.playfair_decrypt_text(ciphertext_input, key)
-                else:
-                    flash('Unknown algorithm')
-                    return redirect(url_for('index'))
-                return render_template('result.html', plaintext=out, ciphertext=ciphertext_input, algo=ALGO_INFO[algo]['name'])
+            with trace.phase('cipher'):
+                out = compiled.decrypt(ciphertext_input)
+            trace.count(len(ciphertext_input), len(out))
+            with trace.phase('render'):
+                return render_template('result.html', plaintext=out, ciphertext=ciphertext_input, algo=spec.label)
         except Exception as e:
             flash(str(e))
             return redirect(url_for('index'))
@@ -154,7 +175,6 @@ def process():
         flash('No file provided for file mode')
         return redirect(url_for('index'))
     filename = secure_filename(file.filename)
-    data = file.read()
 
     # If keyfile provided for OTP in file mode: read (rare, but support)
     if keyfile and keyfile.filename != '':
@@ -162,62 +182,631 @@ def process():
     else:
         keycontent = key
 
+    if algo not in registry.byte_algorithms():
+        flash('Selected algorithm does not support file/binary mode')
+        return redirect(url_for('index'))
+
+    # The upload is streamed through the cipher chunk by chunk, so memory use
+    # stays at about one chunk regardless of the file size.
+    trace = _current_trace()
+    trace.label(algo, 'file')
+    src = _detach_upload(file)
     try:
         if action == 'encrypt':
             export_format = request.form.get('export_format', 'enc') # Default ke 'enc'
 
-            if algo == 'shift':
-                outbytes = ciphers.shift_encrypt_bytes(data, key)
-            elif algo == 'substitution':
-                outbytes = ciphers.substitution_encrypt_bytes(data, key)
-            elif algo == 'affine':
-                outbytes = ciphers.affine_encrypt_bytes(data, key)
-            elif algo == 'permutation':
-                outbytes = ciphers.permutation_encrypt_bytes(data, key)
-            else:
-                flash('Selected algorithm does not support file/binary mode')
-                return redirect(url_for('index'))
-            payload = ciphers.pack_encrypted_payload(filename, outbytes)
-            if export_format == 'inplace':
-                # Pisahkan nama file dan ekstensinya
-                name, ext = os.path.splitext(filename)
-                # Gabungkan kembali dengan "_encrypted" di tengah
-                outname = f"{name}_encrypted{ext}" # Contoh: laporan_encrypted.pdf
-            else:
-                # Opsi .enc tetap sama
-                outname = filename + '.enc'
-            outpath = os.path.join(OUTPUT_FOLDER, outname)
-            with open(outpath, 'wb') as f:
-                f.write(payload)
-            return send_file(outpath, as_attachment=True)
+            outname, head, chunks, _ = _encrypt_parts(src, filename, algo, key, export_format, trace)
+            return _send_chunks(outname, head, chunks, src)
         else:  # decrypt file
+            with trace.phase('key_setup'):
+                cipher, chunk_size = _file_cipher(algo, key, src, decrypt=True)
+            size = _stream_size(src)
             try:
-                orig_name, encdata = ciphers.unpack_encrypted_payload(data)
+                if size is not None and size >= app.config['MMAP_THRESHOLD']:
+                    closing = contextlib.ExitStack()
+                    closing.push(src)
+                    spooled = closing.enter_context(_spool_to_file(src))
+                    try:
+                        payload = ciphers.MappedPayload(spooled)
+                    except Exception:
+                        closing.close()
+                        raise
+                    closing.push(payload)  # closed first: releases the map before the file
+                    info = payload.info
+                    chunks = (trace.update(cipher, view) for view in payload.chunks(chunk_size))
+                else:
+                    with trace.phase('unpack'):
+                        info, leftover = container.read_payload_header(src, chunk_size)
+                    chunks = trace.transform(src, cipher, chunk_size, head=leftover)
+                    closing = src
             except Exception:
+                src.close()
                 flash('Uploaded file is not in encrypted format produced by this app')
                 return redirect(url_for('index'))
-            if algo == 'shift':
-                dec = ciphers.shift_decrypt_bytes(encdata, key)
-            elif algo == 'substitution':
-                dec = ciphers.substitution_decrypt_bytes(encdata, key)
-            elif algo == 'affine':
-                dec = ciphers.affine_decrypt_bytes(encdata, key)
-            elif algo == 'permutation':
-                dec = ciphers.permutation_decrypt_bytes(encdata, key)
-            else:
-                flash('Selected algorithm does not support file/binary mode')
+            if info.algorithm and info.algorithm != algo:
+                closing.close()
+                flash(f"File was encrypted with {ALGO_INFO.get(info.algorithm, {}).get('name', info.algorithm)}")
                 return redirect(url_for('index'))
-            # Pisahkan nama file asli (yang didapat dari payload) dan ekstensinya
-            name, ext = os.path.splitext(orig_name)
-            # Buat nama file output untuk hasil dekripsi
-            decrypted_filename = f"{name}_decrypted{ext}" # Contoh: laporan_decrypted.pdf
-            outpath = os.path.join(OUTPUT_FOLDER, decrypted_filename)
-            with open(outpath, 'wb') as f:
-                f.write(dec)
-            return send_file(outpath, as_attachment=True)
+            return _send_chunks(_decrypted_name(info.filename), b'', chunks, closing)
     except Exception as e:
+        src.close()
         flash(str(e))
         return redirect(url_for('index'))
 
+def _encrypt_parts(src, filename, algo, key, export_format='enc', trace=None):
+    """(outname, head, chunks, size) for encrypting the upload stream src."""
+    trace = trace or _current_trace()
+    with trace.phase('key_setup'):
+        cipher, chunk_size = _file_cipher(algo, key, src)
+    size = _stream_size(src)
+    with trace.phase('pack'):
+        head = _payload_header(filename, algo, size)
+    return _encrypted_name(filename, export_format), head, trace.transform(src, cipher, chunk_size), size
+
+def _payload_header(filename, algo, size):
+    if app.config['CONTAINER_VERSION'] == container.CONTAINER_VERSION and size is not None:
+        return container.container_header(filename, algo, size)
+    return ciphers.encrypted_payload_header(filename)
+
+def _encrypted_name(filename, export_format='enc'):
+    if export_format == 'inplace':
+        # Pisahkan nama file dan ekstensinya
+        name, ext = os.path.splitext(filename)
+        # Gabungkan kembali dengan "_encrypted" di tengah
+        return f"{name}_encrypted{ext}" # Contoh: laporan_encrypted.pdf
+    # Opsi .enc tetap sama
+    return filename + '.enc'
+
+def _decrypt_parts(src, algo, key, trace):
+    """(outname, head, chunks, size) for decrypting the encrypted payload stream src."""
+    with trace.phase('key_setup'):
+        cipher, chunk_size = _file_cipher(algo, key, src, decrypt=True)
+    try:
+        with trace.phase('unpack'):
+            info, leftover = container.read_payload_header(src, chunk_size)
+    except Exception:
+        raise ValueError('Uploaded file is not in encrypted format produced by this app')
+    if info.algorithm and info.algorithm != algo:
+        raise ValueError(f"File was encrypted with {info.algorithm}")
+    remaining = _stream_size(src)
+    total = info.size if info.size is not None else (
+        remaining + len(leftover) if remaining is not None else None)
+    return _decrypted_name(info.filename), b'', trace.transform(src, cipher, chunk_size, head=leftover), total
+
+def _decrypted_name(orig_name):
+    # Pisahkan nama file asli (yang didapat dari payload) dan ekstensinya
+    name, ext = os.path.splitext(secure_filename(orig_name) or 'output')
+    # Buat nama file output untuk hasil dekripsi
+    return f"{name}_decrypted{ext}" # Contoh: laporan_decrypted.pdf
+
+def _text_form_key(algo, key, keyfile):
+    """Raw key for text mode: Hill reads the hill_key[] matrix cells, OTP may use an uploaded key file."""
+    if algo == 'hill':
+        hill_key = request.form.getlist("hill_key[]")
+        if not hill_key or all(x.strip() == "" for x in hill_key):
+            raise ValueError("Hill key matrix required")
+        return ' '.join(x for x in hill_key if x.strip() != "")
+    if algo == 'otp' and keyfile and keyfile.filename != '':
+        return keyfile.read().decode('utf-8', errors='ignore')
+    return key
+
+def _process_pad_text(pad_id, action, plaintext, ciphertext_input, grouped, trace):
+    """
+    OTP text mode with a server-side pad: encryption takes the next unused pad
+    letters, decryption needs the pad offset shown with the ciphertext.
+    """
+    trace.label(mode='pad')
+    try:
+        if action == 'encrypt':
+            with trace.phase('cipher'):
+                out, offset = PADS.encrypt(pad_id, plaintext)
+            trace.count(len(plaintext), len(out))
+            display = ciphers.group5(out) if grouped else out
+            with trace.phase('render'):
+                return render_template('result.html', plaintext=plaintext, ciphertext=display,
+                                       algo=ALGO_INFO['otp']['name'], pad={'id': pad_id, 'offset': offset})
+        try:
+            offset = int(request.form.get('pad_offset', ''))
+        except ValueError:
+            raise ValueError('Pad offset required to decrypt with a key pad')
+        with trace.phase('cipher'):
+            out = PADS.decrypt(pad_id, ciphertext_input, offset)
+        trace.count(len(ciphertext_input), len(out))
+    except KeyError:
+        raise ValueError('Unknown key pad')
+    with trace.phase('render'):
+        return render_template('result.html', plaintext=out, ciphertext=ciphertext_input,
+                               algo=ALGO_INFO['otp']['name'], pad={'id': pad_id, 'offset': offset})
+
+def _process_text_file(spec, textfile, key, decrypt, trace):
+    """
+    Text mode on an uploaded text file: the file is decoded and ciphered in
+    STREAM_CHUNK_SIZE pieces (the stream cipher carries key position and
+    partial blocks across them) and the result is sent back as a download.
+    """
+    trace.label(mode='textfile')
+    with trace.phase('key_setup'):
+        stream = spec.text_stream_cipher(key, decrypt)
+    base = os.path.splitext(secure_filename(textfile.filename))[0] or 'text'
+    outname = f"{base}_{'decrypted' if decrypt else 'encrypted'}.txt"
+    src = io.TextIOWrapper(_detach_upload(textfile), encoding='utf-8', errors='replace')
+    return _send_chunks(outname, b'', _text_chunks(src, stream, trace), src)
+
+def _text_chunks(src, stream, trace):
+    """UTF-8 encoded output of stream for every chunk of text read from src."""
+    chunk_size = app.config['STREAM_CHUNK_SIZE']
+    while True:
+        with trace.phase('read'):
+            text = src.read(chunk_size)
+        if not text:
+            break
+        with trace.phase('cipher'):
+            out = stream.update(text).encode('utf-8')
+        trace.count(len(text), len(out))
+        if out:
+            yield out
+    with trace.phase('cipher'):
+        out = stream.finalize().encode('utf-8')
+    trace.count(bytes_out=len(out))
+    if out:
+        yield out
+
+def _write_chunks(outpath, head, chunks, trace=None):
+    """Write head followed by every chunk from the iterator to outpath."""
+    trace = trace or _current_trace()
+    with open(outpath, 'wb') as f:
+        with trace.phase('write'):
+            f.write(head)
+        for chunk in chunks:
+            with trace.phase('write'):
+                f.write(chunk)
+
+# Random-access decryption of a stored payload: byte ciphers are position
+# independent (or, for permutation, the keystream can start at any offset), so
+# only the requested bytes of the body are read and decrypted.
+@app.route('/outputs/<path:name>/decrypt', methods=['GET'])
+def decrypt_stored(name):
+    path = safe_join(OUTPUT_FOLDER, name)
+    if path is None or not os.path.isfile(path):
+        return jsonify({"error": "Stored file not found"}), 404
+    # key material preferably in headers so it stays out of URLs and access logs
+    algo = request.headers.get('X-Cipher-Algorithm') or request.args.get('algorithm', '')
+    key = request.headers.get('X-Cipher-Key') or request.args.get('key', '')
+    if algo not in registry.byte_algorithms():
+        return jsonify({"error": "Selected algorithm does not support file/binary mode"}), 400
+    try:
+        payload = ciphers.MappedPayload(path)
+    except Exception:
+        return jsonify({"error": "Stored file is not in encrypted format produced by this app"}), 400
+    if payload.info.algorithm and payload.info.algorithm != algo:
+        payload.close()
+        return jsonify({"error": f"File was encrypted with {payload.info.algorithm}"}), 400
+
+    length = len(payload.body)
+    status, start, stop = 200, 0, length
+    if request.range is not None:
+        byte_range = request.range.range_for_length(length)
+        if byte_range is None:
+            payload.close()
+            return Response(status=416, headers={'Content-Range': f'bytes */{length}'})
+        status, (start, stop) = 206, byte_range
+    trace = _current_trace()
+    trace.label(algo, 'range')
+    try:
+        with trace.phase('key_setup'):
+            cipher = ciphers.byte_stream_cipher(algo, key, decrypt=True, offset=start)
+    except Exception as e:
+        payload.close()
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        with payload:
+            for view in payload.chunks(app.config['STREAM_CHUNK_SIZE'], start, stop):
+                yield trace.update(cipher, view)
+
+    headers = {'Accept-Ranges': 'bytes', 'Content-Length': str(stop - start)}
+    if status == 206:
+        headers['Content-Range'] = ContentRange('bytes', start, stop, length).to_header()
+    return Response(generate(), status=status, mimetype='application/octet-stream', headers=headers)
+
+@app.route('/api/v1/batch', methods=['POST'])
+def api_batch():
+    """
+    JSON batch API: body is a list of {algorithm, action, key, text} items
+    (or {"items": [...]}); returns one result or error per item, in order.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify({"error": "Expected a JSON array of items"}), 400
+    if len(items) > app.config['BATCH_MAX_ITEMS']:
+        return jsonify({"error": f"Too many items (max {app.config['BATCH_MAX_ITEMS']})"}), 413
+    trace = _current_trace()
+    trace.label(mode='batch')
+    with trace.phase('cipher'):
+        results = batch.run_batch(items)
+    return jsonify(results)
+
+@app.route('/api/v1/analyze', methods=['POST'])
+def api_analyze():
+    """
+    Key search for a ciphertext whose key is lost. Body: {algorithm, text,
+    top (default 5, at most analysis.MAX_CANDIDATES), preview (optional: decrypt
+    only this many letters of each candidate);
+    Vigenere also takes max_key_length and key_length.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+        return jsonify({"error": "Expected a JSON object with a 'text' string"}), 400
+    algo = payload.get('algorithm')
+    crack = analysis.CRACKERS.get(algo) if isinstance(algo, str) else None
+    if crack is None:
+        return jsonify({"error": f"Key search is available for: {', '.join(analysis.CRACKERS)}"}), 400
+    top, preview = payload.get('top', 5), payload.get('preview')
+    if not isinstance(top, int) or not 1 <= top <= analysis.MAX_CANDIDATES \
+            or (preview is not None and (not isinstance(preview, int) or preview < 0)):
+        return jsonify({"error": f"top must be an integer in 1..{analysis.MAX_CANDIDATES} "
+                                 "and preview a non-negative integer"}), 400
+    # Vigenere only: max_key_length, key_length
+    options = {k: payload[k] for k in ('max_key_length', 'key_length') if algo == 'vigenere' and k in payload}
+    trace = _current_trace()
+    trace.label(algo, 'analysis')
+    try:
+        with trace.phase('analysis'):
+            candidates = crack(payload['text'], top, preview=preview, **options)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    trace.count(len(payload['text']))
+    return jsonify({"algorithm": algo, "candidates": candidates})
+
+# Server-side OTP pads. Upload a pad once, then encrypt against its id: each
+# request gets its own range of pad letters and the offset to decrypt with.
+@app.route('/api/v1/pads', methods=['POST'])
+def create_pad():
+    file = request.files.get('pad')
+    if not file or file.filename == '':
+        return jsonify({"error": "No pad file provided"}), 400
+    try:
+        info = PADS.create(file.stream)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(info), 201
+
+@app.route('/api/v1/pads/<pad_id>', methods=['GET'])
+def pad_status(pad_id):
+    try:
+        return jsonify(PADS.info(pad_id))
+    except KeyError:
+        return jsonify({"error": "Pad not found"}), 404
+
+@app.route('/api/v1/pads/<pad_id>/<action>', methods=['POST'])
+def pad_cipher(pad_id, action):
+    """Body {text} to encrypt, or {text, offset} to decrypt with the pad letters used at offset."""
+    if action not in ('encrypt', 'decrypt'):
+        return jsonify({"error": "Action must be encrypt or decrypt"}), 404
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+        return jsonify({"error": "Expected a JSON object with a 'text' string"}), 400
+    offset = payload.get('offset')
+    if action == 'decrypt' and (not isinstance(offset, int) or offset < 0):
+        return jsonify({"error": "offset must be a non-negative integer"}), 400
+    trace = _current_trace()
+    trace.label('otp', 'pad')
+    try:
+        with trace.phase('cipher'):
+            if action == 'encrypt':
+                result, offset = PADS.encrypt(pad_id, payload['text'])
+            else:
+                result = PADS.decrypt(pad_id, payload['text'], offset)
+    except KeyError:
+        return jsonify({"error": "Pad not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    trace.count(len(payload['text']), len(result))
+    return jsonify({"pad_id": pad_id, "offset": offset, "length": ciphers.otp_letters_needed(result),
+                    "result": result})
+
+# Background jobs: the upload is handed to a worker thread and the request
+# returns a job id at once. Results are written to OUTPUT_FOLDER.
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    action = request.form.get('action', 'encrypt')
+    algo = request.form.get('algorithm') or request.form.get('algorithm_file')
+    key = request.form.get('key', '')
+    file = request.files.get('file')
+    if not file or file.filename == '':
+        return jsonify({"error": "No file provided"}), 400
+    if algo not in registry.byte_algorithms():
+        return jsonify({"error": "Selected algorithm does not support file/binary mode"}), 400
+    trace = metrics.RequestTrace('job', log_json=app.config['METRICS_LOG_JSON'])
+    trace.label(algo, 'job')
+    src = _detach_upload(file)
+    try:
+        if action == 'encrypt':
+            outname, head, chunks, total = _encrypt_parts(src, secure_filename(file.filename), algo, key,
+                                                          request.form.get('export_format', 'enc'), trace)
+        else:
+            outname, head, chunks, total = _decrypt_parts(src, algo, key, trace)
+    except Exception as e:
+        src.close()
+        return jsonify({"error": str(e)}), 400
+    return _submit_file_job(src, outname, head, chunks, total, trace)
+
+def _submit_file_job(src, outname, head, chunks, total, trace):
+    """Write head + chunks to OUTPUT_FOLDER on a job worker; closes src when done. Returns the 202 response."""
+    folder = OUTPUT_FOLDER
+
+    def work(job):
+        outpath = os.path.join(folder, f"{job.id}_{outname}")
+        try:
+            with src:
+                _write_result(outpath, head, _counted(job, chunks), trace)
+        except Exception:
+            trace.finish('failed')
+            raise
+        trace.finish('done')
+        _prune_outputs(folder, keep=[outpath])
+        return outpath
+
+    job = JOBS.submit(work, total=total, filename=outname)
+    return jsonify({"id": job.id, "status": job.status,
+                    "status_url": url_for('job_status', job_id=job.id),
+                    "download_url": url_for('job_download', job_id=job.id)}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/download', methods=['GET'])
+def job_download(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != jobs.DONE:
+        return jsonify({"error": job.error or "Job has not finished", "status": job.status}), 409
+    if not os.path.exists(job.path):
+        return jsonify({"error": "Job result has expired"}), 410
+    return send_file(job.path, as_attachment=True, download_name=job.filename)
+
+# Resumable chunked uploads: open a session with the file size, PUT the chunks
+# (any order, retry as needed), then finalize. Encrypt sessions cipher each
+# chunk on arrival, so finalize only has to prepend the header.
+@app.route('/api/v1/uploads', methods=['POST'])
+def create_upload():
+    """Body {filename, algorithm, key, size, action (encrypt), chunk_size, export_format}."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not all(isinstance(payload.get(k), str) for k in ('filename', 'algorithm')) \
+            or not isinstance(payload.get('key', ''), str):
+        return jsonify({"error": "Expected a JSON object with 'filename', 'algorithm', 'key' and 'size'"}), 400
+    try:
+        session = UPLOADS.create(secure_filename(payload['filename']) or 'upload', payload.get('algorithm'),
+                                 payload.get('key', ''), payload.get('action', 'encrypt'), payload.get('size'),
+                                 payload.get('chunk_size', app.config['UPLOAD_CHUNK_SIZE']),
+                                 payload.get('export_format', 'enc'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_upload_dict(session)), 201
+
+@app.route('/api/v1/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    session = UPLOADS.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(_upload_dict(session))
+
+@app.route('/api/v1/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    session = UPLOADS.pop(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    session.discard()
+    return '', 204
+
+@app.route('/api/v1/uploads/<upload_id>/chunks/<int:n>', methods=['PUT'])
+def upload_chunk(upload_id, n):
+    """Raw request body = bytes [n*chunk_size, (n+1)*chunk_size) of the file."""
+    session = UPLOADS.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    trace = _current_trace()
+    trace.label(session.algorithm, 'upload')
+    try:
+        with trace.phase('cipher' if session.action == 'encrypt' else 'write'):
+            written = session.write_chunk(n, request.stream, app.config['STREAM_CHUNK_SIZE'])
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    trace.count(written, written)
+    return jsonify({"id": session.id, "chunk": n, "size": written, "remaining": session.remaining()})
+
+@app.route('/api/v1/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """
+    Assemble the result: uploads up to UPLOAD_INLINE_MAX bytes are returned as
+    a download, larger ones as a job handle (202, same as POST /jobs).
+    """
+    session = UPLOADS.get(upload_id)
+    if session is None:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        src = session.finalize()
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e), "missing": session.missing()}), 400
+    UPLOADS.pop(upload_id)
+    inline = session.size <= app.config['UPLOAD_INLINE_MAX']
+    trace = _current_trace() if inline else metrics.RequestTrace('job', log_json=app.config['METRICS_LOG_JSON'])
+    trace.label(session.algorithm, 'upload')
+    try:
+        if session.action == 'encrypt':
+            with trace.phase('pack'):
+                head = _payload_header(session.filename, session.algorithm, session.size)
+            outname, total = _encrypted_name(session.filename, session.export_format), session.size
+            chunks = _copy_chunks(src, app.config['STREAM_CHUNK_SIZE'], trace)
+        else:
+            outname, head, chunks, total = _decrypt_parts(src, session.algorithm, session.key, trace)
+    except Exception as e:
+        src.close()
+        return jsonify({"error": str(e)}), 400
+    if inline:
+        return _send_chunks(outname, head, chunks, src)
+    return _submit_file_job(src, outname, head, chunks, total, trace)
+
+def _upload_dict(session):
+    info = session.to_dict()
+    info.update(missing=session.missing(),
+                status_url=url_for('upload_status', upload_id=session.id),
+                finalize_url=url_for('finalize_upload', upload_id=session.id))
+    return info
+
+def _copy_chunks(src, chunk_size, trace):
+    """Already-processed bytes of src, chunk by chunk."""
+    while True:
+        with trace.phase('read'):
+            chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def _counted(job, chunks):
+    """Pass chunks through, adding their size to the job's progress."""
+    for chunk in chunks:
+        job.advance(len(chunk))
+        yield chunk
+
+def _stream_size(src):
+    """Remaining bytes in a seekable stream, or None."""
+    try:
+        pos = src.tell()
+        end = src.seek(0, os.SEEK_END)
+        src.seek(pos)
+        return end - pos
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def _file_cipher(algo, key, src, decrypt=False):
+    """Incremental cipher and read size for src; large inputs take the parallel path."""
+    cipher = parallel.stream_cipher(algo, key, decrypt, size=_stream_size(src),
+                                    workers=app.config['CIPHER_WORKERS'],
+                                    threshold=app.config['PARALLEL_THRESHOLD'])
+    if isinstance(cipher, parallel.ParallelByteCipher):
+        return cipher, app.config['PARALLEL_CHUNK_SIZE']
+    return cipher, app.config['STREAM_CHUNK_SIZE']
+
+def _spool_to_file(src):
+    """
+    Return a real (mmap-able) file holding src. Large uploads are already spooled
+    to disk by Werkzeug and are used as is; in-memory ones are copied to a temp file.
+    """
+    try:
+        src.fileno()
+        return src
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        tmp = tempfile.TemporaryFile(dir=UPLOAD_FOLDER)
+        shutil.copyfileobj(src, tmp, app.config['STREAM_CHUNK_SIZE'])
+        tmp.flush()
+        src.close()
+        return tmp
+
+def _detach_upload(file):
+    """
+    Take over the stream of an uploaded file. Flask closes request.files as soon
+    as the view returns, which is before a streamed response body is produced.
+    """
+    src = file.stream
+    file.stream = io.BytesIO()
+    return src
+
+def _send_chunks(outname, head, chunks, src):
+    """
+    Send head + chunks as a download and close src (any context manager) afterwards.
+    With PERSIST_OUTPUTS a copy is written to OUTPUT_FOLDER first; its stored
+    name goes out in X-Stored-Name and the range-decrypt URL in X-Decrypt-Url.
+    """
+    if app.config['PERSIST_OUTPUTS']:
+        # unique prefix so concurrent requests for the same filename never collide
+        stored = f"{uuid.uuid4().hex[:12]}_{outname}"
+        outpath = os.path.join(OUTPUT_FOLDER, stored)
+        with src:
+            _write_result(outpath, head, chunks)
+        _prune_outputs(OUTPUT_FOLDER, keep=[outpath])
+        response = send_file(outpath, as_attachment=True, download_name=outname)
+        response.headers['X-Stored-Name'] = stored
+        response.headers['X-Decrypt-Url'] = url_for('decrypt_stored', name=stored)
+        return response
+
+    def generate():
+        with src:
+            if head:
+                yield head
+            yield from chunks
+    return Response(stream_with_context(generate()), mimetype='application/octet-stream',
+                    headers={'Content-Disposition': f'attachment; filename="{outname}"'})
+
+def _write_result(outpath, head, chunks, trace=None):
+    """
+    _write_chunks into a hidden temp file next to outpath, renamed to outpath
+    once complete. cleanup_outputs skips hidden files, so results still being
+    written are never pruned; a failed write leaves nothing behind.
+    """
+    tmp = os.path.join(os.path.dirname(outpath), f".{os.path.basename(outpath)}.part")
+    try:
+        _write_chunks(tmp, head, chunks, trace)
+        os.replace(tmp, outpath)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _prune_outputs(folder, keep=()):
+    """
+    cleanup_outputs with the configured limits. Results of jobs finished
+    within OUTPUT_MAX_AGE are kept as well: their clients may not have
+    downloaded them yet.
+    """
+    max_age = app.config['OUTPUT_MAX_AGE']
+    pinned = JOBS.result_paths(time.time() - max_age if max_age is not None else 0.0)
+    return cleanup_outputs(folder, max_age, app.config['OUTPUT_MAX_BYTES'], keep=list(keep) + pinned)
+
+def cleanup_outputs(folder, max_age=None, max_bytes=None, keep=(), now=None):
+    """
+    Delete persisted results: first files older than max_age seconds, then the
+    oldest remaining files until the folder holds at most max_bytes.
+    Paths in keep and hidden files (results still being written) are never
+    removed. Returns the list of deleted paths.
+    """
+    now = time.time() if now is None else now
+    keep = {os.path.abspath(p) for p in keep}
+    entries = []
+    for entry in os.scandir(folder):
+        if entry.is_file() and not entry.name.startswith('.') and os.path.abspath(entry.path) not in keep:
+            st = entry.stat()
+            entries.append((st.st_mtime, st.st_size, entry.path))
+    entries.sort()
+    removed = []
+    total = sum(size for _, size, _ in entries) + sum(os.path.getsize(p) for p in keep if os.path.exists(p))
+    for mtime, size, path in entries:
+        expired = max_age is not None and now - mtime > max_age
+        over = max_bytes is not None and total > max_bytes
+        if not (expired or over):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # removed concurrently or still open elsewhere
+        total -= size
+        removed.append(path)
+    return removed
+
+@app.cli.command('cleanup-outputs')
+def cleanup_outputs_command():
+    """Prune OUTPUT_FOLDER using OUTPUT_MAX_AGE and OUTPUT_MAX_BYTES."""
+    removed = _prune_outputs(OUTPUT_FOLDER)
+    print(f"Removed {len(removed)} file(s) from {OUTPUT_FOLDER}")
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,207 @@
+# benchmarks/run.py
+"""
+Throughput benchmark for every registered cipher, in text and byte mode.
+
+    python benchmarks/run.py                      # full sweep, 1K .. 256M
+    python benchmarks/run.py --sizes 1K,1M --algorithms shift,hill -o new.json
+    python benchmarks/run.py --sizes 1K,1M --compare old.json
+
+Key setup (parsing and compiling the key, e.g. make_byte_subst_from_key or the
+Hill inverse mod 26) is timed separately from the bulk transform: the key
+cache is cleared and the key compiled and used on an empty input once.
+Each case runs in a fresh worker process so its peak RSS is its own.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from cipher import registry
+from cipher.keycache import KEY_CACHE
+
+DEFAULT_SIZES = '1K,64K,1M,16M,256M'
+REGRESSION_THRESHOLD = 0.10  # fractional MB/s drop reported as a regression
+
+KEYS = {
+    'shift': '7',
+    'substitution': 'QWERTYUIOPASDFGHJKLZXCVBNM',
+    'affine': '5,8',
+    'vigenere': 'LEMON',
+    'hill': '3 3 2 5',
+    'permutation': '2,0,1',
+    'playfair': 'MONARCHY',
+}
+
+def parse_size(text):
+    text = text.strip().upper()
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def bench_key(algo, mode, size):
+    if algo == 'otp':
+        # OTP needs a pad at least as long as the message
+        return _letters(size, seed=1)
+    if algo == 'permutation' and mode == 'bytes':
+        return 'benchmark-seed'
+    return KEYS[algo]
+
+def _letters(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(ord('A'), ord('Z') + 1, n, dtype=np.uint8).tobytes().decode('ascii')
+
+def make_input(mode, size):
+    if mode == 'bytes':
+        return np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes()
+    return _letters(size)
+
+def _timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run_case(algo, mode, size, repeat=3):
+    """Time key setup, encrypt and decrypt of one (algorithm, mode, size) case."""
+    spec = registry.get(algo)
+    key = bench_key(algo, mode, size)
+    data = make_input(mode, size)
+    empty = b'' if mode == 'bytes' else ''
+
+    def setup(decrypt):
+        KEY_CACHE.clear()
+        if mode == 'bytes':
+            cipher = spec.byte_stream_cipher(key, decrypt)
+            cipher.update(empty)
+            return cipher
+        compiled = spec.text_key(key)
+        (compiled.decrypt if decrypt else compiled.encrypt)(empty)
+        return compiled
+
+    results = []
+    inputs = {'encrypt': data}
+    for direction in ('encrypt', 'decrypt'):
+        decrypt = direction == 'decrypt'
+        setup_s, _ = _timed(lambda: setup(decrypt), repeat)
+        src = inputs['encrypt'] if not decrypt else inputs['decrypt']
+        if mode == 'bytes':
+            # a fresh cipher per run: keystream ciphers are stateful
+            seconds, out = _timed(lambda: spec.byte_stream_cipher(key, decrypt).update(src), repeat)
+        else:
+            compiled = setup(decrypt)
+            seconds, out = _timed(lambda: (compiled.decrypt if decrypt else compiled.encrypt)(src), repeat)
+        inputs['decrypt'] = out
+        results.append({
+            'algorithm': algo,
+            'mode': mode,
+            'direction': direction,
+            'size': size,
+            'key_setup_s': setup_s,
+            'seconds': seconds,
+            'mb_per_s': size / (1 << 20) / seconds if seconds > 0 else None,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        })
+    return results
+
+def cases(algorithms, sizes, modes):
+    for algo in algorithms:
+        spec = registry.get(algo)
+        for mode in modes:
+            if mode == 'bytes' and not spec.supports_bytes:
+                continue
+            for size in sizes:
+                yield algo, mode, size
+
+def run(algorithms, sizes, modes=('text', 'bytes'), repeat=3, isolate=True, log=None):
+    results = []
+    for algo, mode, size in cases(algorithms, sizes, modes):
+        reps = repeat if size < (64 << 20) else 1
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                rows = pool.submit(run_case, algo, mode, size, reps).result()
+        else:
+            rows = run_case(algo, mode, size, reps)
+        for row in rows:
+            if log:
+                log(row)
+            results.append(row)
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'isolated': isolate,
+        },
+        'results': results,
+    }
+
+def _case_key(row):
+    return row['algorithm'], row['mode'], row['direction'], row['size']
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """(row, old_mb_per_s, ratio) for every case of new that got slower than threshold."""
+    before = {_case_key(r): r for r in old['results']}
+    regressions = []
+    for row in new['results']:
+        prev = before.get(_case_key(row))
+        if not prev or not prev['mb_per_s'] or not row['mb_per_s']:
+            continue
+        ratio = row['mb_per_s'] / prev['mb_per_s']
+        if ratio < 1 - threshold:
+            regressions.append((row, prev['mb_per_s'], ratio))
+    return regressions
+
+def _format_row(row):
+    return (f"{row['algorithm']:<13} {row['mode']:<5} {row['direction']:<7} {row['size']:>11} B  "
+            f"setup {row['key_setup_s'] * 1e3:8.3f} ms  {row['mb_per_s'] or 0:9.1f} MB/s  "
+            f"peak RSS {row['peak_rss_kb'] / 1024:7.1f} MB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every cipher in text and byte mode.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated sizes, e.g. 1K,1M,256M')
+    parser.add_argument('--algorithms', default=','.join(registry.names()))
+    parser.add_argument('--modes', default='text,bytes')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case (best is kept); 1 above 64M')
+    parser.add_argument('--no-isolate', action='store_true', help='run cases in this process')
+    parser.add_argument('-o', '--output', help='write JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    algorithms = [a.strip() for a in args.algorithms.split(',') if a.strip()]
+    for algo in algorithms:
+        registry.get(algo)  # fail early on unknown names
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+
+    report = run(algorithms, sizes, modes, repeat=args.repeat, isolate=not args.no_isolate,
+                 log=lambda row: print(_format_row(row), flush=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        regressions = compare(old, report, args.threshold)
+        for row, before, ratio in regressions:
+            print(f"REGRESSION {row['algorithm']} {row['mode']} {row['direction']} {row['size']} B: "
+                  f"{before:.1f} -> {row['mb_per_s']:.1f} MB/s ({ratio:.0%})")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
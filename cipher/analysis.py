@@ -0,0 +1,184 @@
+# cipher/analysis.py
+from math import gcd
+from . import ciphers, registry
+from .lazy import LazyModule
+
+np = LazyModule('numpy', globals(), 'np')
+
+# Key search for the letter ciphers. The ciphertext is reduced
+# to one 26-bin letter histogram (np.bincount, a single pass over the text);
+# every candidate key only permutes that histogram, so all 26 shift keys or
+# all 312 affine keys are scored at once with one gather and one broadcast
+# chi-squared against English letter frequencies. The cost after counting is
+# independent of the ciphertext length. Vigenere does the same per column,
+# after estimating the key length from per-column histograms.
+
+# relative frequencies of A..Z in English text
+ENGLISH_FREQUENCIES = (
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015, 0.06094, 0.06966,
+    0.00153, 0.00772, 0.04025, 0.02406, 0.06749, 0.07507, 0.01929, 0.00095, 0.05987,
+    0.06327, 0.09056, 0.02758, 0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+)
+
+MAX_CANDIDATES = 26  # most candidates returned with plaintexts (each is a decryption)
+
+AFFINE_MULTIPLIERS = tuple(a for a in range(1, ciphers.ALPHABET_SIZE) if gcd(a, ciphers.ALPHABET_SIZE) == 1)
+
+def letters_only(text):
+    """The ASCII letters of text, uppercased (the form the letter ciphers decrypt)."""
+    return ciphers.ascii_letters_upper(text.encode('ascii', 'ignore')).decode('ascii')
+
+def letter_indices(letters):
+    """0..25 per letter of an A..Z string."""
+    return np.frombuffer(letters.encode('ascii'), dtype=np.uint8) - ord('A')
+
+def letter_histogram(letters):
+    return np.bincount(letter_indices(letters), minlength=ciphers.ALPHABET_SIZE)
+
+def chi_squared(histograms):
+    """Chi-squared distance of each row of histograms (..., 26) from English."""
+    histograms = np.asarray(histograms, dtype=np.float64)
+    expected = histograms.sum(axis=-1, keepdims=True) * np.asarray(ENGLISH_FREQUENCIES)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(expected > 0, (histograms - expected) ** 2 / expected, 0.0)
+    return terms.sum(axis=-1)
+
+def _rank(scores, keys, text, top, algorithm):
+    if text is not None:
+        top = min(top, MAX_CANDIDATES)
+    order = np.argsort(scores, kind='stable')[:top]
+    return [{'key': keys[i], 'score': float(scores[i]),
+             'plaintext': registry.compile_text_key(algorithm, keys[i]).decrypt(text) if text is not None else None}
+            for i in order.tolist()]
+
+def _decryptable(letters, decrypt, preview):
+    """The part of letters each candidate decrypts (None: no plaintexts)."""
+    if not decrypt:
+        return None
+    return letters if preview is None else letters[:preview]
+
+def crack_shift(text, top=5, decrypt=True, preview=None):
+    """
+    Rank all 26 shift keys for ciphertext text. Returns up to top dicts
+    {key, score, plaintext}, lowest (most English-like) score first.
+    Non-letters are ignored; plaintexts are uppercase letters only, and only
+    the first preview letters are decrypted when preview is given.
+    """
+    text = letters_only(text)
+    hist = letter_histogram(text)
+    k = np.arange(ciphers.ALPHABET_SIZE)
+    # plaintext letter p under key k came from ciphertext letter (p + k) % 26
+    scores = chi_squared(hist[(k[:, None] + k[None, :]) % ciphers.ALPHABET_SIZE])
+    return _rank(scores, [str(i) for i in k], _decryptable(text, decrypt, preview), top, 'shift')
+
+def crack_affine(text, top=5, decrypt=True, preview=None):
+    """Rank all 312 affine keys (a coprime with 26, b in 0..25) like crack_shift; keys are 'a,b'."""
+    text = letters_only(text)
+    hist = letter_histogram(text)
+    a = np.repeat(AFFINE_MULTIPLIERS, ciphers.ALPHABET_SIZE)
+    b = np.tile(np.arange(ciphers.ALPHABET_SIZE), len(AFFINE_MULTIPLIERS))
+    p = np.arange(ciphers.ALPHABET_SIZE)
+    # plaintext letter p under (a, b) came from ciphertext letter (a*p + b) % 26
+    scores = chi_squared(hist[(a[:, None] * p[None, :] + b[:, None]) % ciphers.ALPHABET_SIZE])
+    keys = [f'{x},{y}' for x, y in zip(a.tolist(), b.tolist())]
+    return _rank(scores, keys, _decryptable(text, decrypt, preview), top, 'affine')
+
+# ---------- Vigenere ----------
+
+MAX_VIGENERE_KEY_LENGTH = 20
+RANDOM_IOC = 1 / 26
+
+def _column_histograms(idx, length):
+    """
+    (length, 26) letter counts of every column when idx (int32) is split with
+    period length. The last len(idx) % length letters are left out.
+    """
+    m = len(idx) - len(idx) % length
+    codes = idx[:m].reshape(-1, length) + np.arange(length, dtype=np.int32) * ciphers.ALPHABET_SIZE
+    return np.bincount(codes.ravel(), minlength=length * ciphers.ALPHABET_SIZE).reshape(length, ciphers.ALPHABET_SIZE)
+
+def index_of_coincidence(histograms):
+    """Index of coincidence of each row of histograms (..., 26)."""
+    h = np.asarray(histograms, dtype=np.float64)
+    n = h.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(n > 1, (h * (h - 1)).sum(axis=-1) / (n * (n - 1)), 0.0)
+
+def vigenere_periods(letters, max_key_length=MAX_VIGENERE_KEY_LENGTH):
+    """
+    Mean column index of coincidence for every period 1..max_key_length (an
+    array). At the key length (and its multiples) each column is a plain shift
+    cipher and keeps English's IoC (~0.066); other periods mix shifts and fall
+    towards random text (~0.038).
+    """
+    idx = letter_indices(letters).astype(np.int32)
+    max_key_length = max(1, min(max_key_length, len(idx) // 2 or 1))
+    return np.array([index_of_coincidence(_column_histograms(idx, L)).mean()
+                     for L in range(1, max_key_length + 1)])
+
+def _vigenere_key_for_length(idx, length):
+    """(key, mean chi-squared): the best shift of every column, all columns scored at once."""
+    hist = _column_histograms(idx, length)
+    k = np.arange(ciphers.ALPHABET_SIZE)
+    scores = chi_squared(hist[:, (k[:, None] + k[None, :]) % ciphers.ALPHABET_SIZE])  # (length, 26 shifts)
+    shifts = scores.argmin(axis=1)
+    key = (shifts + ord('A')).astype(np.uint8).tobytes().decode('ascii')
+    return key, float(scores[np.arange(length), shifts].mean())
+
+def crack_vigenere(text, top=1, decrypt=True, max_key_length=MAX_VIGENERE_KEY_LENGTH, key_length=None,
+                   preview=None):
+    """
+    Estimate the Vigenere key length by index of coincidence and recover the
+    key column by column. Returns up to top candidates
+    {key, key_length, ioc, score, plaintext}; the first uses the shortest
+    period whose IoC is close to the best one (multiples of the true length
+    score about as well). Pass key_length to skip the estimate; preview
+    limits each plaintext to its first letters.
+    """
+    if not isinstance(max_key_length, int) or max_key_length < 1:
+        raise ValueError('max_key_length must be a positive integer')
+    letters = letters_only(text)
+    idx = letter_indices(letters).astype(np.int32)
+    if key_length is not None:
+        if not isinstance(key_length, int) or key_length < 1:
+            raise ValueError('key_length must be a positive integer')
+        if key_length > max(1, len(idx) // 2):
+            raise ValueError(f'key_length must be at most half the number of letters ({max(1, len(idx) // 2)})')
+        lengths, ioc = [key_length], {key_length: None}
+    else:
+        periods = vigenere_periods(letters, max_key_length)
+        ioc = {L: float(v) for L, v in enumerate(periods.tolist(), start=1)}
+        # shortest period that gets most of the way from random text to the best IoC
+        threshold = RANDOM_IOC + 0.75 * (periods.max() - RANDOM_IOC)
+        chosen = int(np.argmax(periods >= threshold)) + 1
+        others = [L for L in sorted(ioc, key=ioc.get, reverse=True) if L != chosen]
+        lengths = [chosen] + others
+    plain = _decryptable(letters, decrypt, preview)
+    if plain is not None:
+        top = min(top, MAX_CANDIDATES)
+    candidates, seen = [], set()
+    for L in lengths:
+        if len(candidates) == top:
+            break
+        key, score = _vigenere_key_for_length(idx, L) if len(idx) else ('A' * L, 0.0)
+        key = _primitive_key(key)
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append({'key': key, 'key_length': len(key), 'ioc': ioc[L], 'score': score,
+                           'plaintext': ciphers.VigenereKey(key).decrypt(plain) if plain is not None else None})
+    return candidates
+
+def _primitive_key(key):
+    """Shortest key that repeats to key ('KKKK' -> 'K', 'ABAB' -> 'AB')."""
+    n = len(key)
+    for d in range(1, n):
+        if n % d == 0 and key == key[:d] * (n // d):
+            return key[:d]
+    return key
+
+CRACKERS = {
+    'shift': crack_shift,
+    'affine': crack_affine,
+    'vigenere': crack_vigenere,
+}
@@ -0,0 +1,60 @@
+# cipher/batch.py
+import json
+from . import registry
+
+# Batch text encryption for the JSON API. Items are grouped by (algorithm, key)
+# so each distinct key is parsed and compiled once for the whole batch, then
+# every item of the group runs through the same compiled key object. Results
+# come back in input order; a bad item reports its own error without failing
+# the rest of the batch.
+
+ACTIONS = ('encrypt', 'decrypt')
+
+def _group_key(item):
+    # keys may be strings, numbers or (for Hill) nested lists
+    return item.get('algorithm'), json.dumps(item.get('key'), sort_keys=True)
+
+def _validate(item):
+    if not isinstance(item, dict):
+        raise ValueError('Item must be an object')
+    if not isinstance(item.get('algorithm'), str) or item['algorithm'] not in registry.REGISTRY:
+        raise ValueError('Unknown algorithm')
+    if item.get('action', 'encrypt') not in ACTIONS:
+        raise ValueError("action must be 'encrypt' or 'decrypt'")
+    if not isinstance(item.get('text', ''), str):
+        raise ValueError('text must be a string')
+    if item.get('key') is None:
+        raise ValueError('key is required')
+
+def run_batch(items):
+    """
+    Encrypt/decrypt a list of {algorithm, action, key, text} items.
+    Returns one {"index", "ok", "result"} or {"index", "ok": False, "error"}
+    dict per item, in input order.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for i, item in enumerate(items):
+        try:
+            _validate(item)
+        except ValueError as e:
+            results[i] = {'index': i, 'ok': False, 'error': str(e)}
+            continue
+        groups.setdefault(_group_key(item), []).append(i)
+
+    for indices in groups.values():
+        first = items[indices[0]]
+        try:
+            compiled = registry.compile_text_key(first['algorithm'], first['key'])
+        except Exception as e:
+            for i in indices:
+                results[i] = {'index': i, 'ok': False, 'error': str(e)}
+            continue
+        for i in indices:
+            item = items[i]
+            fn = compiled.decrypt if item.get('action') == 'decrypt' else compiled.encrypt
+            try:
+                results[i] = {'index': i, 'ok': True, 'result': fn(item.get('text', ''))}
+            except Exception as e:
+                results[i] = {'index': i, 'ok': False, 'error': str(e)}
+    return results
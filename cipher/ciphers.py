@@ -1,100 +1,209 @@
 # cipher/ciphers.py
 import string
-import numpy as np
-from sympy import Matrix
 from math import gcd
 import json
 import hashlib
+import os
+import re
+import mmap
+from .keycache import KEY_CACHE
+from .lazy import LazyModule
+
+# NumPy is imported on first use, so importing this module (and the app) stays cheap
+np = LazyModule('numpy', globals(), 'np')
 
 ALPHABET = string.ascii_uppercase # A-Z
 ALPHABET_SIZE = 26
 
+# Every compile_* / *_tables function below returns derived key material from
+# KEY_CACHE (cipher/keycache.py), so repeated calls with the same key skip key
+# setup entirely. Cached values are shared: treat them as read-only.
+
 # ------------------ Helpers ------------------
 
 def normalize_text_for_letters(s):
     """Keep letters only, uppercase."""
+    if s.isascii():  # one C-level pass instead of a per-character loop
+        return ascii_letters_upper(s.encode('ascii')).decode('ascii')
     return ''.join([c for c in s.upper() if c.isalpha()])
 
 def group5(s):
     return ' '.join([s[i:i+5] for i in range(0, len(s), 5)])
 
+def _letter_indices(s):
+    """'A'..'Z' string -> uint8 array of 0..25 (ValueError on anything else)."""
+    if not s.isascii():
+        raise ValueError("Text must contain only letters A-Z")
+    idx = np.frombuffer(s.encode('ascii'), dtype=np.uint8) - ord('A')
+    if idx.size and idx.max() >= ALPHABET_SIZE:  # uint8 wraps anything below 'A' too
+        raise ValueError("Text must contain only letters A-Z")
+    return idx
+
+def _indices_to_letters(idx):
+    """Array of 0..25 -> 'A'..'Z' string."""
+    return (idx + ord('A')).astype(np.uint8).tobytes().decode('ascii')
+
+_ASCII_NON_LETTERS = bytes(b for b in range(128) if not chr(b).isalpha())
+
+def ascii_letters_upper(data: bytes) -> bytes:
+    """The ASCII letters of data, uppercased; every other byte is dropped."""
+    return data.upper().translate(None, _ASCII_NON_LETTERS)
+
+def _letter_codes(s):
+    """
+    Code points of the letters of s (str.isalpha, everything else dropped) as a
+    signed int array, plus the letters as a str for non-ASCII input (None for
+    ASCII, where case can be read off the code ranges directly).
+    """
+    if s.isascii():
+        letters = s.encode('ascii').translate(None, _ASCII_NON_LETTERS)
+        return np.frombuffer(letters, dtype=np.uint8).astype(np.int16), None
+    letters = ''.join(filter(str.isalpha, s))
+    return np.frombuffer(letters.encode('utf-32-le'), dtype=np.uint32).astype(np.int64), letters
+
+class MonoalphabeticCipher:
+    """
+    Compiled key for the letter-mode shift, affine and substitution ciphers.
+    Each is a fixed map A..Z -> cipher_alphabet, so the key is turned into
+    translate tables once and every call is a C-level str/bytes.translate.
+    """
+
+    def __init__(self, cipher_alphabet: str):
+        if len(cipher_alphabet) != ALPHABET_SIZE or not cipher_alphabet.isascii():
+            raise ValueError("Cipher alphabet must be 26 letters A-Z")
+        self.cipher_alphabet = cipher_alphabet
+        self._enc_str = str.maketrans(ALPHABET, cipher_alphabet)
+        # bytes tables for the ASCII fast path: encrypt folds lowercase into the
+        # same table and drops non-letters (normalize_text_for_letters) in one pass
+        enc = bytearray(range(256))
+        for i, ch in enumerate(cipher_alphabet.encode('ascii')):
+            enc[ord('A') + i] = enc[ord('a') + i] = ch
+        self._enc_bytes = bytes(enc)
+        self._dec_bytes = bytes.maketrans(cipher_alphabet.encode('ascii'), ALPHABET.encode('ascii'))
+        self._cipher_letters = cipher_alphabet.encode('ascii')
+
+    def encrypt(self, plaintext: str) -> str:
+        """Normalize (letters only, uppercase) and encrypt."""
+        if plaintext.isascii():
+            data = plaintext.encode('ascii').translate(self._enc_bytes, _ASCII_NON_LETTERS)
+            return data.decode('ascii')
+        pt = normalize_text_for_letters(plaintext)
+        if not pt.isascii():
+            raise ValueError("Text must contain only letters A-Z")
+        return pt.translate(self._enc_str)
+
+    def decrypt(self, ciphertext: str) -> str:
+        """Decrypt ciphertext made only of letters from the cipher alphabet."""
+        if not ciphertext.isascii():
+            raise ValueError("Ciphertext must contain only letters A-Z")
+        data = ciphertext.encode('ascii')
+        if data.translate(None, self._cipher_letters):
+            raise ValueError("Ciphertext must contain only letters A-Z")
+        return data.translate(self._dec_bytes).decode('ascii')
+
+# Byte-mode ciphers (shift, affine, substitution) are all fixed maps of 0..255,
+# so each key is compiled to a 256-entry table and applied with bytes.translate,
+# which runs in C instead of a per-byte Python loop.
+
+def _byte_table(fn):
+    """Build a 256-entry translation table from fn(byte) -> byte."""
+    return bytes(fn(i) % 256 for i in range(256))
+
+def _apply_byte_table(data, table):
+    """Map every byte of data through table (bytes-like in, bytes out)."""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    return data.translate(table)
+
 # ---------- Shift Cipher (letter-mode and byte-mode) ----------
 
-def shift_encrypt_text(plaintext, key):
+def _shift_text_key(key):
     k = int(key) % ALPHABET_SIZE
-    pt = normalize_text_for_letters(plaintext)
-    out = []
-    for ch in pt:
-        idx = ALPHABET.index(ch)
-        out.append(ALPHABET[(idx + k) % ALPHABET_SIZE])
-    return ''.join(out)
+    return MonoalphabeticCipher(ALPHABET[k:] + ALPHABET[:k])
+
+def compile_shift_text_key(key):
+    return KEY_CACHE.get('shift-text', key, _shift_text_key)
+
+def shift_encrypt_text(plaintext, key):
+    return compile_shift_text_key(key).encrypt(plaintext)
 
 def shift_decrypt_text(ciphertext, key):
-    k = int(key) % ALPHABET_SIZE
-    out = []
-    for ch in ciphertext:
-        idx = ALPHABET.index(ch)
-        out.append(ALPHABET[(idx - k) % ALPHABET_SIZE])
-    return ''.join(out)
+    return compile_shift_text_key(key).decrypt(ciphertext)
 
 # -----------------------------
 # Shift Cipher (bytes)
 # -----------------------------
 
 # byte-wise
-def shift_encrypt_bytes(data: bytes, key):
+def _shift_byte_tables(key):
     k = int(key) % 256
-    return bytes([(b + k) % 256 for b in data])
+    return _byte_table(lambda b: b + k), _byte_table(lambda b: b - k)
+
+def shift_byte_tables(key):
+    """Return (encrypt_table, decrypt_table) for the byte-wise shift cipher."""
+    return KEY_CACHE.get('shift-bytes', key, _shift_byte_tables)
+
+def shift_encrypt_bytes(data: bytes, key):
+    return _apply_byte_table(data, shift_byte_tables(key)[0])
 
 def shift_decrypt_bytes(data: bytes, key):
-    k = int(key) % 256
-    return bytes([(b - k) % 256 for b in data])
+    return _apply_byte_table(data, shift_byte_tables(key)[1])
 
 # ---------- Substitution Cipher ----------
 
-def substitution_encrypt_text(plaintext, key_mapping_str):
+def _substitution_text_key(key_mapping_str):
+    if len(key_mapping_str) != 26 or not key_mapping_str.isalpha() or not key_mapping_str.isascii():
+        raise ValueError("Key must be 26 alphabetic characters")
+    return MonoalphabeticCipher(key_mapping_str.upper())
+
+def compile_substitution_text_key(key_mapping_str):
     """
     key_mapping_str: 26-char string mapping A..Z to cipher letters.
     Example: "QWERTYUIOPASDFGHJKLZXCVBNM"
     """
-    if len(key_mapping_str) != 26 or not key_mapping_str.isalpha():
-        raise ValueError("Key must be 26 alphabetic characters")
-    mapping = {ALPHABET[i]: key_mapping_str.upper()[i] for i in range(26)}
-    pt = normalize_text_for_letters(plaintext)
-    return ''.join(mapping[c] for c in pt)
+    return KEY_CACHE.get('substitution-text', key_mapping_str, _substitution_text_key)
+
+def substitution_encrypt_text(plaintext, key_mapping_str):
+    return compile_substitution_text_key(key_mapping_str).encrypt(plaintext)
 
 def substitution_decrypt_text(ciphertext, key_mapping_str):
-    if len(key_mapping_str) != 26 or not key_mapping_str.isalpha():
-        raise ValueError("Key must be 26 alphabetic characters")
-    mapping = {key_mapping_str.upper()[i]: ALPHABET[i] for i in range(26)}
-    return ''.join(mapping[c] for c in ciphertext)
+    return compile_substitution_text_key(key_mapping_str).decrypt(ciphertext)
 
 # -----------------------------
 # Substitution Cipher (bytes)
 # -----------------------------
 
+def _key_seed(key: str):
+    """32-bit PRNG seed derived from key (shared by byte substitution and permutation)."""
+    seed_bytes = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(seed_bytes[:8], "big") % (2**32)  # fix: force into 32-bit range
+
 # byte-wise substitution using a 256-length mapping derived from key
 def make_byte_subst_from_key(key: str):
     # deterministically generate a permutation of 0..255 using key as seed
-    seed_bytes = hashlib.sha256(key.encode("utf-8")).digest()
-    seed_int = int.from_bytes(seed_bytes[:8], "big") % (2**32)  # fix: force into 32-bit range
-    rng = np.random.RandomState(seed_int)
+    rng = np.random.RandomState(_key_seed(key))
     perm = list(range(256))
     rng.shuffle(perm)
     return bytes(perm)
 
+def _substitution_byte_tables(key: str):
+    table = make_byte_subst_from_key(key)
+    inv = [0] * 256
+    for i, v in enumerate(table):
+        inv[v] = i
+    return table, bytes(inv)
+
+def substitution_byte_tables(key: str):
+    """Return (encrypt_table, decrypt_table) for the byte-wise substitution cipher."""
+    return KEY_CACHE.get('substitution-bytes', key, _substitution_byte_tables)
+
 def substitution_encrypt_bytes(data: bytes, key: str) -> bytes:
     """Encrypt data with substitution cipher derived from key"""
-    table = make_byte_subst_from_key(key)
-    return bytes([table[b] for b in data])
+    return _apply_byte_table(data, substitution_byte_tables(key)[0])
 
 def substitution_decrypt_bytes(data: bytes, key: str) -> bytes:
     """Decrypt data with substitution cipher derived from key"""
-    table = make_byte_subst_from_key(key)
-    inv = [0] * 256
-    for i, v in enumerate(table):
-        inv[v] = i
-    return bytes([inv[b] for b in data])
+    return _apply_byte_table(data, substitution_byte_tables(key)[1])
 
 # ---------- Affine Cipher (text mode mod26) ----------
 
@@ -110,53 +219,100 @@ def modinv(a, m):
         raise ValueError('No modular inverse')
     return x % m
 
-def affine_encrypt_text(plaintext, a_b):
+def _affine_text_key(a_b):
     # a_b is string like "a,b"
     a, b = map(int, a_b.split(','))
     if egcd(a, ALPHABET_SIZE)[0] != 1:
         raise ValueError('a must be coprime with 26')
-    pt = normalize_text_for_letters(plaintext)
-    out = []
-    for c in pt:
-        x = ALPHABET.index(c)
-        out.append(ALPHABET[(a*x + b) % ALPHABET_SIZE])
-    return ''.join(out)
+    return MonoalphabeticCipher(''.join(ALPHABET[(a*x + b) % ALPHABET_SIZE] for x in range(ALPHABET_SIZE)))
+
+def compile_affine_text_key(a_b):
+    return KEY_CACHE.get('affine-text', a_b, _affine_text_key)
+
+def affine_encrypt_text(plaintext, a_b):
+    return compile_affine_text_key(a_b).encrypt(plaintext)
 
 def affine_decrypt_text(ciphertext, a_b):
-    a, b = map(int, a_b.split(','))
-    inva = modinv(a, ALPHABET_SIZE)
-    out = []
-    for c in ciphertext:
-        y = ALPHABET.index(c)
-        out.append(ALPHABET[(inva*(y - b)) % ALPHABET_SIZE])
-    return ''.join(out)
+    return compile_affine_text_key(a_b).decrypt(ciphertext)
 
 # -----------------------------
 # Affine Cipher (bytes)
 # -----------------------------
 
 # byte-wise affine modulo 256
-def affine_encrypt_bytes(data: bytes, a_b):
+def _parse_affine_bytes_key(a_b):
     try:
         a, b = map(int, a_b.split(','))
     except Exception:
         raise ValueError("Key must be in format 'a,b'")
+    return a, b
+
+def _affine_encrypt_byte_table(a_b):
+    a, b = _parse_affine_bytes_key(a_b)
     if egcd(a, 256)[0] != 1:
         raise ValueError("Parameter 'a' must be coprime with 256")
-    return bytes([(a * b0 + b) % 256 for b0 in data])
+    return _byte_table(lambda x: a * x + b)
 
-def affine_decrypt_bytes(data: bytes, a_b):
-    try:
-        a, b = map(int, a_b.split(','))
-    except Exception:
-        raise ValueError("Key must be in format 'a,b'")
+def _affine_decrypt_byte_table(a_b):
+    a, b = _parse_affine_bytes_key(a_b)
     inva = modinv(a, 256)
     if inva is None:
         raise ValueError("'a' has no modular inverse mod 256")
-    return bytes([(inva * (b0 - b)) % 256 for b0 in data])
+    return _byte_table(lambda y: inva * (y - b))
+
+def affine_encrypt_byte_table(a_b):
+    return KEY_CACHE.get('affine-bytes-encrypt', a_b, _affine_encrypt_byte_table)
+
+def affine_decrypt_byte_table(a_b):
+    return KEY_CACHE.get('affine-bytes-decrypt', a_b, _affine_decrypt_byte_table)
+
+def affine_encrypt_bytes(data: bytes, a_b):
+    return _apply_byte_table(data, affine_encrypt_byte_table(a_b))
+
+def affine_decrypt_bytes(data: bytes, a_b):
+    return _apply_byte_table(data, affine_decrypt_byte_table(a_b))
 
 # ---------- Vigenere Cipher (letter-mode only) ----------
 
+def _build_vigenere_key_shifts(key):
+    codes, letters = _letter_codes(key)
+    if not len(codes):
+        raise ValueError("Key must contain at least one letter A-Z")
+    upper, _ = _upper_letter_codes(codes, letters)
+    shifts = ((upper - ord('A')) % 26).astype(np.int16)
+    shifts.flags.writeable = False
+    return shifts
+
+def _vigenere_key_shifts(key):
+    return KEY_CACHE.get('vigenere', key, _build_vigenere_key_shifts)
+
+def _vigenere_kernel(text, shifts, sign, offset=0):
+    """
+    Shift every letter of text by sign * key (tiled, starting at key letter
+    offset), keeping case; non-letters are dropped.
+    """
+    codes, letters = _letter_codes(text)
+    if letters is None:
+        base = (codes & 0x20) | ord('A')  # 'A' or 'a' depending on the case bit
+    else:
+        upper = np.fromiter(map(str.isupper, letters), dtype=bool, count=len(letters))
+        base = np.where(upper, ord('A'), ord('a'))
+    if offset % len(shifts):
+        shifts = np.roll(shifts, -(offset % len(shifts)))
+    reps = -(-len(codes) // len(shifts))
+    out = (codes - base + sign * np.tile(shifts, reps)[:len(codes)]) % 26 + base
+    return out.astype(np.uint8).tobytes().decode('ascii')
+
+class VigenereKey:
+    def __init__(self, key):
+        self.shifts = _vigenere_key_shifts(key)
+
+    def encrypt(self, plaintext):
+        return _vigenere_kernel(plaintext, self.shifts, 1)
+
+    def decrypt(self, ciphertext):
+        return _vigenere_kernel(ciphertext, self.shifts, -1)
+
 def vigenere_encrypt_text(plaintext, key):
     """
     Vigenere encryption (alphabet-only mode):
@@ -164,23 +320,7 @@ def vigenere_encrypt_text(plaintext, key):
     - Uses only letters from key
     - Output: only letters A-Z/a-z
     """
-    key_letters = [ch.upper() for ch in key if ch.isalpha()]
-    if not key_letters:
-        raise ValueError("Key must contain at least one letter A-Z")
-
-    filtered_plain = [ch for ch in plaintext if ch.isalpha()]  # only keep letters
-    out = []
-    ki = 0
-    for ch in filtered_plain:
-        k = ord(key_letters[ki % len(key_letters)]) - ord('A')
-        if ch.isupper():
-            base = ord('A')
-        else:
-            base = ord('a')
-        out_char = chr((ord(ch) - base + k) % 26 + base)
-        out.append(out_char)
-        ki += 1
-    return ''.join(out)
+    return _vigenere_kernel(plaintext, _vigenere_key_shifts(key), 1)
 
 def vigenere_decrypt_text(ciphertext, key):
     """
@@ -188,94 +328,112 @@ def vigenere_decrypt_text(ciphertext, key):
     - Ignores all non-letter characters (they are removed)
     - Output: only letters A-Z/a-z
     """
-    key_letters = [ch.upper() for ch in key if ch.isalpha()]
-    if not key_letters:
-        raise ValueError("Key must contain at least one letter A-Z")
-
-    filtered_ciph = [ch for ch in ciphertext if ch.isalpha()]  # only keep letters
-    out = []
-    ki = 0
-    for ch in filtered_ciph:
-        k = ord(key_letters[ki % len(key_letters)]) - ord('A')
-        if ch.isupper():
-            base = ord('A')
-        else:
-            base = ord('a')
-        out_char = chr((ord(ch) - base - k) % 26 + base)
-        out.append(out_char)
-        ki += 1
-    return ''.join(out)
+    return _vigenere_kernel(ciphertext, _vigenere_key_shifts(key), -1)
 
 # ---------- Hill Cipher (letter-mode) ----------
 
-# def parse_hill_key(key: str):
-#     # Terima input dengan spasi atau koma
-#     parts = key.replace(",", " ").split()
-#     nums = list(map(int, parts))
-#     n = int(len(nums) ** 0.5)
-#     if n * n != len(nums):
-#         raise ValueError("Hill key must form an n×n square matrix (length n^2).")
-#     K = Matrix(np.array(nums).reshape((n, n)))
-#     det = int(K.det()) % ALPHABET_SIZE
-#     # Validasi invertibility (det gcd 26 == 1)
-#     if egcd(det, ALPHABET_SIZE)[0] != 1:
-#         raise ValueError("Hill key matrix is not invertible modulo 26")
-#     return K
+def parse_hill_key(key):
+    """
+    Hill key as a list of lists. Accepts a nested list, a flat list of n*n
+    numbers, or a string of numbers separated by spaces, commas or ';'.
+    """
+    if isinstance(key, str):
+        # Terima input dengan spasi atau koma
+        parts = key.replace(",", " ").replace(";", " ").split()
+        try:
+            key = list(map(int, parts))
+        except ValueError:
+            raise ValueError("Hill key must contain only integers")
+    if key and all(isinstance(row, (list, tuple)) for row in key):
+        return [list(row) for row in key]
+    nums = list(key)
+    n = int(len(nums) ** 0.5)
+    if n == 0 or n * n != len(nums):
+        raise ValueError("Hill key must form an n×n square matrix (length n^2).")
+    return [nums[i*n:(i+1)*n] for i in range(n)]
+
+def _hill_key_array(key_matrix):
+    K = np.array(key_matrix, dtype=np.int64)
+    if K.ndim != 2 or K.shape[0] != K.shape[1] or K.shape[0] == 0:
+        raise ValueError("Hill key matrix must be square (n x n)")
+    return K % ALPHABET_SIZE
+
+def _inverse_mod_prime(M, p):
+    """Gauss-Jordan inverse of the square matrix M (list of lists) mod prime p; None if singular."""
+    n = len(M)
+    A = [[x % p for x in row] + [int(i == j) for j in range(n)] for i, row in enumerate(M)]
+    for col in range(n):
+        pivot = next((r for r in range(col, n) if A[r][col]), None)
+        if pivot is None:
+            return None
+        A[col], A[pivot] = A[pivot], A[col]
+        inv = pow(A[col][col], -1, p)
+        A[col] = [x * inv % p for x in A[col]]
+        for r in range(n):
+            f = A[r][col]
+            if r != col and f:
+                A[r] = [(x - f * y) % p for x, y in zip(A[r], A[col])]
+    return [row[n:] for row in A]
+
+def hill_inverse_mod26(M):
+    """
+    Inverse of M mod 26. 26 = 2 * 13, so invert mod both primes and combine
+    entry-wise with the CRT: x = a (mod 2), x = b (mod 13) -> x = 13a + 14b (mod 26).
+    """
+    inv2 = _inverse_mod_prime(M, 2)
+    inv13 = _inverse_mod_prime(M, 13)
+    if inv2 is None or inv13 is None:
+        raise ValueError("Hill key matrix is not invertible mod 26")
+    return [[(13 * a + 14 * b) % ALPHABET_SIZE for a, b in zip(r2, r13)] for r2, r13 in zip(inv2, inv13)]
+
+def _hill_apply(text, M):
+    """Multiply every n-letter block of text (length multiple of n) by M mod 26."""
+    n = M.shape[0]
+    blocks = _letter_indices(text).astype(np.int64).reshape(-1, n)
+    # row-vector form of K * vec for all blocks at once
+    return _indices_to_letters((blocks @ M.T) % ALPHABET_SIZE)
+
+class HillKey:
+    """Compiled Hill key: the matrix mod 26 and its inverse (computed on first decrypt)."""
+
+    def __init__(self, key_matrix):
+        self.matrix = _hill_key_array(key_matrix)
+        self.n = self.matrix.shape[0]
+        self._inverse = None
+
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            self._inverse = np.array(hill_inverse_mod26(self.matrix.tolist()), dtype=np.int64)
+        return self._inverse
+
+    def encrypt(self, plaintext):
+        pt = normalize_text_for_letters(plaintext)
+        # pad
+        pt += 'X' * (-len(pt) % self.n)
+        return _hill_apply(pt, self.matrix)
+
+    def decrypt(self, ciphertext):
+        if len(ciphertext) % self.n:
+            raise ValueError(f"Ciphertext length must be a multiple of {self.n} for this Hill key")
+        return _hill_apply(ciphertext, self.inverse)
+
+def compile_hill_key(key_matrix):
+    return KEY_CACHE.get('hill', key_matrix, HillKey)
 
 def hill_encrypt_text(plaintext, key_matrix):
     """
     plaintext: string (letters A-Z)
     key_matrix: list of list of int (n x n)
     """
-    pt = normalize_text_for_letters(plaintext)
-    K = Matrix(key_matrix)
-    n = K.shape[0]
-    out = ''
-    # pad
-    while len(pt) % n != 0:
-        pt += 'X'
-    for i in range(0, len(pt), n):
-        vec = Matrix([ALPHABET.index(c) for c in pt[i:i+n]])
-        res = (K * vec) % ALPHABET_SIZE
-        out += ''.join(ALPHABET[int(x)] for x in res)
-    return out
+    return compile_hill_key(key_matrix).encrypt(plaintext)
 
 def hill_decrypt_text(ciphertext, key_matrix):
-    K = Matrix(key_matrix)
-    n = K.shape[0]
-    Kinv = K.inv_mod(ALPHABET_SIZE)
-    out = ''
-    for i in range(0, len(ciphertext), n):
-        vec = Matrix([ALPHABET.index(c) for c in ciphertext[i:i+n]])
-        res = (Kinv * vec) % ALPHABET_SIZE
-        out += ''.join(ALPHABET[int(x)] for x in res)
-    return out
+    return compile_hill_key(key_matrix).decrypt(ciphertext)
 
 # ---------- Permutation Cipher ----------
 
-def permutation_encrypt_text(plaintext, key_permutation):
-    """
-    key_permutation: comma-separated indices (e.g. "2,0,1").
-    """
-    try:
-        perm = list(map(int, key_permutation.split(',')))
-    except Exception:
-        raise ValueError("Key must be comma-separated integers")
-    k = len(perm)
-    if sorted(perm) != list(range(k)):
-        raise ValueError("Key permutation must be a valid permutation of 0..k-1")
-
-    pt = normalize_text_for_letters(plaintext)
-    while len(pt) % k != 0:
-        pt += 'X'  # pad with X
-
-    out = ''
-    for i in range(0, len(pt), k):
-        block = pt[i:i+k]
-        out += ''.join(block[perm[j]] for j in range(k))
-    return out
-
-def permutation_decrypt_text(ciphertext, key_permutation):
+def _permutation_text_key(key_permutation):
     try:
         perm = list(map(int, key_permutation.split(',')))
     except Exception:
@@ -283,16 +441,46 @@ def permutation_decrypt_text(ciphertext, key_permutation):
     k = len(perm)
     if sorted(perm) != list(range(k)):
         raise ValueError("Key permutation must be a valid permutation of 0..k-1")
-
     inv = [0] * k
     for i, p in enumerate(perm):
         inv[p] = i
+    return perm, inv
+
+def permutation_text_key(key_permutation):
+    """Return (perm, inverse) index lists for a comma-separated permutation key."""
+    return KEY_CACHE.get('permutation-text', key_permutation, _permutation_text_key)
+
+def _permute_blocks(text, order):
+    """Reorder every len(order)-char block of text as block[order[j]] (len(text) multiple of k)."""
+    if text.isascii():
+        codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        return codes.reshape(-1, len(order))[:, order].tobytes().decode('ascii')
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return codes.reshape(-1, len(order))[:, order].tobytes().decode('utf-32-le')
+
+class PermutationTextKey:
+    def __init__(self, key_permutation):
+        self.perm, self.inv = permutation_text_key(key_permutation)
+        self.n = len(self.perm)
+
+    def encrypt(self, plaintext):
+        pt = normalize_text_for_letters(plaintext)
+        pt += 'X' * (-len(pt) % len(self.perm))  # pad with X
+        return _permute_blocks(pt, self.perm)
+
+    def decrypt(self, ciphertext):
+        if len(ciphertext) % len(self.inv):
+            raise ValueError(f"Ciphertext length must be a multiple of {len(self.inv)} for this permutation key")
+        return _permute_blocks(ciphertext, self.inv)
 
-    out = ''
-    for i in range(0, len(ciphertext), k):
-        block = ciphertext[i:i+k]
-        out += ''.join(block[inv[j]] for j in range(k))
-    return out
+def permutation_encrypt_text(plaintext, key_permutation):
+    """
+    key_permutation: comma-separated indices (e.g. "2,0,1").
+    """
+    return PermutationTextKey(key_permutation).encrypt(plaintext)
+
+def permutation_decrypt_text(ciphertext, key_permutation):
+    return PermutationTextKey(key_permutation).decrypt(ciphertext)
 
 # -----------------------------
 # Permutation Cipher (bytes)
@@ -301,17 +489,90 @@ def permutation_decrypt_text(ciphertext, key_permutation):
 # byte-wise permutation: derive permutation of indices from key (for small files)
 # but for large files, we implement a stream-permutation by generating a keystream of positions
 
+# Mask bytes are drawn in chunks of this many bytes. Must be a multiple of 4:
+# RandomState.randint(..., dtype=uint8) splits every 32-bit draw into 4 mask
+# bytes, so 4-aligned chunks continue exactly the sequence of one big draw.
+KEYSTREAM_CHUNK = 1 << 20
+
+def _keystream_seed_state(key: str):
+    return np.random.RandomState(_key_seed(key)).get_state(legacy=False)
+
+class PermutationKeystream:
+    """
+    Chunked XOR keystream of permutation_encrypt_bytes.
+    Produces the same mask as RandomState(seed).randint(0, 256, size=n, dtype=uint8)
+    without materializing it, and can start at any byte offset.
+    """
+
+    def __init__(self, key: str, offset=0, chunk_size=KEYSTREAM_CHUNK):
+        if chunk_size <= 0 or chunk_size % 4:
+            raise ValueError("Keystream chunk size must be a positive multiple of 4")
+        self.chunk_size = chunk_size
+        self._seed_state = KEY_CACHE.get('permutation-bytes', key, _keystream_seed_state)
+        self.position = None
+        self.seek(offset)
+
+    def seek(self, offset):
+        """
+        Position the keystream at byte offset. Whole 32-bit draws are skipped, not
+        generated; seeking forward continues from the current state.
+        """
+        if offset < 0:
+            raise ValueError("Keystream offset must be non-negative")
+        if self.position is not None and offset >= self.position:
+            self._skip(offset - self.position)
+            return
+        self._bitgen = np.random.MT19937()
+        self._bitgen.state = self._seed_state
+        self._rng = np.random.RandomState(self._bitgen)
+        self._pending = self._draw(0)
+        self.position = 0
+        self._skip(offset)
+
+    def _skip(self, n):
+        self.position += n
+        if n <= len(self._pending):
+            self._pending = self._pending[n:]
+            return
+        n -= len(self._pending)
+        self._bitgen.random_raw(n // 4, output=False)
+        self._pending = self._draw(4)[n % 4:] if n % 4 else self._draw(0)
+    def _draw(self, n):
+        return self._rng.randint(0, 256, size=n, dtype=np.uint8)
+
+    def _mask(self, n):
+        """Next n mask bytes (n <= chunk_size)."""
+        if n <= len(self._pending):
+            mask, self._pending = self._pending[:n], self._pending[n:]
+            return mask
+        need = n - len(self._pending)
+        fresh = self._draw((need + 3) & ~3)
+        mask = np.concatenate((self._pending, fresh[:need]))
+        self._pending = fresh[need:]
+        return mask
+
+    def xor_into(self, src, out):
+        """XOR uint8 array src with the next len(src) keystream bytes into out."""
+        for i in range(0, len(src), self.chunk_size):
+            j = min(i + self.chunk_size, len(src))
+            np.bitwise_xor(src[i:j], self._mask(j - i), out=out[i:j])
+        self.position += len(src)
+
+    def xor(self, data) -> bytes:
+        """XOR data with the next len(data) keystream bytes."""
+        src = np.frombuffer(data, dtype=np.uint8)
+        out = np.empty_like(src)
+        self.xor_into(src, out)
+        return out.tobytes()
+
+    update = xor  # incremental cipher interface (see byte_stream_cipher)
+
 def permutation_encrypt_bytes(data: bytes, key: str) -> bytes:
     """
     Pseudo-random stream cipher using XOR.
     Generates mask deterministically from key using numpy PRNG.
     """
-    seed_bytes = hashlib.sha256(key.encode("utf-8")).digest()
-    seed_int = int.from_bytes(seed_bytes[:8], "big") % (2**32)  # fix: force into 32-bit range
-    rng = np.random.RandomState(seed_int)
-
-    mask = rng.randint(0, 256, size=len(data), dtype=np.uint8)
-    return bytes([b ^ int(mask[i]) for i, b in enumerate(data)])
+    return PermutationKeystream(key).xor(data)
 
 def permutation_decrypt_bytes(data: bytes, key: str) -> bytes:
     """Decryption is symmetric since XOR is its own inverse"""
@@ -319,6 +580,39 @@ def permutation_decrypt_bytes(data: bytes, key: str) -> bytes:
 
 # ---------- One-Time Pad (text-mode only) ----------
 
+def _upper_letter_codes(codes, letters):
+    """
+    (ord(ch.upper()) per letter, ch.islower() mask) for the output of
+    _letter_codes. Letters whose uppercase is not a single character ('ß' ->
+    'SS') have no shift and are rejected with ValueError.
+    """
+    if letters is None:
+        return codes & ~0x20, codes >= ord('a')
+    uppers = list(map(str.upper, letters))
+    bad = next((ch for ch, up in zip(letters, uppers) if len(up) != 1), None)
+    if bad is not None:
+        raise ValueError(f"Letter {bad!r} has no single-letter uppercase form ({bad.upper()!r}); "
+                         f"remove or replace it")
+    upper = np.frombuffer(''.join(uppers).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    return upper, np.fromiter(map(str.islower, letters), dtype=bool, count=len(letters))
+
+def _otp_key_offsets(keytext):
+    """Shift (0..25) of every letter of the key text, in order."""
+    key_codes, key_letters = _letter_codes(keytext)
+    key_upper, _ = _upper_letter_codes(key_codes, key_letters)
+    return ((key_upper - ord('A')) % 26).astype(np.int16)
+
+def _otp_kernel(text, key_offsets, sign, what, offset=0):
+    """OTP over the letters of text using key letters from offset on."""
+    codes, letters = _letter_codes(text)
+    letters_needed = offset + len(codes)
+    if len(key_offsets) < letters_needed:
+        raise ValueError(f'Key file shorter than {what} for OTP (need at least {letters_needed} letters)')
+    upper, lower = _upper_letter_codes(codes, letters)
+    out = (upper - ord('A') + sign * key_offsets[offset:letters_needed]) % 26 + ord('A')
+    out[lower] += ord('a') - ord('A')  # case preserved
+    return out.astype(np.uint8).tobytes().decode('ascii')
+
 def otp_encrypt_text(plaintext, keytext):
     """
     OTP (alphabet letters only, non-letters removed in output).
@@ -327,27 +621,7 @@ def otp_encrypt_text(plaintext, keytext):
     - Uses letters from keytext only
     - Key must have at least as many letters as the plaintext letters
     """
-    key_letters = [ch.upper() for ch in keytext if ch.isalpha()]
-    letters_needed = sum(1 for ch in plaintext if ch.isalpha())
-    if len(key_letters) < letters_needed:
-        raise ValueError(f'Key file shorter than plaintext for OTP (need at least {letters_needed} letters)')
-
-    out = []
-    ki = 0
-    for ch in plaintext:
-        if ch.isalpha():
-            p_idx = ord(ch.upper()) - ord('A')
-            k_idx = ord(key_letters[ki]) - ord('A')
-            res_idx = (p_idx + k_idx) % 26
-            res_ch = chr(res_idx + ord('A'))
-            # case preserved
-            if ch.islower():
-                res_ch = res_ch.lower()
-            out.append(res_ch)
-            ki += 1
-        # else: skip non-alpha (do not append)
-
-    return ''.join(out)
+    return _otp_kernel(plaintext, _otp_key_offsets(keytext), 1, 'plaintext')
 
 def otp_decrypt_text(ciphertext, keytext):
     """
@@ -357,26 +631,28 @@ def otp_decrypt_text(ciphertext, keytext):
     - Uses letters from keytext only
     - Key must have at least as many letters as ciphertext letters
     """
-    key_letters = [ch.upper() for ch in keytext if ch.isalpha()]
-    letters_needed = sum(1 for ch in ciphertext if ch.isalpha())
-    if len(key_letters) < letters_needed:
-        raise ValueError(f'Key file shorter than ciphertext for OTP (need at least {letters_needed} letters)')
-
-    out = []
-    ki = 0
-    for ch in ciphertext:
-        if ch.isalpha():
-            c_idx = ord(ch.upper()) - ord('A')
-            k_idx = ord(key_letters[ki]) - ord('A')
-            res_idx = (c_idx - k_idx) % 26
-            res_ch = chr(res_idx + ord('A'))
-            if ch.islower():
-                res_ch = res_ch.lower()
-            out.append(res_ch)
-            ki += 1
-        # else: skip non-alpha (do not append)
-
-    return ''.join(out)
+    return _otp_kernel(ciphertext, _otp_key_offsets(keytext), -1, 'ciphertext')
+
+def otp_letters_needed(text):
+    """Number of key letters OTP consumes for text (its letters, non-letters are dropped)."""
+    return len(_letter_codes(text)[0])
+
+def otp_with_pad_letters(text, pad_letters: bytes, decrypt=False):
+    """OTP of text with key letters given as uppercase A-Z bytes (e.g. a slice of a mapped pad)."""
+    offsets = (np.frombuffer(pad_letters, dtype=np.uint8) - ord('A')).astype(np.int16)
+    return _otp_kernel(text, offsets, -1 if decrypt else 1, 'ciphertext' if decrypt else 'plaintext')
+
+class OneTimePadKey:
+    """OTP key text compiled to its letter shifts; each call starts at the first key letter."""
+
+    def __init__(self, keytext):
+        self.offsets = _otp_key_offsets(keytext)
+
+    def encrypt(self, plaintext):
+        return _otp_kernel(plaintext, self.offsets, 1, 'plaintext')
+
+    def decrypt(self, ciphertext):
+        return _otp_kernel(ciphertext, self.offsets, -1, 'ciphertext')
 
 # ---------- Playfair Cipher (classic: I/J combined -> 5x5) ----------
 # Note: this implementation treats 'J' as 'I' (classic Playfair).
@@ -388,30 +664,70 @@ def _playfair_prepare_key(key: str):
     - Key can contain non-letters; only letters used.
     - 'J' in key or plaintext is treated as 'I'.
     """
-    key = (key or "").upper()
-    seen = []
-    for ch in key:
-        if not ch.isalpha():
-            continue
-        if ch == 'J':
-            ch = 'I'
-        if ch not in seen and ch in PLAYFAIR_ALPHABET:
-            seen.append(ch)
-    # fill remaining letters
-    for ch in PLAYFAIR_ALPHABET:
-        if ch not in seen:
-            seen.append(ch)
+    key = (key or "").upper().replace('J', 'I')
+    # dict keeps first-seen order; key letters first, then the rest of the alphabet
+    seen = dict.fromkeys(ch for ch in key if ch in PLAYFAIR_ALPHABET)
+    seen.update(dict.fromkeys(PLAYFAIR_ALPHABET))
+    seen = list(seen)
     # to 5x5 matrix
     table = [seen[i*5:(i+1)*5] for i in range(5)]
     return table
 
-def _playfair_find_position(table, ch):
-    """Return (row, col) in 5x5 table for ch."""
-    for r in range(5):
-        for c in range(5):
-            if table[r][c] == ch:
-                return r, c
-    raise ValueError(f"Character {ch} not found in Playfair table")
+def _playfair_pair(table, ra, ca, rb, cb, step):
+    """Playfair rule for one digraph; step=+1 encrypts, -1 decrypts."""
+    if ra == rb:
+        # same row -> take right (left when decrypting)
+        return table[ra][(ca + step) % 5] + table[rb][(cb + step) % 5]
+    if ca == cb:
+        # same column -> take down (up when decrypting)
+        return table[(ra + step) % 5][ca] + table[(rb + step) % 5][cb]
+    # rectangle swap
+    return table[ra][cb] + table[rb][ca]
+
+class PlayfairKey:
+    """
+    Compiled Playfair key: the 5x5 table, a letter -> (row, col) index and the
+    full 25x25 digraph -> digraph tables for both directions, so encrypting or
+    decrypting is one dict lookup per pair. Never mutated after __init__, so one
+    instance (from compile_playfair_key) is shared by every request using the key.
+    """
+
+    def __init__(self, key: str):
+        self.table = _playfair_prepare_key(key)
+        self.position = {ch: (r, c) for r, row in enumerate(self.table) for c, ch in enumerate(row)}
+        self.encrypt_pairs = {}
+        self.decrypt_pairs = {}
+        for a, (ra, ca) in self.position.items():
+            for b, (rb, cb) in self.position.items():
+                self.encrypt_pairs[a + b] = _playfair_pair(self.table, ra, ca, rb, cb, 1)
+                self.decrypt_pairs[a + b] = _playfair_pair(self.table, ra, ca, rb, cb, -1)
+
+    def encrypt(self, plaintext: str) -> str:
+        pairs = self.encrypt_pairs
+        try:
+            return ''.join([pairs[d] for d in _playfair_digraphs(_playfair_prepare_text(plaintext))])
+        except KeyError as e:
+            raise ValueError(f"Character {e.args[0]} not found in Playfair table")
+
+    def decrypt(self, ciphertext: str) -> str:
+        ct = _playfair_prepare_text(ciphertext)
+        if len(ct) % 2:
+            raise ValueError("Playfair ciphertext must have an even number of letters")
+        pairs = self.decrypt_pairs
+        try:
+            return ''.join([pairs[ct[i:i+2]] for i in range(0, len(ct), 2)])
+        except KeyError as e:
+            raise ValueError(f"Character {e.args[0]} not found in Playfair table")
+
+def compile_playfair_key(key: str) -> PlayfairKey:
+    return KEY_CACHE.get('playfair', key, PlayfairKey)
+
+# a pair of different letters, otherwise a single letter (padded with 'X')
+_PLAYFAIR_DIGRAPH_RE = re.compile(r'((.)(?!\2).)|(.)')
+
+def _playfair_digraphs(pt: str):
+    """Split prepared text into digraphs, inserting X between repeated letters in a pair."""
+    return [m[0] or m[2] + 'X' for m in _PLAYFAIR_DIGRAPH_RE.findall(pt)]
 
 def _playfair_prepare_text(s: str):
     """
@@ -429,84 +745,244 @@ def playfair_encrypt_text(plaintext: str, key: str) -> str:
     Encrypt using Playfair (classic I/J combined).
     Only letters are processed; non-letters are ignored (removed).
     """
-    pt = _playfair_prepare_text(plaintext)
-    table = _playfair_prepare_key(key)
-
-    # build digraphs: insert X between repeated letters in a pair
-    digraphs = []
-    i = 0
-    while i < len(pt):
-        a = pt[i]
-        b = pt[i+1] if i+1 < len(pt) else None
-        if b is None:
-            digraphs.append((a, 'X'))
-            i += 1
-        elif a == b:
-            digraphs.append((a, 'X'))
-            i += 1
-        else:
-            digraphs.append((a, b))
-            i += 2
-
-    out_chars = []
-    for a, b in digraphs:
-        ra, ca = _playfair_find_position(table, a)
-        rb, cb = _playfair_find_position(table, b)
-        if ra == rb:
-            # same row -> take right
-            out_chars.append(table[ra][(ca + 1) % 5])
-            out_chars.append(table[rb][(cb + 1) % 5])
-        elif ca == cb:
-            # same column -> take down
-            out_chars.append(table[(ra + 1) % 5][ca])
-            out_chars.append(table[(rb + 1) % 5][cb])
-        else:
-            # rectangle swap
-            out_chars.append(table[ra][cb])
-            out_chars.append(table[rb][ca])
-    return ''.join(out_chars)
+    return compile_playfair_key(key).encrypt(plaintext)
 
 def playfair_decrypt_text(ciphertext: str, key: str) -> str:
     """
     Decrypt Playfair ciphertext. Assumes ciphertext is letters-only (prepared).
     Result may contain padding 'X' inserted during encryption.
     """
-    ct = _playfair_prepare_text(ciphertext)
-    table = _playfair_prepare_key(key)
-
-    out_chars = []
-    # process two-by-two
-    for i in range(0, len(ct), 2):
-        a = ct[i]
-        b = ct[i+1]
-        ra, ca = _playfair_find_position(table, a)
-        rb, cb = _playfair_find_position(table, b)
-        if ra == rb:
-            out_chars.append(table[ra][(ca - 1) % 5])
-            out_chars.append(table[rb][(cb - 1) % 5])
-        elif ca == cb:
-            out_chars.append(table[(ra - 1) % 5][ca])
-            out_chars.append(table[(rb - 1) % 5][cb])
-        else:
-            out_chars.append(table[ra][cb])
-            out_chars.append(table[rb][ca])
-    return ''.join(out_chars)
+    return compile_playfair_key(key).decrypt(ciphertext)
+
+# ---------- Streaming text mode ----------
+# Incremental versions of the letter ciphers for large text files:
+# update(chunk) -> str may be called repeatedly and finalize() -> str ends the
+# stream; the concatenated output equals one encrypt/decrypt call on the whole
+# text. Ciphertext chunks have whitespace removed before decrypting, so line
+# breaks in an uploaded ciphertext file do not matter.
+
+def _strip_whitespace(s):
+    return ''.join(s.split())
+
+class TextStreamCipher:
+    """For ciphers without state between letters (shift, substitution, affine)."""
+
+    def __init__(self, compiled, decrypt=False):
+        self.decrypt = decrypt
+        self._fn = compiled.decrypt if decrypt else compiled.encrypt
+
+    def update(self, chunk: str) -> str:
+        return self._fn(_strip_whitespace(chunk) if self.decrypt else chunk)
+
+    def finalize(self) -> str:
+        return ''
+
+class BlockTextStream(TextStreamCipher):
+    """Block ciphers (Hill, permutation): a partial block is carried to the next chunk."""
+
+    def __init__(self, compiled, decrypt=False):
+        super().__init__(compiled, decrypt)
+        self.n = compiled.n
+        self._carry = ''
+
+    def update(self, chunk: str) -> str:
+        text = self._carry + (_strip_whitespace(chunk) if self.decrypt else normalize_text_for_letters(chunk))
+        full = len(text) - len(text) % self.n
+        self._carry = text[full:]
+        return self._fn(text[:full]) if full else ''
+
+    def finalize(self) -> str:
+        # encrypt pads the last block; decrypt rejects a partial one
+        carry, self._carry = self._carry, ''
+        return self._fn(carry) if carry else ''
+
+class VigenereStream:
+    """Vigenere carrying the key position (letters seen so far) across chunks."""
+
+    def __init__(self, key, decrypt=False):
+        self.shifts = _vigenere_key_shifts(key)
+        self.sign = -1 if decrypt else 1
+        self.position = 0
+
+    def update(self, chunk: str) -> str:
+        out = _vigenere_kernel(chunk, self.shifts, self.sign, self.position)
+        self.position += len(out)
+        return out
+
+    def finalize(self) -> str:
+        return ''
+
+class OneTimePadStream:
+    """OTP consuming the pad letter by letter across chunks."""
+
+    def __init__(self, keytext, decrypt=False):
+        self.offsets = _otp_key_offsets(keytext)
+        self.decrypt = decrypt
+        self.position = 0
+
+    def update(self, chunk: str) -> str:
+        sign, what = (-1, 'ciphertext') if self.decrypt else (1, 'plaintext')
+        out = _otp_kernel(chunk, self.offsets, sign, what, self.position)
+        self.position += len(out)
+        return out
+
+    def finalize(self) -> str:
+        return ''
+
+class PlayfairStream:
+    """Playfair carrying an unpaired trailing letter to the next chunk."""
+
+    def __init__(self, compiled, decrypt=False):
+        self.key = compiled
+        self.decrypt = decrypt
+        self._carry = ''
+
+    def update(self, chunk: str) -> str:
+        text = self._carry + _playfair_prepare_text(chunk)
+        if self.decrypt:
+            full = len(text) - len(text) % 2
+            self._carry = text[full:]
+            return self.key.decrypt(text[:full])
+        matches = _PLAYFAIR_DIGRAPH_RE.findall(text)
+        # a lone letter at the very end may still pair with the next chunk
+        self._carry = matches.pop()[2] if matches and matches[-1][2] else ''
+        try:
+            return ''.join([self.key.encrypt_pairs[m[0] or m[2] + 'X'] for m in matches])
+        except KeyError as e:
+            raise ValueError(f"Character {e.args[0]} not found in Playfair table")
+
+    def finalize(self) -> str:
+        carry, self._carry = self._carry, ''
+        return self.key.decrypt(carry) if self.decrypt else self.key.encrypt(carry)
+
+def text_stream_cipher(algo, key, decrypt=False):
+    """Incremental text cipher (update/finalize) for any letter-mode algorithm."""
+    from .registry import get  # registry imports this module
+    return get(algo).text_stream_cipher(key, decrypt)
+
+# ---------- Streaming file mode ----------
+
+STREAM_CHUNK_SIZE = 1 << 20
+
+class ByteTableCipher:
+    """Incremental cipher for the position-independent byte ciphers (one 256-entry table)."""
+
+    def __init__(self, table: bytes):
+        self.table = table
+
+    def update(self, chunk) -> bytes:
+        return _apply_byte_table(chunk, self.table)
+
+def byte_stream_cipher(algo, key, decrypt=False, offset=0):
+    """
+    Incremental cipher object for a file-mode algorithm.
+    update(chunk) -> bytes may be called repeatedly; the concatenated output
+    equals the one-shot <algo>_encrypt_bytes / <algo>_decrypt_bytes result.
+    offset starts the cipher at that byte position of the data (for ranges).
+    """
+    from .registry import get  # registry imports this module
+    return get(algo).byte_stream_cipher(key, decrypt, offset)
+
+def transform_stream(src, cipher, chunk_size=STREAM_CHUNK_SIZE, head=b''):
+    """Yield cipher.update() of head and then of src.read(chunk_size) until EOF."""
+    if head:
+        yield cipher.update(head)
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        yield cipher.update(chunk)
 
 # ---------- Utilities for file packaging ----------
 
-def pack_encrypted_payload(original_filename, data: bytes):
-    # store a small JSON header followed by raw bytes
+PAYLOAD_SEPARATOR = b'\n--ENCRYPTED-DATA-START--\n'
+MAX_PAYLOAD_HEADER = 64 * 1024
+
+def encrypted_payload_header(original_filename):
+    """Header + separator that precede the encrypted bytes in a payload."""
     header = json.dumps({
         'filename': original_filename
     }).encode('utf-8')
-    sep = b'\n--ENCRYPTED-DATA-START--\n'
-    return header + sep + data
+    return header + PAYLOAD_SEPARATOR
+
+def pack_encrypted_payload(original_filename, data: bytes):
+    # store a small JSON header followed by raw bytes
+    return encrypted_payload_header(original_filename) + data
+
+def read_encrypted_payload_header(src, chunk_size=STREAM_CHUNK_SIZE, head=b''):
+    """
+    Read the payload header from a binary stream (head: bytes already read from it).
+    Returns (filename, leftover) where leftover holds the body bytes already read;
+    the rest of the body is still in src.
+    """
+    buf = head
+    while True:
+        idx = buf.find(PAYLOAD_SEPARATOR)
+        if idx != -1:
+            break
+        if len(buf) > MAX_PAYLOAD_HEADER:
+            raise ValueError('Invalid payload')
+        chunk = src.read(min(chunk_size, MAX_PAYLOAD_HEADER))
+        if not chunk:
+            raise ValueError('Invalid payload')
+        buf += chunk
+    header = json.loads(buf[:idx].decode('utf-8'))
+    return header.get('filename', 'output'), buf[idx+len(PAYLOAD_SEPARATOR):]
 
 def unpack_encrypted_payload(packed: bytes):
-    sep = b'\n--ENCRYPTED-DATA-START--\n'
-    idx = packed.find(sep)
+    sep = PAYLOAD_SEPARATOR
+    idx = packed.find(sep, 0, MAX_PAYLOAD_HEADER + len(sep))  # header is near the start
     if idx == -1:
         raise ValueError('Invalid payload')
     header = json.loads(packed[:idx].decode('utf-8'))
     data = packed[idx+len(sep):]
-    return header.get('filename', 'output'), data
\ No newline at end of file
+    return header.get('filename', 'output'), data
+
+class MappedPayload:
+    """
+    Memory-mapped encrypted payload file (legacy or versioned container format).
+    Only the first MAX_PAYLOAD_HEADER bytes are scanned for the header; the body
+    is a zero-copy memoryview of the map, so decrypting needs memory proportional
+    to the chunk size, not the file.
+    source is a path or a binary file object with a fileno() (not closed here).
+    """
+
+    def __init__(self, source):
+        self._owned = open(source, 'rb') if isinstance(source, (str, bytes, os.PathLike)) else None
+        f = self._owned or source
+        try:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._close_file()
+            raise ValueError('Invalid payload')
+        from .container import parse_payload_header  # container imports this module
+        try:
+            self.info = parse_payload_header(self._map)
+        except Exception:
+            self.close()
+            raise
+        self.filename = self.info.filename
+        self.body = memoryview(self._map)[self.info.body_offset:]
+
+    def chunks(self, chunk_size=STREAM_CHUNK_SIZE, start=0, stop=None):
+        """Yield zero-copy memoryview slices of body[start:stop]."""
+        stop = len(self.body) if stop is None else min(stop, len(self.body))
+        for i in range(start, stop, chunk_size):
+            with self.body[i:min(i + chunk_size, stop)] as view:
+                yield view
+
+    def _close_file(self):
+        if self._owned is not None:
+            self._owned.close()
+
+    def close(self):
+        if getattr(self, 'body', None) is not None:
+            self.body.release()
+        self._map.close()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,213 @@
+# cipher/cli.py
+"""
+Command-line front end: python -m cipher encrypt|decrypt -a ALGO -k KEY [PATH ...]
+
+Files and stdin are streamed through the same incremental ciphers as the web
+app's file mode and written in the same payload format, so results can be
+decrypted by either side. Directories are walked recursively and their files
+processed on a thread pool; one throughput line per file goes to stderr.
+Results are written to a temp file and moved into place once complete, and an
+existing output is only replaced with --force.
+Text-only algorithms (Vigenere, Hill, OTP, Playfair) stream text in chunks and
+write <name>_encrypted.txt / <name>_decrypted.txt, like the web app's text files.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from . import ciphers, container, parallel, registry
+
+ENCRYPTED_SUFFIX = '.enc'
+
+def _transform_file(src, dst, args, name):
+    """Stream src into dst; returns the number of body bytes written."""
+    decrypt = args.command == 'decrypt'
+    size = _remaining(src)
+    cipher = parallel.stream_cipher(args.algorithm, args.key, decrypt, size=size, workers=args.threads,
+                                    threshold=args.parallel_threshold)
+    chunk_size = parallel.PARALLEL_CHUNK_SIZE if isinstance(cipher, parallel.ParallelByteCipher) else args.chunk_size
+    head = b''
+    if decrypt:
+        try:
+            info, head = container.read_payload_header(src, chunk_size)
+        except Exception:
+            raise ValueError('not in encrypted format produced by this tool')
+        if info.algorithm and info.algorithm != args.algorithm:
+            raise ValueError(f'file was encrypted with {info.algorithm}')
+    elif args.format == container.CONTAINER_VERSION and size is not None:
+        dst.write(container.container_header(name, args.algorithm, size))
+    else:
+        dst.write(ciphers.encrypted_payload_header(name))
+    total = 0
+    for chunk in ciphers.transform_stream(src, cipher, chunk_size, head=head):
+        dst.write(chunk)
+        total += len(chunk)
+    return total
+
+def _remaining(f):
+    try:
+        return os.fstat(f.fileno()).st_size - f.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def _output_path(path, args, root=None):
+    """
+    Where the result for input path goes (None: stdout). Without -o the result
+    sits next to the input; with a directory for -o the input's path relative
+    to root (or its basename) is kept under it.
+    """
+    if path == '-' or args.output == '-':
+        return args.output if args.output not in (None, '-') else None
+    if args.output is None:
+        out = path
+    elif root is not None or os.path.isdir(args.output):
+        out = os.path.join(args.output, os.path.relpath(path, root) if root else os.path.basename(path))
+    else:
+        return args.output
+    if not registry.get(args.algorithm).supports_bytes:
+        return _text_name(out, args.command == 'decrypt')
+    return out + ENCRYPTED_SUFFIX if args.command == 'encrypt' else _strip_suffix(out)
+
+def _text_name(path, decrypt):
+    """msg.txt -> msg_encrypted.txt -> msg_decrypted.txt"""
+    base = os.path.splitext(path)[0]
+    if decrypt and base.endswith('_encrypted'):
+        base = base[:-len('_encrypted')]
+    return f"{base}_{'decrypted' if decrypt else 'encrypted'}.txt"
+
+def _strip_suffix(path):
+    return path[:-len(ENCRYPTED_SUFFIX)] if path.endswith(ENCRYPTED_SUFFIX) else path + '.dec'
+
+def _write_output(out_path, args, write, **open_kwargs):
+    """
+    Run write(f) on a temp file next to out_path and move it into place only
+    once it succeeded, so a failure never leaves a partial result and never
+    touches an existing file. Returns what write returned.
+    """
+    if os.path.exists(out_path) and not args.force:
+        raise FileExistsError(f'{out_path} already exists (use --force to overwrite)')
+    directory = os.path.dirname(out_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f'.{os.path.basename(out_path)}.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp, 'x' + ('' if 'encoding' in open_kwargs else 'b'), **open_kwargs) as f:
+            result = write(f)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return result
+
+def process_file(path, out_path, args):
+    """Encrypt/decrypt one file (path '-' is stdin, out_path None is stdout). Returns (bytes, seconds)."""
+    start = time.perf_counter()
+    src = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    name = args.name or ('stdin' if path == '-' else os.path.basename(path))
+    try:
+        if out_path is None:
+            n = _transform_file(src, sys.stdout.buffer, args, name)
+            sys.stdout.buffer.flush()
+        else:
+            n = _write_output(out_path, args, lambda dst: _transform_file(src, dst, args, name))
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+    return n, time.perf_counter() - start
+
+def _transform_text(src, dst, stream, chunk_size):
+    """Write stream's output for every chunk of text read from src; returns the characters read."""
+    total = 0
+    while True:
+        text = src.read(chunk_size)
+        if not text:
+            break
+        total += len(text)
+        dst.write(stream.update(text))
+    dst.write(stream.finalize())
+    return total
+
+def process_text(path, out_path, args):
+    """Text-mode algorithms: UTF-8 text streamed through the text stream cipher, result as text."""
+    start = time.perf_counter()
+    stream = registry.get(args.algorithm).text_stream_cipher(args.key, args.command == 'decrypt')
+    src = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        if out_path is None:
+            n = _transform_text(src, sys.stdout, stream, args.chunk_size)
+            sys.stdout.write('\n')
+        else:
+            n = _write_output(out_path, args, lambda dst: _transform_text(src, dst, stream, args.chunk_size),
+                              encoding='utf-8')
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    return n, time.perf_counter() - start
+
+def _jobs(args):
+    """(input path, output path) pairs for every input, walking directories."""
+    for path in args.paths or ['-']:
+        if os.path.isdir(path):
+            if args.output is None or args.output == '-':
+                raise SystemExit(f'{path}: directories need -o/--output DIR')
+            for dirpath, _, filenames in os.walk(path):
+                for filename in sorted(filenames):
+                    full = os.path.join(dirpath, filename)
+                    yield full, _output_path(full, args, root=path)
+        else:
+            yield path, _output_path(path, args)
+
+def _report(path, out_path, n, seconds):
+    rate = n / (1 << 20) / seconds if seconds > 0 else 0.0
+    print(f"{path} -> {out_path or '<stdout>'}: {n} bytes in {seconds:.3f}s ({rate:.1f} MB/s)", file=sys.stderr)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cipher', description='Encrypt or decrypt files, directories or stdin.')
+    parser.add_argument('command', choices=['encrypt', 'decrypt'])
+    parser.add_argument('paths', nargs='*', help="files or directories ('-' or nothing: stdin)")
+    parser.add_argument('-a', '--algorithm', required=True, choices=registry.names())
+    key = parser.add_mutually_exclusive_group(required=True)
+    key.add_argument('-k', '--key')
+    key.add_argument('--key-file', help='read the key from a file (e.g. an OTP pad)')
+    parser.add_argument('-o', '--output', help="output file, or directory when walking directories ('-': stdout)")
+    parser.add_argument('-f', '--force', action='store_true', help='overwrite existing output files')
+    parser.add_argument('--format', type=int, choices=[container.LEGACY_VERSION, container.CONTAINER_VERSION],
+                        default=container.LEGACY_VERSION, help='payload format for encrypted files')
+    parser.add_argument('--name', help='original filename stored in the header (default: input basename)')
+    parser.add_argument('-j', '--workers', type=int, default=parallel.DEFAULT_WORKERS, help='files processed at once')
+    parser.add_argument('--threads', type=int, default=parallel.DEFAULT_WORKERS,
+                        help='threads per file on the parallel path')
+    parser.add_argument('--parallel-threshold', type=int, default=parallel.PARALLEL_THRESHOLD,
+                        help='split files of at least this many bytes across --threads (default: never)')
+    parser.add_argument('--chunk-size', type=int, default=ciphers.STREAM_CHUNK_SIZE)
+    parser.add_argument('-q', '--quiet', action='store_true', help='no per-file throughput lines')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_intermixed_args(argv)
+    if args.key_file:
+        with open(args.key_file, encoding='utf-8', errors='ignore') as f:
+            args.key = f.read()
+    run = process_file if registry.get(args.algorithm).supports_bytes else process_text
+    jobs = list(_jobs(args))
+    failed = 0
+
+    def one(job):
+        path, out_path = job
+        try:
+            n, seconds = run(path, out_path, args)
+        except Exception as e:
+            print(f'{path}: {e}', file=sys.stderr)
+            return False
+        if not args.quiet:
+            _report(path, out_path, n, seconds)
+        return True
+
+    if len(jobs) > 1 and args.workers > 1:
+        with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='cipher-cli') as pool:
+            failed = sum(not ok for ok in pool.map(one, jobs))
+    else:
+        failed = sum(not one(job) for job in jobs)
+    return 1 if failed else 0
@@ -0,0 +1,144 @@
+# cipher/container.py
+import json
+import struct
+from . import ciphers
+
+# Versioned container format (version 2), written alongside the legacy
+# "JSON header + separator" payload (version 1) of pack_encrypted_payload:
+#
+#   MAGIC (6 bytes) | version (uint8) | reserved (uint8) | header length (uint32 BE)
+#   header: UTF-8 JSON {algorithm, filename, size, chunk_size, chunks}
+#   chunk table: `chunks` x uint64 BE offsets of each chunk, relative to the body
+#   body: the encrypted bytes (byte ciphers preserve length, so the body is `size` bytes)
+#
+# Everything before the body has a known length, so readers can seek straight to
+# any chunk without scanning for a marker.
+
+MAGIC = b'FCENC\x00'
+CONTAINER_VERSION = 2
+LEGACY_VERSION = 1
+_PREFIX = struct.Struct('>6sBBI')
+DEFAULT_CHUNK_SIZE = ciphers.STREAM_CHUNK_SIZE
+
+class PayloadInfo:
+    """Parsed payload header (either format): where the body starts and how it is chunked."""
+
+    def __init__(self, version, filename, body_offset, algorithm=None, size=None,
+                 chunk_size=None, chunk_offsets=()):
+        self.version = version
+        self.filename = filename
+        self.body_offset = body_offset
+        self.algorithm = algorithm
+        self.size = size
+        self.chunk_size = chunk_size
+        self.chunk_offsets = list(chunk_offsets)
+
+    def chunk_range(self, i):
+        """(start, stop) of chunk i within the body."""
+        if not self.chunk_offsets:
+            raise ValueError('Payload has no chunk index')
+        start = self.chunk_offsets[i]
+        stop = self.chunk_offsets[i + 1] if i + 1 < len(self.chunk_offsets) else self.size
+        return start, stop
+
+def container_header(filename, algorithm, size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Everything that precedes the body of a version 2 container."""
+    if chunk_size <= 0:
+        raise ValueError('Chunk size must be positive')
+    chunks = -(-size // chunk_size)
+    header = json.dumps({
+        'algorithm': algorithm,
+        'filename': filename,
+        'size': size,
+        'chunk_size': chunk_size,
+        'chunks': chunks,
+    }).encode('utf-8')
+    table = struct.pack(f'>{chunks}Q', *range(0, chunks * chunk_size, chunk_size))
+    return _PREFIX.pack(MAGIC, CONTAINER_VERSION, 0, len(header)) + header + table
+
+def pack_container(filename, algorithm, data: bytes, chunk_size=DEFAULT_CHUNK_SIZE):
+    return container_header(filename, algorithm, len(data), chunk_size) + data
+
+def _parse_v2(prefix, header_bytes, table_bytes_reader):
+    magic, version, _, header_len = _PREFIX.unpack(prefix)
+    if version != CONTAINER_VERSION:
+        raise ValueError(f'Unsupported container version {version}')
+    try:
+        header = json.loads(header_bytes.decode('utf-8'))
+        chunks = int(header['chunks'])
+        size = int(header['size'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid payload')
+    table_len = 8 * chunks
+    offsets = struct.unpack(f'>{chunks}Q', table_bytes_reader(table_len))
+    return PayloadInfo(version, header.get('filename') or 'output',
+                       _PREFIX.size + header_len + table_len,
+                       algorithm=header.get('algorithm'), size=size,
+                       chunk_size=header.get('chunk_size'), chunk_offsets=offsets)
+
+def parse_payload_header(buf, total_size=None):
+    """
+    Parse the header of a payload held in buf (bytes, mmap, ...), in either
+    format. total_size (defaults to len(buf)) sets the legacy body size.
+    """
+    total_size = len(buf) if total_size is None else total_size
+    if bytes(buf[:len(MAGIC)]) == MAGIC:
+        if len(buf) < _PREFIX.size:
+            raise ValueError('Invalid payload')
+        prefix = bytes(buf[:_PREFIX.size])
+        header_len = _PREFIX.unpack(prefix)[3]
+        if header_len > ciphers.MAX_PAYLOAD_HEADER:
+            raise ValueError('Invalid payload')
+        start = _PREFIX.size + header_len
+
+        def table(n):
+            if start + n > len(buf):
+                raise ValueError('Invalid payload')
+            return bytes(buf[start:start + n])
+        return _parse_v2(prefix, bytes(buf[_PREFIX.size:start]), table)
+    sep = ciphers.PAYLOAD_SEPARATOR
+    idx = buf.find(sep, 0, ciphers.MAX_PAYLOAD_HEADER + len(sep))
+    if idx == -1:
+        raise ValueError('Invalid payload')
+    header = json.loads(bytes(buf[:idx]).decode('utf-8'))
+    body_offset = idx + len(sep)
+    return PayloadInfo(LEGACY_VERSION, header.get('filename', 'output'), body_offset,
+                       size=total_size - body_offset)
+
+def _read_exact(src, n):
+    data = src.read(n)
+    while len(data) < n:
+        more = src.read(n - len(data))
+        if not more:
+            raise ValueError('Invalid payload')
+        data += more
+    return data
+
+def read_payload_header(src, chunk_size=ciphers.STREAM_CHUNK_SIZE):
+    """
+    Read the header of either format from a binary stream.
+    Returns (info, leftover): leftover holds body bytes already read (legacy
+    format only); the rest of the body is still in src.
+    """
+    head = src.read(_PREFIX.size)
+    while head and len(head) < _PREFIX.size:
+        more = src.read(_PREFIX.size - len(head))
+        if not more:
+            break
+        head += more
+    if head[:len(MAGIC)] == MAGIC and len(head) == _PREFIX.size:
+        header_len = _PREFIX.unpack(head)[3]
+        if header_len > ciphers.MAX_PAYLOAD_HEADER:
+            raise ValueError('Invalid payload')
+        info = _parse_v2(head, _read_exact(src, header_len), lambda n: _read_exact(src, n))
+        return info, b''
+    filename, leftover = ciphers.read_encrypted_payload_header(src, chunk_size, head=head)
+    return PayloadInfo(LEGACY_VERSION, filename, None), leftover
+
+def unpack_payload(packed: bytes):
+    """(info, body) for a complete payload in memory, either format."""
+    info = parse_payload_header(packed)
+    body = packed[info.body_offset:]
+    if info.version == CONTAINER_VERSION and len(body) != info.size:
+        raise ValueError('Truncated payload')
+    return info, body
@@ -0,0 +1,119 @@
+# cipher/jobs.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# In-process job queue for long file operations. A job is a callable run on a
+# small local thread pool; it reports progress through Job.advance() so clients
+# can poll status and throughput while it runs. No external broker: jobs live
+# in memory and are lost when the process restarts.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+DEFAULT_JOB_WORKERS = 2
+MAX_JOBS = 1000  # finished jobs beyond this are forgotten, oldest first
+
+class Job:
+    """State of one submitted job. Counters are updated by the worker thread."""
+
+    def __init__(self, total=None, filename=None):
+        self.id = uuid.uuid4().hex
+        self.status = QUEUED
+        self.total = total
+        self.processed = 0
+        self.filename = filename
+        self.path = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def advance(self, n):
+        self.processed += n
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        progress = None
+        if self.total:
+            progress = min(1.0, self.processed / self.total)
+        elif self.status == DONE:
+            progress = 1.0
+        return {
+            'id': self.id,
+            'status': self.status,
+            'filename': self.filename,
+            'bytes_processed': self.processed,
+            'total_bytes': self.total,
+            'progress': progress,
+            'elapsed': elapsed,
+            'throughput': self.processed / elapsed if elapsed > 0 else None,  # bytes/s
+            'error': self.error,
+        }
+
+class JobQueue:
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, max_jobs=MAX_JOBS):
+        """workers is a count, or a callable returning it when the first job is submitted."""
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self._pool = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, work, total=None, filename=None):
+        """
+        Queue work(job) and return the Job straight away. work reports progress
+        with job.advance(n) and returns the path of its result file.
+        """
+        job = Job(total, filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if self._pool is None:
+                workers = self.workers() if callable(self.workers) else self.workers
+                self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cipher-job')
+            pool = self._pool
+        pool.submit(self._run, job, work)
+        return job
+
+    def _run(self, job, work):
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.path = work(job)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+
+    def _prune(self):
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def result_paths(self, finished_after=0.0):
+        """Result paths of done jobs that finished at or after finished_after (a timestamp)."""
+        with self._lock:
+            return [job.path for job in self._jobs.values()
+                    if job.status == DONE and job.path and (job.finished_at or time.time()) >= finished_after]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
@@ -0,0 +1,56 @@
+# cipher/keycache.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+class KeyCache:
+    """
+    Bounded, thread-safe LRU cache of compiled key objects.
+    Entries are stored under a SHA-256 digest of (algorithm, key), so the raw
+    key strings are never kept as cache keys.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(algorithm, key):
+        h = hashlib.sha256(algorithm.encode('utf-8'))
+        h.update(b'\0')
+        h.update(repr(key).encode('utf-8'))
+        return h.digest()
+
+    def get(self, algorithm, key, factory):
+        """Return the compiled key for (algorithm, key), calling factory(key) on a miss."""
+        digest = self.digest(algorithm, key)
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return self._entries[digest]
+            self.misses += 1
+        # compile outside the lock; errors (invalid keys) propagate and are not cached
+        value = factory(key)
+        with self._lock:
+            self._entries[digest] = value
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+# shared by every request in the process
+KEY_CACHE = KeyCache()
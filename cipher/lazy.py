@@ -0,0 +1,34 @@
+# cipher/lazy.py
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Placeholder for a heavy module that is imported on first attribute access.
+    On that first access the placeholder also replaces itself in the namespace
+    it was bound in, so later lookups go straight to the real module:
+
+        np = LazyModule('numpy', globals(), 'np')
+    """
+
+    def __init__(self, name, namespace=None, alias=None):
+        self._name = name
+        self._namespace = namespace
+        self._alias = alias
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+                if self._namespace is not None:
+                    self._namespace[self._alias] = self._module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<lazy module {self._name!r} ({state})>'
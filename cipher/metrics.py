@@ -0,0 +1,156 @@
+# cipher/metrics.py
+import contextlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+# Process-wide timing and byte counters, rendered in the Prometheus text
+# exposition format. A RequestTrace collects the phases of one request (or job):
+# every phase is added both to the trace and to the shared Metrics totals,
+# labelled with the algorithm and mode once those are known.
+
+logger = logging.getLogger('cipher.metrics')
+
+def _labels(**labels):
+    def esc(v):
+        return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{esc(v)}"' for k, v in labels.items()) + '}'
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.phase_seconds = defaultdict(lambda: [0.0, 0])  # (phase, algorithm, mode) -> [sum, count]
+            self.bytes_total = defaultdict(int)  # (direction, algorithm, mode) -> bytes
+            self.request_seconds = defaultdict(lambda: [0.0, 0])  # (endpoint, status) -> [sum, count]
+
+    def observe_phase(self, phase, algorithm, mode, seconds):
+        with self._lock:
+            entry = self.phase_seconds[phase, algorithm or '', mode or '']
+            entry[0] += seconds
+            entry[1] += 1
+
+    def add_bytes(self, direction, algorithm, mode, n):
+        with self._lock:
+            self.bytes_total[direction, algorithm or '', mode or ''] += n
+
+    def observe_request(self, endpoint, status, seconds):
+        with self._lock:
+            entry = self.request_seconds[endpoint, str(status)]
+            entry[0] += seconds
+            entry[1] += 1
+
+    def render(self, extra_gauges=()):
+        """
+        Prometheus text exposition of all counters. extra_gauges is an iterable
+        of (name, help, value) added as plain gauges.
+        """
+        with self._lock:
+            phases = sorted(self.phase_seconds.items())
+            byte_counts = sorted(self.bytes_total.items())
+            requests = sorted(self.request_seconds.items())
+        lines = ['# HELP cipher_phase_seconds Time spent in each processing phase.',
+                 '# TYPE cipher_phase_seconds summary']
+        for (phase, algorithm, mode), (total, count) in phases:
+            labels = _labels(phase=phase, algorithm=algorithm, mode=mode)
+            lines.append(f'cipher_phase_seconds_sum{labels} {total:.6f}')
+            lines.append(f'cipher_phase_seconds_count{labels} {count}')
+        lines += ['# HELP cipher_bytes_total Bytes read (in) and produced (out) by the ciphers.',
+                  '# TYPE cipher_bytes_total counter']
+        for (direction, algorithm, mode), n in byte_counts:
+            lines.append(f'cipher_bytes_total{_labels(direction=direction, algorithm=algorithm, mode=mode)} {n}')
+        lines += ['# HELP cipher_request_seconds Request duration, including streamed response bodies.',
+                  '# TYPE cipher_request_seconds summary']
+        for (endpoint, status), (total, count) in requests:
+            labels = _labels(endpoint=endpoint, status=status)
+            lines.append(f'cipher_request_seconds_sum{labels} {total:.6f}')
+            lines.append(f'cipher_request_seconds_count{labels} {count}')
+        for name, help_text, value in extra_gauges:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+METRICS = Metrics()
+
+class RequestTrace:
+    """Phase timings and byte counts of one request or job."""
+
+    def __init__(self, endpoint, metrics=METRICS, log_json=False):
+        self.endpoint = endpoint
+        self.metrics = metrics
+        self.log_json = log_json
+        self.algorithm = None
+        self.mode = None
+        self.phases = defaultdict(float)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.started = time.perf_counter()
+        self.finished = False
+
+    def label(self, algorithm=None, mode=None):
+        self.algorithm = algorithm or self.algorithm
+        self.mode = mode or self.mode
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        self.phases[name] += seconds
+        self.metrics.observe_phase(name, self.algorithm, self.mode, seconds)
+
+    def count(self, bytes_in=0, bytes_out=0):
+        if bytes_in:
+            self.bytes_in += bytes_in
+            self.metrics.add_bytes('in', self.algorithm, self.mode, bytes_in)
+        if bytes_out:
+            self.bytes_out += bytes_out
+            self.metrics.add_bytes('out', self.algorithm, self.mode, bytes_out)
+
+    def transform(self, src, cipher, chunk_size, head=b''):
+        """ciphers.transform_stream with 'read' and 'cipher' phases timed per chunk."""
+        if head:
+            yield self.update(cipher, head)
+        while True:
+            with self.phase('read'):
+                chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            yield self.update(cipher, chunk)
+
+    def update(self, cipher, chunk):
+        """cipher.update(chunk), timed as the 'cipher' phase and counted."""
+        with self.phase('cipher'):
+            out = cipher.update(chunk)
+        self.count(len(chunk), len(out))
+        return out
+
+    def finish(self, status=None):
+        """Record the request duration and, if enabled, log the trace as one JSON line."""
+        if self.finished:
+            return
+        self.finished = True
+        duration = time.perf_counter() - self.started
+        self.metrics.observe_request(self.endpoint, status, duration)
+        if self.log_json:
+            logger.info(json.dumps(self.to_dict(status, duration)))
+
+    def to_dict(self, status=None, duration=None):
+        return {
+            'endpoint': self.endpoint,
+            'status': status,
+            'algorithm': self.algorithm,
+            'mode': self.mode,
+            'duration': duration,
+            'phases': dict(self.phases),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
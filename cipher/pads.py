@@ -0,0 +1,149 @@
+# cipher/pads.py
+import mmap
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from . import ciphers
+
+try:
+    import fcntl
+except ImportError:  # Windows: the in-process lock still serialises threads
+    fcntl = None
+
+# Server-side One-Time Pad storage. A pad is kept as <id>.pad holding only the
+# uppercase letters A-Z of the uploaded key text, so letter i is byte i and a
+# request reads just the slice it needs from a memory map. <id>.offset holds
+# the number of letters already handed out. Encryption reserves the next range
+# and persists the new offset before using it, so concurrent requests get
+# disjoint ranges and no pad letter is ever used twice, even across restarts.
+
+PAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+IMPORT_CHUNK_SIZE = 1 << 20
+MAX_OPEN_PADS = 16  # memory maps kept open, least recently used are closed first
+
+class PadStore:
+    def __init__(self, folder, max_open=MAX_OPEN_PADS):
+        self.folder = folder
+        self.max_open = max_open
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()  # guards the two dicts below, never held across I/O waits
+        self._pad_locks = {}  # pad id -> lock serialising reservations on that pad
+        self._maps = OrderedDict()  # pad id -> (file, mmap), LRU; pad files never change once written
+
+    def _pad_lock(self, pad_id):
+        with self._lock:
+            return self._pad_locks.setdefault(pad_id, threading.Lock())
+
+    def _path(self, pad_id, suffix):
+        if not isinstance(pad_id, str) or not PAD_ID_RE.match(pad_id):
+            raise KeyError(pad_id)
+        return os.path.join(self.folder, pad_id + suffix)
+
+    def create(self, src, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Store the letters of the binary stream src as a new pad and return its
+        info(). Everything but ASCII letters is dropped, letters are uppercased.
+        """
+        pad_id = uuid.uuid4().hex
+        path = self._path(pad_id, '.pad')
+        tmp = path + '.tmp'
+        size = 0
+        try:
+            with open(tmp, 'wb') as f:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    letters = ciphers.ascii_letters_upper(bytes(chunk))
+                    f.write(letters)
+                    size += len(letters)
+            if not size:
+                raise ValueError('Key pad contains no letters')
+            with open(self._path(pad_id, '.offset'), 'w') as f:
+                f.write('0')
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return self.info(pad_id)
+
+    def info(self, pad_id):
+        """{id, size, offset, remaining} of a pad; KeyError for unknown ids."""
+        try:
+            size = os.path.getsize(self._path(pad_id, '.pad'))
+            with open(self._path(pad_id, '.offset')) as f:
+                offset = int(f.read() or 0)
+        except FileNotFoundError:
+            raise KeyError(pad_id)
+        return {'id': pad_id, 'size': size, 'offset': offset, 'remaining': size - offset}
+
+    def reserve(self, pad_id, n):
+        """
+        Hand out the next n unused letters of the pad: returns their start
+        offset. The new offset is on disk before this returns.
+        """
+        size = self.info(pad_id)['size']
+        with self._pad_lock(pad_id), open(self._path(pad_id, '.offset'), 'r+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # other processes serving the same folder
+            start = int(f.read() or 0)
+            if start + n > size:
+                raise ValueError(f'Key pad exhausted (need {n} letters, {size - start} left)')
+            f.seek(0)
+            f.write(str(start + n))
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        return start
+
+    def letters(self, pad_id, start, n):
+        """Pad letters [start, start + n) as bytes, read from the memory map."""
+        with self._lock:
+            entry = self._maps.get(pad_id)
+            if entry is None:
+                f = open(self._path(pad_id, '.pad'), 'rb')
+                try:
+                    entry = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                except BaseException:
+                    f.close()
+                    raise
+                self._maps[pad_id] = entry
+                while len(self._maps) > self.max_open:
+                    _, (old_file, old_map) = self._maps.popitem(last=False)
+                    old_map.close()
+                    old_file.close()
+            else:
+                self._maps.move_to_end(pad_id)
+            mm = entry[1]
+            if start < 0 or start + n > len(mm):
+                raise ValueError(f'Key pad range {start}..{start + n} is outside the pad ({len(mm)} letters)')
+            # copied under the lock so an eviction cannot close the map mid-read
+            return mm[start:start + n]
+
+    def encrypt(self, pad_id, plaintext):
+        """OTP-encrypt plaintext with fresh pad letters; returns (ciphertext, start offset)."""
+        n = ciphers.otp_letters_needed(plaintext)
+        start = self.reserve(pad_id, n)
+        return ciphers.otp_with_pad_letters(plaintext, self.letters(pad_id, start, n)), start
+
+    def decrypt(self, pad_id, ciphertext, start):
+        """
+        Decrypt with the letters used at start; decryption never consumes the
+        pad. Only letters already handed out can be used, so unused pad
+        material is never revealed.
+        """
+        n = ciphers.otp_letters_needed(ciphertext)
+        offset = self.info(pad_id)['offset']
+        if start < 0 or start + n > offset:
+            raise ValueError(f'Key pad range {start}..{start + n} has not been used for encryption '
+                             f'(only letters before {offset} have)')
+        return ciphers.otp_with_pad_letters(ciphertext, self.letters(pad_id, start, n), decrypt=True)
+
+    def close(self):
+        with self._lock:
+            for f, mm in self._maps.values():
+                mm.close()
+                f.close()
+            self._maps.clear()
@@ -0,0 +1,100 @@
+# cipher/parallel.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import ciphers, registry
+from .lazy import LazyModule
+
+np = LazyModule('numpy', globals(), 'np')
+
+# Chunk-parallel byte ciphers. Shift/affine/substitution are position independent
+# (one fixed byte table), so a buffer can be split into spans that are mapped
+# independently and written in place into one shared output array. Threads are
+# used instead of processes: the NumPy table lookup releases the GIL, and
+# threads share the input and output buffers without pickling anything.
+# The permutation keystream is not split: MT19937 has no cheap jump-ahead, so
+# every worker would regenerate the prefix before its span and the total work
+# would grow with the worker count. Those algorithms always run serially.
+#
+# The parallel path is opt-in (PARALLEL_THRESHOLD is None by default): the
+# NumPy gather measured 180-280 MB/s against ~500-720 MB/s for the serial
+# bytes.translate on the same 64 MB input, so splitting only pays off where
+# a benchmark on the target machine shows it does.
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+PARALLEL_THRESHOLD = None  # inputs of at least this many bytes are split; None: always serial
+PARALLEL_CHUNK_SIZE = 16 << 20  # chunk size for streamed input on the parallel path
+MIN_SPAN = 1 << 20
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def _executor(workers):
+    """Thread pool shared by all callers asking for the same worker count."""
+    with _executors_lock:
+        pool = _executors.get(workers)
+        if pool is None:
+            pool = _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='cipher')
+        return pool
+
+def _spans(n, parts):
+    """Split range(n) into at most parts contiguous (start, stop) spans of 4-aligned size."""
+    step = max(MIN_SPAN, -(-n // parts))
+    step += -step % 4
+    return [(i, min(i + step, n)) for i in range(0, n, step)]
+
+class ParallelByteCipher:
+    """
+    Incremental byte cipher that splits every chunk passed to update() across a
+    thread pool. Output is identical to byte_stream_cipher(algo, key, decrypt).
+    Only position-independent (byte table) algorithms can be split.
+    """
+
+    def __init__(self, algo, key, decrypt=False, workers=None):
+        if not supports_parallel(algo):
+            raise ValueError(f'{algo} cannot be processed in parallel')
+        cipher = ciphers.byte_stream_cipher(algo, key, decrypt)  # validates the key
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.position = 0
+        self._table = np.frombuffer(cipher.table, dtype=np.uint8)
+
+    def _run(self, src, out, start, stop):
+        out[start:stop] = self._table[src[start:stop]]
+
+    def update(self, chunk) -> bytes:
+        src = np.frombuffer(chunk, dtype=np.uint8)
+        out = np.empty_like(src)
+        spans = _spans(len(src), self.workers)
+        if len(spans) <= 1:
+            self._run(src, out, 0, len(src))
+        else:
+            pool = _executor(self.workers)
+            futures = [pool.submit(self._run, src, out, start, stop) for start, stop in spans]
+            for f in futures:
+                f.result()
+        self.position += len(src)
+        return out.tobytes()
+
+def supports_parallel(algo):
+    return registry.get(algo).position_independent
+
+def transform_bytes(data, algo, key, decrypt=False, workers=None, threshold=PARALLEL_THRESHOLD):
+    """
+    One-shot byte-mode encrypt/decrypt; inputs of at least threshold bytes are
+    processed in parallel with workers threads (threshold None: never).
+    """
+    workers = workers or DEFAULT_WORKERS
+    if threshold is None or len(data) < threshold or workers <= 1 or not supports_parallel(algo):
+        return ciphers.byte_stream_cipher(algo, key, decrypt).update(data)
+    return ParallelByteCipher(algo, key, decrypt, workers).update(data)
+
+def stream_cipher(algo, key, decrypt=False, size=None, workers=None, threshold=PARALLEL_THRESHOLD):
+    """
+    Pick the incremental cipher for an input of size bytes (None if unknown):
+    ParallelByteCipher at or above threshold for position-independent
+    algorithms, the serial cipher otherwise (always for threshold None).
+    """
+    workers = workers or DEFAULT_WORKERS
+    if threshold is not None and size is not None and size >= threshold and workers > 1 and supports_parallel(algo):
+        return ParallelByteCipher(algo, key, decrypt, workers)
+    return ciphers.byte_stream_cipher(algo, key, decrypt)
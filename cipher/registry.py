@@ -0,0 +1,99 @@
+# cipher/registry.py
+from . import ciphers
+
+# Table of supported algorithms. Each entry says how to parse a key, how to
+# compile it for text mode and, for file-mode algorithms, how to build an
+# incremental byte cipher. Callers (the web app, batch API, benchmarks) look
+# an algorithm up here instead of switching on its name.
+
+class Algorithm:
+    """
+    One registry entry.
+
+    parse_key(raw) -> key         normalise a raw key (form string, JSON value)
+    compile_text(key) -> object   compiled key with encrypt(text) / decrypt(text)
+    byte_cipher(key, decrypt, offset) -> object with update(chunk) -> bytes,
+                                  or None when the algorithm has no file mode
+    text_stream(key, decrypt) -> object with update(text) -> str and
+                                  finalize() -> str, for large text files
+    position_independent          every byte is mapped by a fixed table
+    seekable                      byte_cipher honours offset (range decryption)
+    """
+
+    def __init__(self, name, label, compile_text, byte_cipher=None, parse_key=None,
+                 position_independent=False, seekable=False, text_stream=None):
+        self.name = name
+        self.label = label
+        self.compile_text = compile_text
+        self.byte_cipher = byte_cipher
+        self.parse_key = parse_key or (lambda raw: raw)
+        self.position_independent = position_independent
+        self.seekable = seekable
+        self.text_stream = text_stream or (lambda key, decrypt=False: ciphers.TextStreamCipher(compile_text(key), decrypt))
+
+    @property
+    def supports_bytes(self):
+        return self.byte_cipher is not None
+
+    @property
+    def mode(self):
+        return 'both' if self.supports_bytes else 'text'
+
+    def text_key(self, raw):
+        return self.compile_text(self.parse_key(raw))
+
+    def text_stream_cipher(self, raw, decrypt=False):
+        return self.text_stream(self.parse_key(raw), decrypt)
+
+    def byte_stream_cipher(self, raw, decrypt=False, offset=0):
+        if not self.supports_bytes:
+            raise ValueError('Selected algorithm does not support file/binary mode')
+        return self.byte_cipher(self.parse_key(raw), decrypt, offset)
+
+def _table_cipher(tables):
+    """byte_cipher for algorithms whose tables(key) returns (encrypt, decrypt) tables."""
+    def build(key, decrypt=False, offset=0):
+        return ciphers.ByteTableCipher(tables(key)[1 if decrypt else 0])
+    return build
+
+def _affine_byte_tables(key):
+    return ciphers.affine_encrypt_byte_table(key), ciphers.affine_decrypt_byte_table(key)
+
+REGISTRY = {}
+
+def register(algorithm):
+    REGISTRY[algorithm.name] = algorithm
+    return algorithm
+
+register(Algorithm('shift', 'Shift Cipher', ciphers.compile_shift_text_key,
+                   _table_cipher(ciphers.shift_byte_tables), position_independent=True, seekable=True))
+register(Algorithm('substitution', 'Substitution Cipher', ciphers.compile_substitution_text_key,
+                   _table_cipher(ciphers.substitution_byte_tables), position_independent=True, seekable=True))
+register(Algorithm('affine', 'Affine Cipher', ciphers.compile_affine_text_key,
+                   _table_cipher(_affine_byte_tables), position_independent=True, seekable=True))
+register(Algorithm('vigenere', 'Vigenere Cipher', ciphers.VigenereKey, text_stream=ciphers.VigenereStream))
+register(Algorithm('hill', 'Hill Cipher', ciphers.compile_hill_key, parse_key=ciphers.parse_hill_key,
+                   text_stream=lambda key, decrypt=False: ciphers.BlockTextStream(ciphers.compile_hill_key(key), decrypt)))
+register(Algorithm('permutation', 'Permutation Cipher', ciphers.PermutationTextKey,
+                   lambda key, decrypt=False, offset=0: ciphers.PermutationKeystream(key, offset=offset),
+                   seekable=True,
+                   text_stream=lambda key, decrypt=False: ciphers.BlockTextStream(ciphers.PermutationTextKey(key), decrypt)))
+register(Algorithm('otp', 'One-Time Pad', ciphers.OneTimePadKey, text_stream=ciphers.OneTimePadStream))
+register(Algorithm('playfair', 'Playfair Cipher', ciphers.compile_playfair_key,
+                   text_stream=lambda key, decrypt=False: ciphers.PlayfairStream(ciphers.compile_playfair_key(key), decrypt)))
+
+def get(name):
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise ValueError('Unknown algorithm')
+
+def names():
+    return tuple(REGISTRY)
+
+def byte_algorithms():
+    return tuple(name for name, algo in REGISTRY.items() if algo.supports_bytes)
+
+def compile_text_key(name, key):
+    """Compiled key with encrypt(text) / decrypt(text) for any registered algorithm."""
+    return get(name).text_key(key)
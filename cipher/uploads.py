@@ -0,0 +1,284 @@
+# cipher/uploads.py
+import io
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from . import registry
+
+# Resumable chunked uploads. A session is opened with the file size and a chunk
+# size; the client then PUTs chunk n (bytes [n*chunk_size, (n+1)*chunk_size))
+# in any order, retrying any that failed, and finalizes once all are stored.
+# Each chunk lands in <folder>/<session id>/<n>.part via a temp file, so a
+# dropped connection never leaves a partial chunk behind.
+#
+# For encryption with a position-independent (byte table) cipher every chunk
+# is ciphered as it arrives, so its part never holds plaintext. Keystream
+# ciphers (permutation) cannot cheaply start at an arbitrary offset: MT19937
+# has to be stepped over the whole prefix. Their session keeps one cursor
+# cipher that encrypts parts in order as soon as the chunks up to them are
+# stored; a chunk that arrives ahead of the cursor waits as plaintext until
+# the gap is filled. The total keystream work stays linear in the file size.
+# Decryption needs the payload header first, so its chunks are stored as
+# received and read back in order by finalize. Keys are only held in memory.
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 << 20
+MIN_UPLOAD_CHUNK_SIZE = 64 << 10
+MAX_UPLOAD_CHUNK_SIZE = 64 << 20
+MAX_UPLOAD_CHUNKS = 100000  # 800 GB at the default chunk size
+UPLOAD_MAX_AGE = 24 * 3600  # idle sessions older than this are discarded
+SESSION_DIR_RE = re.compile(r'^[0-9a-f]{32}$')
+
+class UploadSession:
+    def __init__(self, folder, filename, algorithm, key, action, size, chunk_size, export_format='enc'):
+        spec = registry.get(algorithm)
+        if not spec.supports_bytes:
+            raise ValueError('Selected algorithm does not support file/binary mode')
+        if action not in ('encrypt', 'decrypt'):
+            raise ValueError('action must be encrypt or decrypt')
+        if not isinstance(size, int) or size < 0:
+            raise ValueError('size must be a non-negative integer')
+        if not isinstance(chunk_size, int) or not MIN_UPLOAD_CHUNK_SIZE <= chunk_size <= MAX_UPLOAD_CHUNK_SIZE:
+            raise ValueError(f'chunk_size must be between {MIN_UPLOAD_CHUNK_SIZE} and {MAX_UPLOAD_CHUNK_SIZE}')
+        if -(-size // chunk_size) > MAX_UPLOAD_CHUNKS:
+            raise ValueError(f'size needs more than {MAX_UPLOAD_CHUNKS} chunks; use a larger chunk_size')
+        cipher = spec.byte_stream_cipher(key, action == 'decrypt')  # invalid keys fail here, not on the first chunk
+        self.id = uuid.uuid4().hex
+        self.folder = os.path.join(folder, self.id)
+        self.filename = filename
+        self.algorithm = algorithm
+        self.key = key
+        self.action = action
+        self.size = size
+        self.chunk_size = chunk_size
+        self.export_format = export_format
+        self.chunk_count = -(-size // chunk_size)
+        self.finalized = False
+        self.updated_at = time.time()
+        self._received = set()  # indices of stored chunks, guarded by _lock
+        # keystream encryption: parts before _next hold ciphertext, _cursor is at chunk _next
+        self._cursor = cipher if action == 'encrypt' and not spec.position_independent else None
+        self._next = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.folder)
+
+    def part_path(self, n):
+        return os.path.join(self.folder, f'{n}.part')
+
+    def chunk_length(self, n):
+        """Exact number of bytes chunk n must have."""
+        if not 0 <= n < self.chunk_count:
+            raise ValueError(f'chunk index must be in 0..{self.chunk_count - 1}')
+        return min(self.chunk_size, self.size - n * self.chunk_size)
+
+    def write_chunk(self, n, src, read_size=1 << 20):
+        """
+        Store chunk n read from the binary stream src, encrypting it at offset
+        n*chunk_size for encrypt sessions. Re-sending a chunk replaces it.
+        Returns the number of bytes stored.
+        """
+        expected = self.chunk_length(n)
+        if self.finalized:
+            raise RuntimeError('Upload has already been finalized')
+        cipher = None
+        if self.action == 'encrypt' and self._cursor is None:
+            cipher = registry.get(self.algorithm).byte_stream_cipher(self.key)
+        tmp = os.path.join(self.folder, f'{n}.{uuid.uuid4().hex}.tmp')
+        written = 0
+        try:
+            with open(tmp, 'wb') as f:
+                while True:
+                    data = src.read(min(read_size, expected - written + 1))
+                    if not data:
+                        break
+                    written += len(data)
+                    if written > expected:
+                        break
+                    f.write(cipher.update(data) if cipher is not None else data)
+            if written != expected:
+                raise ValueError(f'chunk {n} must be {expected} bytes')
+            with self._lock:
+                if self.finalized:
+                    raise RuntimeError('Upload has already been finalized')
+                if self._cursor is not None and n < self._next:
+                    # re-sent chunk behind the cursor: one seek to its offset
+                    _cipher_file(tmp, registry.get(self.algorithm).byte_stream_cipher(
+                        self.key, offset=n * self.chunk_size), read_size)
+                os.replace(tmp, self.part_path(n))
+                self._received.add(n)
+                self.updated_at = time.time()
+                while self._cursor is not None and self._next in self._received:
+                    _cipher_file(self.part_path(self._next), self._cursor, read_size)
+                    self._next += 1
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return written
+
+    def received(self):
+        with self._lock:
+            return sorted(self._received)
+
+    def missing(self):
+        with self._lock:
+            return self._missing()
+
+    def remaining(self):
+        """Number of chunks still to be sent."""
+        with self._lock:
+            return self.chunk_count - len(self._received)
+
+    def _missing(self):
+        return [n for n in range(self.chunk_count) if n not in self._received]
+
+    def finalize(self):
+        """
+        Close the session to further chunks and return a reader over the
+        stored parts in order. Closing the reader deletes the session's files.
+        """
+        with self._lock:
+            if self.finalized:
+                raise RuntimeError('Upload has already been finalized')
+            missing = self._missing()
+            if missing:
+                raise ValueError(f'{len(missing)} chunk(s) missing, first is {missing[0]}')
+            self.finalized = True
+        return PartsReader([self.part_path(n) for n in range(self.chunk_count)],
+                           on_close=lambda: shutil.rmtree(self.folder, ignore_errors=True))
+
+    def discard(self):
+        with self._lock:
+            self.finalized = True
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def to_dict(self):
+        received = self.received()
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'algorithm': self.algorithm,
+            'action': self.action,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'chunk_count': self.chunk_count,
+            'received': received,
+            'bytes_received': len(received) * self.chunk_size - (
+                self.chunk_count * self.chunk_size - self.size if self.chunk_count - 1 in received else 0),
+            'finalized': self.finalized,
+        }
+
+def _cipher_file(path, cipher, read_size):
+    """Replace the contents of path with cipher.update() of them, in place."""
+    with open(path, 'r+b') as f:
+        while True:
+            pos = f.tell()
+            data = f.read(read_size)
+            if not data:
+                break
+            f.seek(pos)
+            f.write(cipher.update(data))
+
+class PartsReader(io.RawIOBase):
+    """Read-only, seekable view of several files one after another."""
+
+    def __init__(self, paths, on_close=None):
+        self.paths = paths
+        self.sizes = [os.path.getsize(p) for p in paths]
+        self.starts = [0]
+        for size in self.sizes:
+            self.starts.append(self.starts[-1] + size)
+        self.position = 0
+        self.on_close = on_close
+        self._index = None
+        self._file = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self.position, os.SEEK_END: self.starts[-1]}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.starts[-1]:
+            return 0
+        index = next(i for i in range(len(self.paths)) if self.position < self.starts[i + 1])
+        if index != self._index:
+            if self._file is not None:
+                self._file.close()
+            self._file, self._index = open(self.paths[index], 'rb'), index
+        self._file.seek(self.position - self.starts[index])
+        n = self._file.readinto(memoryview(buffer)[:self.starts[index + 1] - self.position])
+        self.position += n
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        if self._file is not None:
+            self._file.close()
+        super().close()
+        if self.on_close is not None:
+            self.on_close()
+
+class UploadStore:
+    """
+    In-memory index of open upload sessions; their chunks live under folder.
+    The store owns folder: session directories left by an earlier process
+    (keys are never persisted, so they cannot be resumed) are removed when
+    the store is created, since they may hold plaintext parts.
+    """
+
+    def __init__(self, folder, max_age=UPLOAD_MAX_AGE):
+        self.folder = folder
+        self.max_age = max_age
+        os.makedirs(folder, exist_ok=True)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweep_orphans()
+
+    def _sweep_orphans(self):
+        """Delete every session directory under folder (startup only: nothing is open yet)."""
+        removed = []
+        for entry in os.scandir(self.folder):
+            if entry.is_dir() and SESSION_DIR_RE.match(entry.name):
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed.append(entry.name)
+        return removed
+
+    def create(self, filename, algorithm, key, action, size, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE,
+               export_format='enc'):
+        self.prune()
+        session = UploadSession(self.folder, filename, algorithm, key, action, size, chunk_size, export_format)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, upload_id):
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def pop(self, upload_id):
+        with self._lock:
+            return self._sessions.pop(upload_id, None)
+
+    def prune(self, now=None):
+        """Discard sessions that have not received a chunk for max_age seconds."""
+        now = time.time() if now is None else now
+        with self._lock:
+            stale = [s for s in self._sessions.values() if now - s.updated_at > self.max_age]
+            for session in stale:
+                del self._sessions[session.id]
+        for session in stale:
+            session.discard()
+        return [s.id for s in stale]
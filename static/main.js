@@ -141,6 +141,8 @@
         // const inputType = inputTypeSel ? inputTypeSel.value : 'text';
         const key = keyInput ? keyInput.value.trim() : '';
         const keyfile = keyfileInput && keyfileInput.files.length ? keyfileInput.files[0].name : null;
+        const padInput = document.getElementById('pad_id');
+        const padId = padInput ? padInput.value.trim() : '';
         const fileProvided = fileInput && fileInput.files.length;
         let errs = [];
 
@@ -150,7 +152,7 @@
         }
 
         function requireKeyOrKeyfile(){
-            if(key.length === 0 && !keyfile) errs.push('For OTP you must provide a key or upload a key file.');
+            if(key.length === 0 && !keyfile && !padId) errs.push('For OTP you must provide a key, upload a key file or give a stored pad id.');
         }
 
         if(currentMode === 'text'){
@@ -0,0 +1,79 @@
+# tests/test_analysis.py
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, analysis
+
+PLAINTEXT = (
+    "It was the best of times, it was the worst of times, it was the age of wisdom, "
+    "it was the age of foolishness, it was the epoch of belief, it was the epoch of "
+    "incredulity, it was the season of Light, it was the season of Darkness."
+)
+
+@pytest.mark.parametrize("key", ['0', '3', '13', '25'])
+def test_crack_shift_finds_key(key):
+    ct = ciphers.shift_encrypt_text(PLAINTEXT, key)
+    best = analysis.crack_shift(ct, top=3)
+    assert len(best) == 3 and best[0]['key'] == key
+    assert best[0]['plaintext'] == ciphers.normalize_text_for_letters(PLAINTEXT)
+    assert best[0]['score'] <= best[1]['score'] <= best[2]['score']
+
+@pytest.mark.parametrize("key", ['1,0', '5,8', '25,17'])
+def test_crack_affine_finds_key(key):
+    ct = ciphers.affine_encrypt_text(PLAINTEXT, key)
+    best = analysis.crack_affine(ct, top=1)
+    assert best[0]['key'] == key
+    assert best[0]['plaintext'] == ciphers.normalize_text_for_letters(PLAINTEXT)
+
+def test_affine_search_covers_all_312_keys():
+    ranked = analysis.crack_affine("Hello world", top=1000, decrypt=False)
+    assert len(ranked) == 312 == len({r['key'] for r in ranked})
+    assert all(r['plaintext'] is None for r in ranked)
+
+def test_chi_squared_matches_direct_formula():
+    hist = analysis.letter_histogram(analysis.letters_only(PLAINTEXT))
+    n = hist.sum()
+    direct = sum((h - n * f) ** 2 / (n * f) for h, f in zip(hist.tolist(), analysis.ENGLISH_FREQUENCIES))
+    assert analysis.chi_squared(hist) == pytest.approx(direct)
+
+def test_non_letters_and_empty_input():
+    assert analysis.letters_only("a-B c!é") == "ABC"
+    assert [r['plaintext'] for r in analysis.crack_shift("123", top=2)] == ['', '']
+
+LONG_TEXT = PLAINTEXT * 6 + (
+    "There were a king with a large jaw and a queen with a plain face, on the throne of England; "
+    "there were a king with a large jaw and a queen with a fair face, on the throne of France."
+) * 3
+
+@pytest.mark.parametrize("key", ['LEMON', 'CRYPTOGRAPHY', 'K', 'SECRETKEY'])
+def test_crack_vigenere_recovers_key(key):
+    ct = ciphers.vigenere_encrypt_text(LONG_TEXT, key)
+    best = analysis.crack_vigenere(ct)[0]
+    assert best['key'] == key and best['key_length'] == len(key)
+    assert best['plaintext'] == ciphers.normalize_text_for_letters(LONG_TEXT)
+
+def test_vigenere_periods_peak_at_key_length():
+    ct = ciphers.vigenere_encrypt_text(LONG_TEXT, 'LEMON')
+    periods = analysis.vigenere_periods(analysis.letters_only(ct), 12)
+    assert len(periods) == 12
+    assert periods[4] > 0.055 and periods[9] > 0.055  # 5 and its multiple 10
+    assert max(periods[i] for i in (0, 1, 2, 3, 5, 6)) < 0.05
+
+def test_crack_vigenere_with_given_length_and_bad_options():
+    ct = ciphers.vigenere_encrypt_text(LONG_TEXT, 'LEMON')
+    assert analysis.crack_vigenere(ct, key_length=5, decrypt=False)[0]['key'] == 'LEMON'
+    with pytest.raises(ValueError):
+        analysis.crack_vigenere(ct, key_length=0)
+    with pytest.raises(ValueError):
+        analysis.crack_vigenere(ct, max_key_length='x')
+    with pytest.raises(ValueError):
+        analysis.crack_vigenere('HELLOWORLD', key_length=10 ** 9)
+
+def test_preview_decrypts_only_a_prefix():
+    ct = ciphers.vigenere_encrypt_text(LONG_TEXT, 'LEMON')
+    full = analysis.crack_vigenere(ct)[0]['plaintext']
+    assert analysis.crack_vigenere(ct, preview=12)[0]['plaintext'] == full[:12]
+    shifted = ciphers.shift_encrypt_text(LONG_TEXT, '7')
+    assert [c['plaintext'] for c in analysis.crack_shift(shifted, top=3, preview=5)] == \
+        [c['plaintext'][:5] for c in analysis.crack_shift(shifted, top=3)]
+    assert len(analysis.crack_affine(shifted, top=1000)) == analysis.MAX_CANDIDATES
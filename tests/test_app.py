@@ -0,0 +1,433 @@
+# tests/test_app.py
+import json
+import io
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import app as webapp
+from cipher import ciphers, container
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(webapp, 'OUTPUT_FOLDER', str(tmp_path))
+    webapp.app.config['TESTING'] = True
+    return webapp.app.test_client()
+
+def _file_form(action, algo, key, name, data):
+    return {
+        'action': action,
+        'input_type': 'file',
+        'algorithm_file': algo,
+        'key': key,
+        'file': (io.BytesIO(data), name),
+    }
+
+@pytest.mark.parametrize("algo,key", [("shift", "3"), ("affine", "5,8"), ("permutation", "pk")])
+def test_file_roundtrip(client, algo, key):
+    data = os.urandom(3000)
+    webapp.app.config['STREAM_CHUNK_SIZE'] = 512
+    try:
+        resp = client.post('/process', data=_file_form('encrypt', algo, key, 'doc.bin', data),
+                           content_type='multipart/form-data')
+        assert resp.status_code == 200
+        enc = resp.data
+        assert ciphers.unpack_encrypted_payload(enc) == ('doc.bin', getattr(ciphers, f"{algo}_encrypt_bytes")(data, key))
+        resp = client.post('/process', data=_file_form('decrypt', algo, key, 'doc.bin.enc', enc),
+                           content_type='multipart/form-data')
+        assert resp.status_code == 200
+        assert resp.data == data
+    finally:
+        webapp.app.config['STREAM_CHUNK_SIZE'] = ciphers.STREAM_CHUNK_SIZE
+
+def test_file_mode_rejects_text_only_algorithm(client):
+    resp = client.post('/process', data=_file_form('encrypt', 'vigenere', 'KEY', 'a.txt', b'abc'),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 302
+
+def test_persisted_outputs_get_unique_names(client, tmp_path):
+    webapp.app.config['PERSIST_OUTPUTS'] = True
+    try:
+        for _ in range(2):
+            resp = client.post('/process', data=_file_form('encrypt', 'shift', '3', 'same.txt', b'hello'),
+                               content_type='multipart/form-data')
+            assert resp.status_code == 200
+            assert 'same.txt.enc' in resp.headers['Content-Disposition']
+            resp.close()
+    finally:
+        webapp.app.config['PERSIST_OUTPUTS'] = False
+    assert len(list(tmp_path.iterdir())) == 2
+
+def test_cleanup_outputs_by_age_and_size(tmp_path):
+    now = 10_000
+    for name, age, size in [('old', 500, 10), ('mid', 50, 10), ('new', 5, 10)]:
+        p = tmp_path / name
+        p.write_bytes(b'x' * size)
+        os.utime(p, (now - age, now - age))
+    removed = webapp.cleanup_outputs(str(tmp_path), max_age=100, max_bytes=10, now=now)
+    assert sorted(os.path.basename(p) for p in removed) == ['mid', 'old']
+    assert [p.name for p in tmp_path.iterdir()] == ['new']
+
+@pytest.mark.parametrize("algo,key", [("affine", "5,8"), ("permutation", "pk")])
+def test_file_roundtrip_parallel_path(client, algo, key):
+    data = os.urandom(5000)
+    cfg = webapp.app.config
+    saved = dict(cfg)
+    cfg.update(PARALLEL_THRESHOLD=1000, CIPHER_WORKERS=2, PARALLEL_CHUNK_SIZE=4096)
+    try:
+        resp = client.post('/process', data=_file_form('encrypt', algo, key, 'big.bin', data),
+                           content_type='multipart/form-data')
+        assert ciphers.unpack_encrypted_payload(resp.data)[1] == getattr(ciphers, f'{algo}_encrypt_bytes')(data, key)
+    finally:
+        cfg.update(saved)
+
+def test_file_decrypt_mmap_path(client):
+    data = os.urandom(4000)
+    enc = ciphers.pack_encrypted_payload('m.bin', ciphers.substitution_encrypt_bytes(data, 'k'))
+    webapp.app.config['MMAP_THRESHOLD'] = 0
+    try:
+        resp = client.post('/process', data=_file_form('decrypt', 'substitution', 'k', 'm.bin.enc', enc),
+                           content_type='multipart/form-data')
+        assert resp.status_code == 200
+        assert resp.data == data
+        assert 'm_decrypted.bin' in resp.headers['Content-Disposition']
+        resp = client.post('/process', data=_file_form('decrypt', 'substitution', 'k', 'bad.enc', b'junk'),
+                           content_type='multipart/form-data')
+        assert resp.status_code == 302
+    finally:
+        webapp.app.config['MMAP_THRESHOLD'] = 64 << 20
+
+def test_file_roundtrip_v2_container(client):
+    data = os.urandom(3000)
+    webapp.app.config['CONTAINER_VERSION'] = 2
+    try:
+        resp = client.post('/process', data=_file_form('encrypt', 'affine', '5,8', 'c.bin', data),
+                           content_type='multipart/form-data')
+        enc = resp.data
+    finally:
+        webapp.app.config['CONTAINER_VERSION'] = 1
+    assert enc.startswith(container.MAGIC)
+    resp = client.post('/process', data=_file_form('decrypt', 'affine', '5,8', 'c.bin.enc', enc),
+                       content_type='multipart/form-data')
+    assert resp.data == data
+    # header records the algorithm, so a mismatched one is rejected up front
+    resp = client.post('/process', data=_file_form('decrypt', 'shift', '5', 'c.bin.enc', enc),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 302
+
+def _store(tmp_path, name, packed):
+    (tmp_path / name).write_bytes(packed)
+
+@pytest.mark.parametrize("algo,key", [("permutation", "pk"), ("substitution", "sk")])
+def test_decrypt_stored_range(client, tmp_path, algo, key):
+    data = os.urandom(5000)
+    enc = getattr(ciphers, f"{algo}_encrypt_bytes")(data, key)
+    _store(tmp_path, 'legacy.enc', ciphers.pack_encrypted_payload('legacy.bin', enc))
+    _store(tmp_path, 'v2.enc', container.pack_container('v2.bin', algo, enc))
+    headers = {'X-Cipher-Algorithm': algo, 'X-Cipher-Key': key}
+    for name in ('legacy.enc', 'v2.enc'):
+        resp = client.get(f'/outputs/{name}/decrypt', headers=dict(headers, Range='bytes=1001-2002'))
+        assert resp.status_code == 206
+        assert resp.headers['Content-Range'] == 'bytes 1001-2002/5000'
+        assert resp.data == data[1001:2003]
+        resp = client.get(f'/outputs/{name}/decrypt', headers=dict(headers, Range='bytes=-3'))
+        assert resp.data == data[-3:]
+        resp = client.get(f'/outputs/{name}/decrypt', headers=headers)
+        assert resp.status_code == 200 and resp.data == data
+
+def test_process_output_range_decrypt(client, monkeypatch):
+    monkeypatch.setitem(webapp.app.config, 'PERSIST_OUTPUTS', True)
+    data = os.urandom(5000)
+    resp = client.post('/process', data=_file_form('encrypt', 'permutation', 'pk', 'clip.bin', data),
+                       content_type='multipart/form-data')
+    assert resp.headers['X-Decrypt-Url'] == f"/outputs/{resp.headers['X-Stored-Name']}/decrypt"
+    ranged = client.get(resp.headers['X-Decrypt-Url'],
+                        headers={'X-Cipher-Algorithm': 'permutation', 'X-Cipher-Key': 'pk', 'Range': 'bytes=100-199'})
+    assert ranged.status_code == 206 and ranged.data == data[100:200]
+
+def test_decrypt_stored_errors(client, tmp_path):
+    _store(tmp_path, 'x.enc', container.pack_container('x.bin', 'shift', b'abc'))
+    assert client.get('/outputs/missing.enc/decrypt?algorithm=shift&key=1').status_code == 404
+    assert client.get('/outputs/x.enc/decrypt?algorithm=affine&key=5,8').status_code == 400
+    resp = client.get('/outputs/x.enc/decrypt?algorithm=shift&key=1', headers={'Range': 'bytes=10-20'})
+    assert resp.status_code == 416
+
+def test_batch_api(client):
+    items = [
+        {'algorithm': 'shift', 'action': 'encrypt', 'key': '3', 'text': 'abc'},
+        {'algorithm': 'playfair', 'action': 'decrypt', 'key': 'MONARCHY', 'text': 'odd'},
+    ]
+    resp = client.post('/api/v1/batch', json=items)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body[0] == {'index': 0, 'ok': True, 'result': 'DEF'}
+    assert body[1]['ok'] is False and body[1]['error']
+    assert client.post('/api/v1/batch', json={'items': items[:1]}).get_json()[0]['result'] == 'DEF'
+
+def test_batch_api_rejects_bad_bodies(client, monkeypatch):
+    assert client.post('/api/v1/batch', data='not json').status_code == 400
+    assert client.post('/api/v1/batch', json={'foo': 1}).status_code == 400
+    monkeypatch.setitem(webapp.app.config, 'BATCH_MAX_ITEMS', 1)
+    assert client.post('/api/v1/batch', json=[{}, {}]).status_code == 413
+
+def _text_form(action, algo, key='', **extra):
+    form = {'action': action, 'input_type': 'text', 'algorithm_text': algo, 'key': key}
+    form.update(extra)
+    return form
+
+def test_text_mode_dispatches_through_registry(client):
+    resp = client.post('/process', data=_text_form('encrypt', 'vigenere', 'LEMON', plaintext='ATTACKATDAWN'))
+    assert resp.status_code == 200 and b'LXFOPVEFRNHR' in resp.data and b'Vigenere Cipher' in resp.data
+    form = _text_form('encrypt', 'hill', plaintext='HELP')
+    form['hill_key[]'] = ['3', '3', '2', '5']
+    resp = client.post('/process', data=form)
+    assert ciphers.hill_encrypt_text('HELP', [[3, 3], [2, 5]]).encode() in resp.data
+    form = _text_form('decrypt', 'otp', ciphertext='LXFOPV')
+    form['keyfile'] = (io.BytesIO(b'LEMONLEMON'), 'pad.txt')
+    resp = client.post('/process', data=form, content_type='multipart/form-data')
+    assert b'ATTACK' in resp.data
+
+@pytest.mark.parametrize("persist", [False, True])
+def test_text_file_upload_streams_download(client, persist):
+    text = "Attack at dawn, then retreat.\n" * 400
+    webapp.app.config['STREAM_CHUNK_SIZE'] = 97
+    webapp.app.config['PERSIST_OUTPUTS'] = persist
+    try:
+        form = _text_form('encrypt', 'vigenere', 'LEMON')
+        form['textfile'] = (io.BytesIO(text.encode()), 'orders.txt')
+        resp = client.post('/process', data=form, content_type='multipart/form-data')
+        assert resp.status_code == 200
+        assert 'orders_encrypted.txt' in resp.headers['Content-Disposition']
+        assert resp.data.decode() == ciphers.vigenere_encrypt_text(text, 'LEMON')
+        form = _text_form('decrypt', 'vigenere', 'LEMON')
+        form['textfile'] = (io.BytesIO(resp.data), 'orders_encrypted.txt')
+        resp = client.post('/process', data=form, content_type='multipart/form-data')
+        assert resp.data.decode() == ciphers.vigenere_decrypt_text(ciphers.vigenere_encrypt_text(text, 'LEMON'), 'LEMON')
+    finally:
+        webapp.app.config['STREAM_CHUNK_SIZE'] = ciphers.STREAM_CHUNK_SIZE
+        webapp.app.config['PERSIST_OUTPUTS'] = False
+
+@pytest.fixture
+def pad_store(tmp_path, monkeypatch):
+    store = webapp.pads.PadStore(str(tmp_path / 'pads'))
+    monkeypatch.setattr(webapp, 'PADS', store)
+    yield store
+    store.close()
+
+def test_pad_api_flow(client, pad_store):
+    resp = client.post('/api/v1/pads', data={'pad': (io.BytesIO(b'lemon lemon lemon'), 'pad.txt')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 201
+    pad_id = resp.get_json()['id']
+    first = client.post(f'/api/v1/pads/{pad_id}/encrypt', json={'text': 'attack'}).get_json()
+    second = client.post(f'/api/v1/pads/{pad_id}/encrypt', json={'text': 'dawn'}).get_json()
+    assert (first['offset'], first['length'], second['offset']) == (0, 6, 6)
+    assert first['result'] == ciphers.otp_encrypt_text('attack', 'LEMONL')
+    resp = client.post(f'/api/v1/pads/{pad_id}/decrypt', json={'text': second['result'], 'offset': 6})
+    assert resp.get_json()['result'] == 'dawn'
+    assert client.get(f'/api/v1/pads/{pad_id}').get_json()['remaining'] == 5
+    assert client.post(f'/api/v1/pads/{pad_id}/encrypt', json={'text': 'toolong'}).status_code == 400
+    assert client.post(f'/api/v1/pads/{pad_id}/decrypt', json={'text': 'x'}).status_code == 400
+    assert client.post(f'/api/v1/pads/{pad_id}/decrypt', json={'text': 'AAAAA', 'offset': 10}).status_code == 400
+    assert client.get('/api/v1/pads/' + '0' * 32).status_code == 404
+    assert client.post('/api/v1/pads', data={}).status_code == 400
+
+def test_text_mode_with_stored_pad(client, pad_store):
+    pad_id = pad_store.create(io.BytesIO(b'LEMONLEMONLEMON'))['id']
+    pad_store.reserve(pad_id, 2)
+    resp = client.post('/process', data=_text_form('encrypt', 'otp', plaintext='ATTACK', pad_id=pad_id))
+    assert ciphers.otp_encrypt_text('ATTACK', 'MONLEM').encode() in resp.data
+    assert b'offset 2' in resp.data
+    resp = client.post('/process', data=_text_form('decrypt', 'otp', ciphertext=ciphers.otp_encrypt_text('ATTACK', 'MONLEM'),
+                                                     pad_id=pad_id, pad_offset='2'))
+    assert b'ATTACK' in resp.data
+    resp = client.post('/process', data=_text_form('decrypt', 'otp', ciphertext='ABC', pad_id=pad_id))
+    assert resp.status_code == 302
+
+def test_text_mode_unknown_algorithm_redirects(client):
+    resp = client.post('/process', data=_text_form('encrypt', 'rot13', plaintext='x'))
+    assert resp.status_code == 302
+
+def _wait_job(client, job_id):
+    webapp.JOBS.get(job_id).wait(10)
+    return client.get(f'/jobs/{job_id}').get_json()
+
+def test_job_encrypt_then_decrypt(client):
+    data = bytes(range(256)) * 300
+    resp = client.post('/jobs', data=_file_form('encrypt', 'permutation', 'seed', 'blob.bin', data),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 202
+    job_id = resp.get_json()['id']
+    state = _wait_job(client, job_id)
+    assert state['status'] == 'done' and state['progress'] == 1.0
+    assert state['bytes_processed'] == state['total_bytes'] == len(data)
+    packed = client.get(f'/jobs/{job_id}/download').data
+    assert ciphers.unpack_encrypted_payload(packed)[1] == ciphers.permutation_encrypt_bytes(data, 'seed')
+
+    resp = client.post('/jobs', data=_file_form('decrypt', 'permutation', 'seed', 'blob.bin.enc', packed),
+                       content_type='multipart/form-data')
+    job_id = resp.get_json()['id']
+    assert _wait_job(client, job_id)['status'] == 'done'
+    download = client.get(f'/jobs/{job_id}/download')
+    assert download.data == data
+    assert 'blob_decrypted.bin' in download.headers['Content-Disposition']
+
+def test_job_errors(client):
+    assert client.get('/jobs/nope').status_code == 404
+    assert client.get('/jobs/nope/download').status_code == 404
+    resp = client.post('/jobs', data=_file_form('encrypt', 'vigenere', 'KEY', 'a.txt', b'abc'),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 400
+    resp = client.post('/jobs', data=_file_form('decrypt', 'shift', '3', 'a.enc', b'not a payload'),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 400
+    resp = client.post('/jobs', data=_file_form('encrypt', 'affine', '2,3', 'a.bin', b'abc'),
+                       content_type='multipart/form-data')
+    assert resp.status_code == 400 and 'coprime' in resp.get_json()['error']
+
+    def fail(job):
+        raise OSError('disk full')
+    job = webapp.JOBS.submit(fail)
+    assert _wait_job(client, job.id)['status'] == 'failed'
+    resp = client.get(f'/jobs/{job.id}/download')
+    assert resp.status_code == 409 and resp.get_json()['error'] == 'disk full'
+
+def test_failed_job_removes_partial_output(client, tmp_path):
+    def chunks():
+        yield b'partial'
+        raise ValueError('cipher failed')
+    with webapp.app.test_request_context():
+        resp, status = webapp._submit_file_job(io.BytesIO(), 'out.bin', b'head', chunks(), None,
+                                               webapp.metrics.RequestTrace('job'))
+    job = _wait_job(client, resp.get_json()['id'])
+    assert status == 202 and job['status'] == 'failed' and job['error'] == 'cipher failed'
+    assert not any(name.endswith('_out.bin') for name in os.listdir(tmp_path))
+
+def test_output_pruning_spares_running_and_finished_jobs(client, tmp_path, monkeypatch):
+    import threading
+    monkeypatch.setitem(webapp.app.config, 'OUTPUT_MAX_BYTES', 30000)
+    monkeypatch.setitem(webapp.app.config, 'PERSIST_OUTPUTS', True)
+    release = threading.Event()
+    def chunks():
+        yield b'x' * 20000
+        release.wait(10)
+        yield b'y' * 20000
+    with webapp.app.test_request_context():
+        resp, _ = webapp._submit_file_job(io.BytesIO(), 'slow.bin', b'', chunks(), None,
+                                          webapp.metrics.RequestTrace('job'))
+    job_id = resp.get_json()['id']
+    for name in ('a.bin', 'b.bin'):  # each persisted request prunes the folder by size
+        client.post('/process', data=_file_form('encrypt', 'shift', '3', name, os.urandom(20000)),
+                    content_type='multipart/form-data')
+        if name == 'a.bin':
+            release.set()
+            assert _wait_job(client, job_id)['status'] == 'done'
+    resp = client.get(f'/jobs/{job_id}/download')
+    assert resp.status_code == 200 and resp.data == b'x' * 20000 + b'y' * 20000
+
+def test_metrics_endpoint_counts_requests(client, monkeypatch, caplog):
+    monkeypatch.setitem(webapp.app.config, 'METRICS_LOG_JSON', True)
+    with caplog.at_level('INFO', logger='cipher.metrics'):
+        resp = client.post('/process', data=_file_form('encrypt', 'affine', '5,8', 'm.bin', b'metrics' * 100),
+                           content_type='multipart/form-data')
+        resp.get_data()
+        resp.close()
+    logged = [json.loads(r.getMessage()) for r in caplog.records if r.name == 'cipher.metrics']
+    entry = [e for e in logged if e['endpoint'] == 'process'][-1]
+    assert entry['algorithm'] == 'affine' and entry['mode'] == 'file' and entry['bytes_in'] == 700
+    assert {'key_setup', 'pack', 'read', 'cipher'} <= set(entry['phases'])
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'cipher_bytes_total{direction="out",algorithm="affine",mode="file"}' in text
+    assert 'cipher_phase_seconds_sum{phase="key_setup",algorithm="affine",mode="file"}' in text
+    assert 'cipher_key_cache_hits' in text
+
+def test_analyze_api(client):
+    ct = ciphers.affine_encrypt_text("Meet me near the old clock tower at seven this evening", '7,3')
+    resp = client.post('/api/v1/analyze', json={'algorithm': 'affine', 'text': ct, 'top': 2, 'preview': 8})
+    body = resp.get_json()
+    assert resp.status_code == 200 and len(body['candidates']) == 2
+    assert body['candidates'][0]['key'] == '7,3' and body['candidates'][0]['plaintext'] == 'MEETMENE'
+    assert client.post('/api/v1/analyze', json={'algorithm': 'hill', 'text': 'X'}).status_code == 400
+    assert client.post('/api/v1/analyze', json={'algorithm': 'shift', 'text': 'X', 'top': 0}).status_code == 400
+    assert client.post('/api/v1/analyze', json={'algorithm': 'shift', 'text': 'X', 'top': 10 ** 6}).status_code == 400
+    assert client.post('/api/v1/analyze', json={'algorithm': ['shift'], 'text': 'X'}).status_code == 400
+    assert client.post('/api/v1/analyze', data='x').status_code == 400
+
+def test_analyze_api_vigenere(client):
+    text = (
+        "It is a truth universally acknowledged, that a single man in possession of a good fortune, "
+        "must be in want of a wife. However little known the feelings or views of such a man may be on "
+        "his first entering a neighbourhood, this truth is so well fixed in the minds of the surrounding "
+        "families, that he is considered the rightful property of some one or other of their daughters. "
+        "My dear Mr. Bennet, said his lady to him one day, have you heard that Netherfield Park is let "
+        "at last? Mr. Bennet replied that he had not. But it is, returned she; for Mrs. Long has just "
+        "been here, and she told me all about it."
+    )
+    ct = ciphers.vigenere_encrypt_text(text, 'LEMON')
+    body = client.post('/api/v1/analyze', json={'algorithm': 'vigenere', 'text': ct, 'top': 1}).get_json()
+    assert body['candidates'][0]['key'] == 'LEMON'
+    assert body['candidates'][0]['plaintext'] == ciphers.normalize_text_for_letters(text)
+    resp = client.post('/api/v1/analyze', json={'algorithm': 'vigenere', 'text': ct, 'key_length': -1})
+    assert resp.status_code == 400
+    resp = client.post('/api/v1/analyze', json={'algorithm': 'vigenere', 'text': 'HELLOWORLDATTACKATDAWN' * 5,
+                                                'key_length': 10 ** 9})
+    assert resp.status_code == 400
+
+@pytest.fixture
+def upload_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(webapp.uploads, 'MIN_UPLOAD_CHUNK_SIZE', 1)
+    store = webapp.uploads.UploadStore(str(tmp_path / 'uploads'))
+    monkeypatch.setattr(webapp, 'UPLOADS', store)
+    return store
+
+def _chunked_upload(client, data, action, algo, key, chunk_size, order=None):
+    resp = client.post('/api/v1/uploads', json={'filename': 'big.bin', 'algorithm': algo, 'key': key,
+                                                'action': action, 'size': len(data), 'chunk_size': chunk_size})
+    assert resp.status_code == 201
+    info = resp.get_json()
+    for n in range(info['chunk_count']) if order is None else order:
+        resp = client.put(f"/api/v1/uploads/{info['id']}/chunks/{n}", data=data[n * chunk_size:(n + 1) * chunk_size])
+        assert resp.status_code == 200
+    return info
+
+@pytest.mark.parametrize("inline_max", [1 << 20, 0])
+def test_chunked_upload_roundtrip(client, upload_store, inline_max, monkeypatch):
+    monkeypatch.setitem(webapp.app.config, 'UPLOAD_INLINE_MAX', inline_max)
+    data = os.urandom(5000)
+    info = _chunked_upload(client, data, 'encrypt', 'permutation', 'pk', 1024, order=[4, 1, 0, 3, 2])
+    resp = client.post(info['finalize_url'])
+    if inline_max:
+        assert resp.status_code == 200 and 'big.bin.enc' in resp.headers['Content-Disposition']
+        encrypted = resp.data
+    else:
+        assert resp.status_code == 202
+        job = _wait_job(client, resp.get_json()['id'])
+        assert job['status'] == 'done'
+        encrypted = client.get(resp.get_json()['download_url']).data
+    assert encrypted.endswith(ciphers.permutation_encrypt_bytes(data, 'pk'))
+    assert client.get(info['status_url']).status_code == 404  # finalized sessions are gone
+    info = _chunked_upload(client, encrypted, 'decrypt', 'permutation', 'pk', 1000)
+    resp = client.post(info['finalize_url'])
+    if not inline_max:
+        job = _wait_job(client, resp.get_json()['id'])
+        assert job['filename'] == 'big_decrypted.bin'
+        resp = client.get(resp.get_json()['download_url'])
+    assert resp.data == data
+
+def test_chunked_upload_resume_and_errors(client, upload_store):
+    data = os.urandom(300)
+    info = _chunked_upload(client, data, 'encrypt', 'shift', '3', 128, order=[0])
+    assert client.get(info['status_url']).get_json()['missing'] == [1, 2]
+    resp = client.post(info['finalize_url'])
+    assert resp.status_code == 400 and resp.get_json()['missing'] == [1, 2]
+    assert client.put(f"/api/v1/uploads/{info['id']}/chunks/1", data=b'short').status_code == 400
+    for n in (1, 2):
+        client.put(f"/api/v1/uploads/{info['id']}/chunks/{n}", data=data[n * 128:(n + 1) * 128])
+    assert client.post(info['finalize_url']).data.endswith(ciphers.shift_encrypt_bytes(data, '3'))
+    assert client.put(f"/api/v1/uploads/{info['id']}/chunks/0", data=data[:128]).status_code == 404
+    resp = client.post('/api/v1/uploads', json={'filename': 'x', 'algorithm': 'vigenere', 'key': 'K', 'size': 1})
+    assert resp.status_code == 400
+    resp = client.post('/api/v1/uploads', json={'filename': 'x', 'algorithm': ['shift'], 'key': '3', 'size': 1})
+    assert resp.status_code == 400
+    info = _chunked_upload(client, b'abc', 'encrypt', 'shift', '3', 128, order=[])
+    assert client.delete(f"/api/v1/uploads/{info['id']}").status_code == 204
+    assert client.get(info['status_url']).status_code == 404
@@ -0,0 +1,61 @@
+# tests/test_batch.py
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from cipher import ciphers, batch, registry
+from cipher.keycache import KEY_CACHE
+
+def test_parse_hill_key_forms():
+    assert ciphers.parse_hill_key("3 3; 2 5") == [[3, 3], [2, 5]]
+    assert ciphers.parse_hill_key("3,3,2,5") == [[3, 3], [2, 5]]
+    assert ciphers.parse_hill_key([3, 3, 2, 5]) == [[3, 3], [2, 5]]
+    assert ciphers.parse_hill_key([[3, 3], [2, 5]]) == [[3, 3], [2, 5]]
+    for bad in ("3 3 2", "a b c d", []):
+        try:
+            ciphers.parse_hill_key(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_compile_text_key_matches_functions():
+    text = "Attack at dawn!"
+    cases = [
+        ('shift', '3', ciphers.shift_encrypt_text),
+        ('substitution', 'QWERTYUIOPASDFGHJKLZXCVBNM', ciphers.substitution_encrypt_text),
+        ('affine', '5,8', ciphers.affine_encrypt_text),
+        ('vigenere', 'LEMON', ciphers.vigenere_encrypt_text),
+        ('permutation', '2,0,1', ciphers.permutation_encrypt_text),
+        ('otp', 'XMCKLQWERTYUIOPASD', ciphers.otp_encrypt_text),
+        ('playfair', 'MONARCHY', ciphers.playfair_encrypt_text),
+    ]
+    for algo, key, fn in cases:
+        assert registry.compile_text_key(algo, key).encrypt(text) == fn(text, key)
+    assert registry.compile_text_key('hill', '3 3 2 5').encrypt(text) == ciphers.hill_encrypt_text(text, [[3, 3], [2, 5]])
+
+def test_run_batch_roundtrip_and_errors():
+    items = [
+        {'algorithm': 'vigenere', 'action': 'encrypt', 'key': 'LEMON', 'text': 'ATTACKATDAWN'},
+        {'algorithm': 'vigenere', 'action': 'decrypt', 'key': 'LEMON', 'text': 'LXFOPVEFRNHR'},
+        {'algorithm': 'hill', 'action': 'encrypt', 'key': [[3, 3], [2, 5]], 'text': 'HELP'},
+        {'algorithm': 'nope', 'key': 'x', 'text': 'a'},
+        {'algorithm': 'affine', 'key': '2,3', 'text': 'a'},
+        {'algorithm': 'shift', 'key': 3},
+        {'algorithm': {'a': 1}, 'key': 'x', 'text': 'a'},
+        {'algorithm': ['shift'], 'key': 'x', 'text': 'a'},
+    ]
+    out = batch.run_batch(items)
+    assert [r['index'] for r in out] == list(range(len(items)))
+    assert out[0] == {'index': 0, 'ok': True, 'result': 'LXFOPVEFRNHR'}
+    assert out[1]['result'] == 'ATTACKATDAWN'
+    assert out[2]['result'] == ciphers.hill_encrypt_text('HELP', [[3, 3], [2, 5]])
+    assert out[3] == {'index': 3, 'ok': False, 'error': 'Unknown algorithm'}
+    assert not out[4]['ok'] and 'coprime' in out[4]['error']
+    assert out[5] == {'index': 5, 'ok': True, 'result': ''}
+    assert out[6]['error'] == out[7]['error'] == 'Unknown algorithm'
+
+def test_run_batch_compiles_each_key_once():
+    KEY_CACHE.clear()
+    items = [{'algorithm': 'shift', 'key': '7', 'text': f'item {i}'} for i in range(50)]
+    out = batch.run_batch(items)
+    assert all(r['ok'] for r in out)
+    assert KEY_CACHE.stats()['misses'] == 1 and KEY_CACHE.stats()['hits'] == 0
@@ -0,0 +1,23 @@
+# tests/test_benchmarks.py
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from benchmarks import run as bench
+
+def test_parse_size():
+    assert bench.parse_size('1K') == 1024
+    assert bench.parse_size('256M') == 256 << 20
+    assert bench.parse_size('4096') == 4096
+
+def test_run_covers_text_and_byte_modes():
+    report = bench.run(['shift', 'hill', 'otp'], [1024], repeat=1, isolate=False)
+    seen = {(r['algorithm'], r['mode'], r['direction']) for r in report['results']}
+    assert ('shift', 'bytes', 'decrypt') in seen and ('hill', 'text', 'decrypt') in seen
+    assert not any(r['algorithm'] == 'hill' and r['mode'] == 'bytes' for r in report['results'])
+    for row in report['results']:
+        assert row['size'] == 1024 and row['mb_per_s'] > 0 and row['key_setup_s'] >= 0
+
+def test_compare_flags_slower_cases():
+    old = {'results': [{'algorithm': 'shift', 'mode': 'text', 'direction': 'encrypt', 'size': 1, 'mb_per_s': 100.0}]}
+    new = {'results': [{'algorithm': 'shift', 'mode': 'text', 'direction': 'encrypt', 'size': 1, 'mb_per_s': 50.0}]}
+    assert [ratio for _, _, ratio in bench.compare(old, new)] == [0.5]
+    assert bench.compare(old, old) == []
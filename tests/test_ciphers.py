@@ -5,6 +5,7 @@ import pytest
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from cipher import ciphers
 import string
+import math
 
 # --- Text-based ciphers ---
 def test_shift_text_roundtrip():
@@ -104,6 +105,20 @@ def test_otp_wrong_key_length():
     with pytest.raises(ValueError):
         ciphers.otp_encrypt_text(pt, bad_key)
 
+def test_letters_without_single_uppercase_are_rejected():
+    # 'ß'.upper() == 'SS': a clear ValueError, not a TypeError from ord()
+    with pytest.raises(ValueError, match="single-letter uppercase"):
+        ciphers.vigenere_encrypt_text("HELLO", "KEYß")
+    with pytest.raises(ValueError, match="single-letter uppercase"):
+        ciphers.otp_encrypt_text("HI", "ABCDEFß")
+    with pytest.raises(ValueError, match="single-letter uppercase"):
+        ciphers.otp_encrypt_text("straße", "XMCKLXMCKL")
+    assert ciphers.vigenere_encrypt_text("héllo", "KÉY") == ciphers.vigenere_encrypt_text("héllo", "KÉY".lower())
+
+@pytest.mark.parametrize("text", ["Attack at dawn! 123", string.printable, "Straße über", ""])
+def test_normalize_text_ascii_fast_path(text):
+    assert ciphers.normalize_text_for_letters(text) == ''.join(c for c in text.upper() if c.isalpha())
+
 def test_playfair_example():
     plaintext = "INSTRUMENTS"
     key = "MONARCHY"
@@ -181,4 +196,258 @@ def test_otp_bytes_exact_length():
     key = "ABCDEF"  # exactly 6 chars = 6 bytes
     c = ciphers.otp_encrypt_text(pt.decode(), key)
     d = ciphers.otp_decrypt_text(c, key)
-    assert d == pt.decode()
\ No newline at end of file
+    assert d == pt.decode()
+# --- Byte table engine ---
+def test_byte_tables_match_reference():
+    data = bytes(range(256)) * 4
+    assert ciphers.shift_encrypt_bytes(data, "300") == bytes([(b + 300) % 256 for b in data])
+    assert ciphers.shift_decrypt_bytes(data, "-7") == bytes([(b + 7) % 256 for b in data])
+    assert ciphers.affine_encrypt_bytes(data, "5,7") == bytes([(5 * b + 7) % 256 for b in data])
+    inva = ciphers.modinv(5, 256)
+    assert ciphers.affine_decrypt_bytes(data, "5,7") == bytes([(inva * (b - 7)) % 256 for b in data])
+    table = ciphers.make_byte_subst_from_key("k")
+    assert ciphers.substitution_encrypt_bytes(data, "k") == bytes([table[b] for b in data])
+
+def test_byte_ciphers_accept_memoryview():
+    data = bytearray(b"memoryview input")
+    c = ciphers.shift_encrypt_bytes(memoryview(data), "3")
+    assert isinstance(c, bytes)
+    assert ciphers.shift_decrypt_bytes(c, "3") == bytes(data)
+
+def _legacy_permutation_mask(key, n):
+    import hashlib
+    import numpy as np
+    seed = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big") % (2**32)
+    return np.random.RandomState(seed).randint(0, 256, size=n, dtype=np.uint8)
+
+def test_permutation_bytes_matches_legacy_mask():
+    data = os.urandom(10007)
+    mask = _legacy_permutation_mask("permkey", len(data))
+    expected = bytes(b ^ int(m) for b, m in zip(data, mask))
+    assert ciphers.permutation_encrypt_bytes(data, "permkey") == expected
+
+def test_permutation_keystream_chunks_and_seek():
+    data = os.urandom(5000)
+    expected = ciphers.permutation_encrypt_bytes(data, "k")
+    ks = ciphers.PermutationKeystream("k", chunk_size=8)
+    parts = [ks.xor(data[i:i+333]) for i in range(0, len(data), 333)]
+    assert b''.join(parts) == expected
+    for offset in (0, 1, 3, 4, 1234):
+        ks = ciphers.PermutationKeystream("k", offset=offset)
+        assert ks.xor(data[offset:offset+100]) == expected[offset:offset+100]
+
+# --- Streaming file mode ---
+@pytest.mark.parametrize("algo,key", [("shift", "7"), ("substitution", "k"), ("affine", "5,7"), ("permutation", "k")])
+def test_byte_stream_cipher_matches_one_shot(algo, key):
+    import io
+    data = os.urandom(10001)
+    enc = b''.join(ciphers.transform_stream(io.BytesIO(data), ciphers.byte_stream_cipher(algo, key), chunk_size=999))
+    assert enc == getattr(ciphers, f"{algo}_encrypt_bytes")(data, key)
+    dec = b''.join(ciphers.transform_stream(io.BytesIO(enc), ciphers.byte_stream_cipher(algo, key, decrypt=True), chunk_size=64))
+    assert dec == data
+
+def test_read_encrypted_payload_header_stream():
+    import io
+    packed = ciphers.pack_encrypted_payload("photo.jpg", b"body-bytes")
+    src = io.BytesIO(packed)
+    name, leftover = ciphers.read_encrypted_payload_header(src, chunk_size=4)
+    assert name == "photo.jpg"
+    assert leftover + src.read() == b"body-bytes"
+    with pytest.raises(ValueError):
+        ciphers.read_encrypted_payload_header(io.BytesIO(b"not a payload"))
+
+def _hill_reference_encrypt(pt, key):
+    n = len(key)
+    pt = ciphers.normalize_text_for_letters(pt)
+    pt += 'X' * (-len(pt) % n)
+    out = ''
+    for i in range(0, len(pt), n):
+        vec = [string.ascii_uppercase.index(c) for c in pt[i:i+n]]
+        out += ''.join(string.ascii_uppercase[sum(k * v for k, v in zip(row, vec)) % 26] for row in key)
+    return out
+
+@pytest.mark.parametrize("key", [[[3, 3], [2, 5]], [[6, 24, 1], [13, 16, 10], [20, 17, 15]]])
+def test_hill_matches_reference(key):
+    pt = "The quick brown fox jumps over the lazy dog, 42 times!"
+    c = ciphers.hill_encrypt_text(pt, key)
+    assert c == _hill_reference_encrypt(pt, key)
+    d = ciphers.hill_decrypt_text(c, key)
+    assert d.startswith(ciphers.normalize_text_for_letters(pt))
+
+def test_hill_decrypt_rejects_partial_block():
+    with pytest.raises(ValueError):
+        ciphers.hill_decrypt_text("ABC", [[3, 3], [2, 5]])
+
+# --- Compiled letter ciphers ---
+def test_monoalphabetic_matches_reference():
+    pt = "Hello, World! The 5 boxing wizards jump quickly. Straße"
+    norm = ciphers.normalize_text_for_letters(pt)
+    A = string.ascii_uppercase
+    assert ciphers.shift_encrypt_text(pt, "29") == ''.join(A[(A.index(c) + 3) % 26] for c in norm)
+    assert ciphers.affine_encrypt_text(pt, "5,8") == ''.join(A[(5 * A.index(c) + 8) % 26] for c in norm)
+    key = "QWERTYUIOPASDFGHJKLZXCVBNM"
+    assert ciphers.substitution_encrypt_text(pt.encode('ascii', 'ignore').decode(), key.lower()) == \
+        ''.join(key[A.index(c)] for c in ciphers.normalize_text_for_letters(pt.encode('ascii', 'ignore').decode()))
+
+def test_monoalphabetic_decrypt_rejects_non_letters():
+    with pytest.raises(ValueError):
+        ciphers.shift_decrypt_text("ABC DEF", "3")
+    with pytest.raises(ValueError):
+        ciphers.affine_decrypt_text("abc", "5,8")
+
+# --- Vectorized Vigenere / OTP ---
+def _vigenere_reference(text, key, sign):
+    kl = [ch.upper() for ch in key if ch.isalpha()]
+    out = []
+    for i, ch in enumerate(c for c in text if c.isalpha()):
+        base = ord('A') if ch.isupper() else ord('a')
+        out.append(chr((ord(ch) - base + sign * (ord(kl[i % len(kl)]) - ord('A'))) % 26 + base))
+    return ''.join(out)
+
+def _otp_reference(text, keytext, sign):
+    kl = [ch.upper() for ch in keytext if ch.isalpha()]
+    out = []
+    for i, ch in enumerate(c for c in text if c.isalpha()):
+        r = chr((ord(ch.upper()) - ord('A') + sign * (ord(kl[i]) - ord('A'))) % 26 + ord('A'))
+        out.append(r.lower() if ch.islower() else r)
+    return ''.join(out)
+
+@pytest.mark.parametrize("text", ["Hello, World! 123 [zZ]`{@", "Crème brûlée façade", ""])
+def test_vigenere_otp_match_reference(text):
+    assert ciphers.vigenere_encrypt_text(text, "Lemon-Key") == _vigenere_reference(text, "Lemon-Key", 1)
+    assert ciphers.vigenere_decrypt_text(text, "Lemon-Key") == _vigenere_reference(text, "Lemon-Key", -1)
+    pad = "xmckl qwerty asdfgh zxcvbn poiuyt " * 3
+    assert ciphers.otp_encrypt_text(text, pad) == _otp_reference(text, pad, 1)
+    assert ciphers.otp_decrypt_text(text, pad) == _otp_reference(text, pad, -1)
+
+# --- Compiled Playfair ---
+def test_playfair_matches_previous_implementation():
+    import random as rnd
+    rnd.seed(1)
+    pf = ciphers.compile_playfair_key("Playfair example, with J")
+    assert pf.position[pf.table[2][3]] == (2, 3)
+    assert len(pf.encrypt_pairs) == 25 * 25
+    for _ in range(20):
+        pt = ''.join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ xx") for _ in range(rnd.randint(0, 40)))
+        c = ciphers.playfair_encrypt_text(pt, "Playfair example, with J")
+        assert ciphers.playfair_decrypt_text(c, "Playfair example, with J").replace('X', '') == \
+            pt.upper().replace(' ', '').replace('J', 'I').replace('X', '')
+
+def test_playfair_double_letters_and_odd_ciphertext():
+    assert ciphers.playfair_encrypt_text("balloon", "MONARCHY") == "IBSUPMNA"
+    with pytest.raises(ValueError):
+        ciphers.playfair_decrypt_text("ABC", "MONARCHY")
+
+def test_permutation_keystream_seek_forward_and_back():
+    data = os.urandom(4000)
+    expected = ciphers.permutation_encrypt_bytes(data, "k")
+    ks = ciphers.PermutationKeystream("k")
+    for offset in (5, 6, 100, 2001, 3, 0, 3999):
+        ks.seek(offset)
+        assert ks.xor(data[offset:offset+7]) == expected[offset:offset+7]
+
+# --- Streaming text mode ---
+_STREAM_KEYS = [("shift", "3"), ("affine", "5,8"), ("substitution", "QWERTYUIOPASDFGHJKLZXCVBNM"),
+                ("vigenere", "LEMON"), ("hill", "3 3 2 5"), ("hill", "6 24 1 13 16 10 20 17 15"),
+                ("permutation", "2,0,1,3"), ("playfair", "MONARCHY")]
+
+def _stream_all(stream, text, sizes):
+    out, i, n = [], 0, 0
+    while i < len(text):
+        out.append(stream.update(text[i:i + sizes[n % len(sizes)]]))
+        i += sizes[n % len(sizes)]
+        n += 1
+    out.append(stream.finalize())
+    return ''.join(out)
+
+@pytest.mark.parametrize("algo,key", _STREAM_KEYS + [("otp", "Q" * 2000)])
+@pytest.mark.parametrize("sizes", [[1], [2, 3, 7], [1000]])
+def test_text_stream_matches_one_shot(algo, key, sizes):
+    from cipher import registry
+    rnd = random.Random(7)
+    text = ' '.join(rnd.choice(["balloon", "coffee", "the", "xx", "aa", "Zebra,", "jj"]) for _ in range(200))
+    spec = registry.get(algo)
+    compiled = spec.text_key(key)
+    expected = compiled.encrypt(text)
+    assert _stream_all(spec.text_stream_cipher(key), text, sizes) == expected
+    # ciphertext split across lines, as in a downloaded file
+    wrapped = '\n'.join(expected[i:i + 61] for i in range(0, len(expected), 61))
+    assert _stream_all(spec.text_stream_cipher(key, decrypt=True), wrapped, sizes) == compiled.decrypt(expected)
+
+def test_text_stream_errors_match_one_shot():
+    from cipher import registry
+    with pytest.raises(ValueError):
+        _stream_all(registry.get("otp").text_stream_cipher("ABCDE"), "HELLO WORLD", [3])
+    with pytest.raises(ValueError):
+        _stream_all(registry.get("hill").text_stream_cipher("3 3 2 5", decrypt=True), "ABC", [1])
+    with pytest.raises(ValueError):
+        _stream_all(registry.get("playfair").text_stream_cipher("MONARCHY", decrypt=True), "ABC", [2])
+
+# --- Chunk-parallel byte ciphers ---
+@pytest.mark.parametrize("algo,key", [("shift", "9"), ("substitution", "k"), ("affine", "5,8")])
+def test_parallel_matches_serial(algo, key, monkeypatch):
+    from cipher import parallel
+    monkeypatch.setattr(parallel, 'MIN_SPAN', 1000)
+    data = os.urandom(50001)
+    expected = getattr(ciphers, f"{algo}_encrypt_bytes")(data, key)
+    assert parallel.transform_bytes(data, algo, key, workers=4, threshold=0) == expected
+    stream = parallel.ParallelByteCipher(algo, key, workers=3)
+    assert b''.join(stream.update(data[i:i+7777]) for i in range(0, len(data), 7777)) == expected
+    dec = parallel.ParallelByteCipher(algo, key, decrypt=True, workers=3)
+    assert dec.update(expected) == data
+
+def test_keystream_ciphers_stay_serial():
+    from cipher import parallel
+    data = os.urandom(5000)
+    cipher = parallel.stream_cipher("permutation", "k", size=1 << 40, workers=4, threshold=0)
+    assert not isinstance(cipher, parallel.ParallelByteCipher)
+    assert parallel.transform_bytes(data, "permutation", "k", workers=4, threshold=0) == \
+        ciphers.permutation_encrypt_bytes(data, "k")
+    with pytest.raises(ValueError):
+        parallel.ParallelByteCipher("permutation", "k")
+
+def test_parallel_path_is_opt_in():
+    from cipher import parallel
+    cipher = parallel.stream_cipher("affine", "5,8", size=1 << 40, workers=4)
+    assert not isinstance(cipher, parallel.ParallelByteCipher)
+    assert isinstance(parallel.stream_cipher("affine", "5,8", size=1 << 40, workers=4, threshold=1 << 30),
+                      parallel.ParallelByteCipher)
+
+# --- Memory-mapped payloads ---
+def test_mapped_payload_zero_copy_body(tmp_path):
+    body = os.urandom(10000)
+    path = tmp_path / "x.enc"
+    path.write_bytes(ciphers.pack_encrypted_payload("x.bin", body))
+    with ciphers.MappedPayload(str(path)) as payload:
+        assert payload.filename == "x.bin"
+        assert isinstance(payload.body, memoryview)
+        assert b''.join(bytes(v) for v in payload.chunks(999)) == body
+    path.write_bytes(b"no header here")
+    with pytest.raises(ValueError):
+        ciphers.MappedPayload(str(path))
+
+def test_hill_inverse_mod26_matches_brute_force():
+    import itertools
+    import numpy as np
+    for key in ([[3, 3], [2, 5]], [[6, 24, 1], [13, 16, 10], [20, 17, 15]], [[1, 2, 0], [0, 1, 4], [5, 6, 1]]):
+        inv = np.array(ciphers.hill_inverse_mod26(key))
+        assert ((np.array(key) @ inv) % 26 == np.eye(len(key), dtype=int)).all()
+    # every invertible 2x2 key agrees with the adjugate formula
+    for a, b, c, d in itertools.islice(itertools.product(range(26), repeat=4), 0, 26 ** 4, 97):
+        det = (a * d - b * c) % 26
+        if math.gcd(det, 26) != 1:
+            with pytest.raises(ValueError):
+                ciphers.hill_inverse_mod26([[a, b], [c, d]])
+            continue
+        di = pow(det, -1, 26)
+        assert ciphers.hill_inverse_mod26([[a, b], [c, d]]) == [[d * di % 26, -b * di % 26], [-c * di % 26, a * di % 26]]
+
+def test_import_does_not_load_numpy_or_sympy():
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, app; print('numpy' in sys.modules, 'sympy' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ['False', 'False']
+    code = "import sys; from cipher import ciphers; print(ciphers.vigenere_encrypt_text('abc', 'B'), 'numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ['bcd', 'True']
@@ -0,0 +1,90 @@
+# tests/test_cli.py
+import io
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, container, cli
+
+def test_encrypt_file_matches_packed_payload(tmp_path):
+    data = bytes(range(256)) * 50
+    src = tmp_path / 'photo.jpg'
+    src.write_bytes(data)
+    assert cli.main(['encrypt', '-a', 'affine', '-k', '5,8', '-q', str(src)]) == 0
+    packed = (tmp_path / 'photo.jpg.enc').read_bytes()
+    assert packed == ciphers.pack_encrypted_payload('photo.jpg', ciphers.affine_encrypt_bytes(data, '5,8'))
+
+    assert cli.main(['encrypt', '-a', 'affine', '-k', '5,8', '-q', '--format', '2', str(src), '-o', str(tmp_path / 'v2')]) == 0
+    info, body = container.unpack_payload((tmp_path / 'v2').read_bytes())
+    assert info.algorithm == 'affine' and info.filename == 'photo.jpg'
+    assert body == ciphers.affine_encrypt_bytes(data, '5,8')
+
+def test_directory_roundtrip_with_worker_pool(tmp_path, capsys):
+    tree = {'a.bin': os.urandom(5000), os.path.join('sub', 'b.txt'): b'hello', os.path.join('sub', 'deep', 'c'): b''}
+    for rel, data in tree.items():
+        path = tmp_path / 'in' / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    args = ['-a', 'permutation', '-k', 'seed', '-j', '3']
+    assert cli.main(['encrypt', str(tmp_path / 'in'), '-o', str(tmp_path / 'enc')] + args) == 0
+    assert cli.main(['decrypt', str(tmp_path / 'enc'), '-o', str(tmp_path / 'dec')] + args) == 0
+    for rel, data in tree.items():
+        assert (tmp_path / 'enc' / (rel + '.enc')).exists()
+        assert (tmp_path / 'dec' / rel).read_bytes() == data
+    assert 'MB/s' in capsys.readouterr().err
+
+def test_parallel_threshold_option(tmp_path):
+    data = os.urandom(5000)
+    src = tmp_path / 'big.bin'
+    src.write_bytes(data)
+    assert cli.main(['encrypt', '-a', 'substitution', '-k', 'k', '-q', '--threads', '2',
+                     '--parallel-threshold', '1000', str(src)]) == 0
+    packed = (tmp_path / 'big.bin.enc').read_bytes()
+    assert packed == ciphers.pack_encrypted_payload('big.bin', ciphers.substitution_encrypt_bytes(data, 'k'))
+
+def test_decrypt_errors_are_reported(tmp_path, capsys):
+    bad = tmp_path / 'bad.enc'
+    bad.write_bytes(b'not a payload')
+    assert cli.main(['decrypt', '-a', 'shift', '-k', '3', str(bad)]) == 1
+    assert 'not in encrypted format' in capsys.readouterr().err
+    assert not (tmp_path / 'bad').exists()
+
+def test_existing_outputs_need_force(tmp_path, capsys):
+    src = tmp_path / 'notes.txt'
+    src.write_bytes(b'original')
+    args = ['-a', 'shift', '-k', '3', '-q']
+    assert cli.main(['encrypt', str(src)] + args) == 0
+    # decrypting notes.txt.enc would land on notes.txt: refused, original intact
+    assert cli.main(['decrypt', str(tmp_path / 'notes.txt.enc')] + args) == 1
+    assert 'already exists' in capsys.readouterr().err
+    assert src.read_bytes() == b'original'
+    # a failing run with --force must not remove the file it would replace
+    (tmp_path / 'bad.enc').write_bytes(b'not a payload')
+    (tmp_path / 'bad').write_bytes(b'keep me')
+    assert cli.main(['decrypt', '--force', str(tmp_path / 'bad.enc')] + args) == 1
+    assert (tmp_path / 'bad').read_bytes() == b'keep me'
+    assert cli.main(['decrypt', '--force', str(tmp_path / 'notes.txt.enc')] + args) == 0
+    assert src.read_bytes() == b'original'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['bad', 'bad.enc', 'notes.txt', 'notes.txt.enc']
+
+def test_stdin_to_stdout(monkeypatch, capsysbinary):
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(b'abc')))
+    assert cli.main(['encrypt', '-a', 'shift', '-k', '3', '-q', '--name', 'x.txt']) == 0
+    assert capsysbinary.readouterr().out == ciphers.pack_encrypted_payload('x.txt', ciphers.shift_encrypt_bytes(b'abc', '3'))
+
+def test_text_only_algorithm(tmp_path, capsys):
+    src = tmp_path / 'msg.txt'
+    src.write_text('attack at dawn')
+    assert cli.main(['encrypt', '-a', 'vigenere', '-k', 'LEMON', '-q', str(src), '-o', '-']) == 0
+    assert capsys.readouterr().out.strip() == ciphers.vigenere_encrypt_text('attack at dawn', 'LEMON')
+
+def test_text_files_are_streamed_with_text_names(tmp_path):
+    text = 'attack at dawn, retreat at dusk! ' * 40
+    (tmp_path / 'msg.txt').write_text(text)
+    args = ['-a', 'vigenere', '-k', 'LEMON', '-q', '--chunk-size', '7']
+    assert cli.main(['encrypt', str(tmp_path / 'msg.txt')] + args) == 0
+    enc = (tmp_path / 'msg_encrypted.txt').read_text()
+    assert enc == ciphers.vigenere_encrypt_text(text, 'LEMON')
+    assert cli.main(['decrypt', str(tmp_path / 'msg_encrypted.txt')] + args) == 0
+    assert (tmp_path / 'msg_decrypted.txt').read_text() == ciphers.vigenere_decrypt_text(enc, 'LEMON')
+    assert cli.main(['encrypt', str(tmp_path / 'msg.txt'), '-a', 'hill', '-k', '3,3,2,5', '-q', '--force',
+                     '--chunk-size', '5']) == 0
+    assert (tmp_path / 'msg_encrypted.txt').read_text() == ciphers.hill_encrypt_text(text, [[3, 3], [2, 5]])
@@ -0,0 +1,48 @@
+# tests/test_container.py
+import io
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, container
+
+def test_container_roundtrip_and_chunk_index():
+    body = os.urandom(2500)
+    packed = container.pack_container("report.pdf", "shift", body, chunk_size=1000)
+    assert packed.startswith(container.MAGIC)
+    info, data = container.unpack_payload(packed)
+    assert (info.version, info.filename, info.algorithm, info.size) == (2, "report.pdf", "shift", 2500)
+    assert info.chunk_offsets == [0, 1000, 2000]
+    assert info.chunk_range(2) == (2000, 2500)
+    assert data == body
+    start, stop = info.chunk_range(1)
+    assert packed[info.body_offset + start:info.body_offset + stop] == body[1000:2000]
+
+def test_legacy_payloads_still_read():
+    packed = ciphers.pack_encrypted_payload("old.txt", b"legacy body")
+    info, data = container.unpack_payload(packed)
+    assert (info.version, info.filename, info.algorithm) == (1, "old.txt", None)
+    assert data == b"legacy body"
+    info, leftover = container.read_payload_header(io.BytesIO(packed))
+    assert info.filename == "old.txt" and leftover == b"legacy body"
+
+def test_read_payload_header_stream_v2():
+    packed = container.pack_container("a.bin", "permutation", b"x" * 10, chunk_size=4)
+    src = io.BytesIO(packed)
+    info, leftover = container.read_payload_header(src)
+    assert leftover == b''
+    assert src.read() == b"x" * 10
+    assert info.chunk_offsets == [0, 4, 8]
+
+def test_mapped_payload_reads_v2(tmp_path):
+    path = tmp_path / "v2.enc"
+    path.write_bytes(container.pack_container("v2.bin", "affine", b"abcdef"))
+    with ciphers.MappedPayload(str(path)) as payload:
+        assert payload.info.algorithm == "affine"
+        assert bytes(payload.body) == b"abcdef"
+
+def test_truncated_container_rejected():
+    packed = container.pack_container("a.bin", "shift", b"0123456789")
+    with pytest.raises(ValueError):
+        container.unpack_payload(packed[:-1])
+    with pytest.raises(ValueError):
+        container.read_payload_header(io.BytesIO(packed[:14]))
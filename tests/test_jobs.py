@@ -0,0 +1,44 @@
+# tests/test_jobs.py
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import jobs
+
+def test_job_reports_progress_and_result(tmp_path):
+    queue = jobs.JobQueue(workers=1)
+
+    def work(job):
+        for _ in range(4):
+            job.advance(25)
+        return str(tmp_path / 'out')
+
+    job = queue.submit(work, total=100, filename='out')
+    assert job.wait(5)
+    state = queue.get(job.id).to_dict()
+    assert state['status'] == jobs.DONE
+    assert state['progress'] == 1.0 and state['bytes_processed'] == 100
+    assert job.path == str(tmp_path / 'out')
+
+def test_failed_job_keeps_error():
+    queue = jobs.JobQueue(workers=1)
+
+    def work(job):
+        raise ValueError('bad key')
+
+    job = queue.submit(work)
+    job.wait(5)
+    assert job.status == jobs.FAILED and job.to_dict()['error'] == 'bad key'
+
+def test_finished_jobs_are_pruned():
+    queue = jobs.JobQueue(workers=1, max_jobs=2)
+    done = [queue.submit(lambda job: None) for _ in range(3)]
+    for job in done:
+        job.wait(5)
+    queue.submit(lambda job: None).wait(5)
+    assert queue.get(done[0].id) is None
+
+def test_worker_count_is_read_on_first_submit():
+    config = {'workers': 1}
+    queue = jobs.JobQueue(lambda: config['workers'])
+    config['workers'] = 3
+    queue.submit(lambda job: None).wait(5)
+    assert queue._pool._max_workers == 3
@@ -0,0 +1,62 @@
+# tests/test_keycache.py
+import sys, os
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers
+from cipher.keycache import KeyCache, KEY_CACHE
+
+def test_hits_misses_and_lru_eviction():
+    cache = KeyCache(maxsize=2)
+    calls = []
+    def factory(key):
+        calls.append(key)
+        return key.upper()
+    assert cache.get('algo', 'a', factory) == 'A'
+    assert cache.get('algo', 'a', factory) == 'A'
+    cache.get('algo', 'b', factory)
+    cache.get('algo', 'a', factory)       # refresh 'a'
+    cache.get('algo', 'c', factory)       # evicts 'b'
+    cache.get('algo', 'b', factory)
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats() == {'hits': 2, 'misses': 4, 'size': 2, 'maxsize': 2}
+
+def test_entries_are_stored_under_a_digest():
+    cache = KeyCache()
+    cache.get('vigenere', 'TOPSECRET', lambda k: object())
+    assert all(isinstance(k, bytes) and b'TOPSECRET' not in k for k in cache._entries)
+    # same key under another algorithm is a different entry
+    cache.get('playfair', 'TOPSECRET', lambda k: object())
+    assert cache.stats()['size'] == 2
+
+def test_invalid_keys_are_not_cached():
+    cache = KeyCache()
+    def factory(key):
+        raise ValueError("bad key")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get('algo', 'x', factory)
+    assert cache.stats()['size'] == 0
+
+def test_repeated_cipher_calls_skip_key_setup():
+    KEY_CACHE.clear()
+    ciphers.substitution_encrypt_bytes(b"data", "shared key")
+    ciphers.substitution_decrypt_bytes(b"data", "shared key")
+    ciphers.playfair_encrypt_text("HELLO", "MONARCHY")
+    ciphers.playfair_decrypt_text("CFSUPM", "MONARCHY")
+    assert KEY_CACHE.stats()['misses'] == 2
+    assert KEY_CACHE.stats()['hits'] == 2
+
+def test_concurrent_access():
+    cache = KeyCache(maxsize=8)
+    def worker():
+        for i in range(200):
+            cache.get('algo', str(i % 16), lambda k: int(k))
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 800
+    assert stats['size'] <= 8
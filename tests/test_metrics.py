@@ -0,0 +1,39 @@
+# tests/test_metrics.py
+import io
+import json
+import logging
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, metrics
+
+def test_trace_records_phases_and_bytes():
+    m = metrics.Metrics()
+    trace = metrics.RequestTrace('process', metrics=m)
+    trace.label('shift', 'file')
+    cipher = ciphers.byte_stream_cipher('shift', '3')
+    out = b''.join(trace.transform(io.BytesIO(b'x' * 1000), cipher, 300, head=b'ab'))
+    assert out == ciphers.shift_encrypt_bytes(b'ab' + b'x' * 1000, '3')
+    assert trace.bytes_in == trace.bytes_out == 1002
+    assert set(trace.phases) == {'read', 'cipher'}
+    trace.finish(200)
+    text = m.render([('cipher_key_cache_size', 'Cached keys.', 4)])
+    assert 'cipher_bytes_total{direction="in",algorithm="shift",mode="file"} 1002' in text
+    assert 'cipher_phase_seconds_count{phase="cipher",algorithm="shift",mode="file"} 5' in text
+    assert 'cipher_request_seconds_count{endpoint="process",status="200"} 1' in text
+    assert 'cipher_key_cache_size 4' in text
+
+def test_trace_logs_json_once(caplog):
+    trace = metrics.RequestTrace('batch', metrics=metrics.Metrics(), log_json=True)
+    with trace.phase('cipher'):
+        pass
+    with caplog.at_level(logging.INFO, logger='cipher.metrics'):
+        trace.finish(200)
+        trace.finish(200)
+    assert len(caplog.records) == 1
+    entry = json.loads(caplog.records[0].getMessage())
+    assert entry['endpoint'] == 'batch' and entry['status'] == 200 and 'cipher' in entry['phases']
+
+def test_label_values_are_escaped():
+    m = metrics.Metrics()
+    m.add_bytes('in', 'a"b', 'text', 1)
+    assert 'algorithm="a\\"b"' in m.render()
@@ -0,0 +1,94 @@
+# tests/test_pads.py
+import io
+import sys, os
+import threading
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, pads
+
+PAD_TEXT = "Xmck lqwe-rtya sdfg\nhzxc vbnp oiuy tmnb " * 50
+
+@pytest.fixture
+def store(tmp_path):
+    s = pads.PadStore(str(tmp_path))
+    yield s
+    s.close()
+
+def test_create_keeps_only_letters(store):
+    info = store.create(io.BytesIO(PAD_TEXT.encode()), chunk_size=7)
+    letters = ''.join(ch for ch in PAD_TEXT.upper() if ch.isalpha())
+    assert info['size'] == len(letters) and info['offset'] == 0 and info['remaining'] == len(letters)
+    assert store.letters(info['id'], 3, 10) == letters[3:13].encode()
+    with pytest.raises(ValueError):
+        store.create(io.BytesIO(b'123 456'))
+    assert sorted(os.listdir(store.folder)) == sorted([info['id'] + '.pad', info['id'] + '.offset'])
+
+def test_encrypt_consumes_fresh_letters(store):
+    pad_id = store.create(io.BytesIO(PAD_TEXT.encode()))['id']
+    letters = ''.join(ch for ch in PAD_TEXT if ch.isalpha())
+    c1, o1 = store.encrypt(pad_id, "Attack at dawn!")
+    c2, o2 = store.encrypt(pad_id, "Hold")
+    assert (o1, o2) == (0, 12)
+    assert c1 == ciphers.otp_encrypt_text("Attack at dawn!", letters)
+    assert c2 == ciphers.otp_encrypt_text("Hold", letters[12:])
+    assert store.decrypt(pad_id, c1, o1) == "Attackatdawn" and store.decrypt(pad_id, c2, o2) == "Hold"
+    assert store.info(pad_id)['offset'] == 16
+
+def test_offset_persists_and_pad_is_never_reused(store, tmp_path):
+    pad_id = store.create(io.BytesIO(b'ABCDEFGHIJ'))['id']
+    store.encrypt(pad_id, "HELLO")
+    reopened = pads.PadStore(str(tmp_path))
+    assert reopened.info(pad_id)['offset'] == 5
+    with pytest.raises(ValueError):
+        reopened.encrypt(pad_id, "SIXSIX")  # 6 letters, 5 left: nothing is consumed
+    assert reopened.encrypt(pad_id, "WORLD")[1] == 5
+    with pytest.raises(ValueError):
+        reopened.encrypt(pad_id, "X")
+    reopened.close()
+
+def test_concurrent_reservations_do_not_overlap(store):
+    pad_id = store.create(io.BytesIO(b'A' * 8000))['id']
+    starts = []
+    def worker():
+        for _ in range(50):
+            starts.append(store.reserve(pad_id, 10))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(starts) == list(range(0, 4000, 10))
+    assert store.info(pad_id)['offset'] == 4000
+
+def test_unknown_or_malformed_ids(store):
+    with pytest.raises(KeyError):
+        store.info('0' * 32)
+    with pytest.raises(KeyError):
+        store.encrypt('../etc/passwd', 'x')
+    pad_id = store.create(io.BytesIO(b'ABC'))['id']
+    with pytest.raises(ValueError):
+        store.decrypt(pad_id, 'ABCD', 0)
+
+def test_decrypt_cannot_read_unused_pad_letters(store):
+    pad_id = store.create(io.BytesIO(b'ABCDEFGHIJ'))['id']
+    with pytest.raises(ValueError):
+        store.decrypt(pad_id, 'AAAAA', 0)
+    ciphertext, start = store.encrypt(pad_id, 'HELLO')
+    assert store.decrypt(pad_id, ciphertext, start) == 'HELLO'
+    with pytest.raises(ValueError):
+        store.decrypt(pad_id, 'AA', 4)  # letter 5 is still unused
+
+def test_open_maps_are_bounded(tmp_path):
+    store = pads.PadStore(str(tmp_path), max_open=2)
+    ids = [store.create(io.BytesIO(b'ABCDEF'))['id'] for _ in range(4)]
+    for pad_id in ids + ids[:1]:
+        assert store.letters(pad_id, 1, 2) == b'BC'
+    assert list(store._maps) == [ids[3], ids[0]]
+    store.close()
+
+def test_reservations_on_other_pads_do_not_wait(store):
+    a, b = (store.create(io.BytesIO(b'ABCDEF'))['id'] for _ in range(2))
+    with store._pad_lock(a):
+        done = threading.Event()
+        threading.Thread(target=lambda: (store.reserve(b, 1), store.letters(a, 0, 1), done.set())).start()
+        assert done.wait(5)
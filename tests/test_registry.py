@@ -0,0 +1,26 @@
+# tests/test_registry.py
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import ciphers, registry
+
+def test_registry_lists_every_algorithm():
+    assert registry.names() == ('shift', 'substitution', 'affine', 'vigenere', 'hill', 'permutation', 'otp', 'playfair')
+    assert registry.byte_algorithms() == ('shift', 'substitution', 'affine', 'permutation')
+    assert registry.get('hill').mode == 'text' and registry.get('shift').mode == 'both'
+    assert registry.get('affine').position_independent and not registry.get('permutation').position_independent
+    with pytest.raises(ValueError):
+        registry.get('rot13')
+
+@pytest.mark.parametrize('algo', ['vigenere', 'hill', 'otp', 'playfair'])
+def test_text_only_algorithms_reject_byte_mode(algo):
+    with pytest.raises(ValueError, match='file/binary mode'):
+        ciphers.byte_stream_cipher(algo, 'KEY')
+
+def test_byte_cipher_offset_matches_stream_tail():
+    data = bytes(range(256)) * 40
+    for algo, key in [('shift', '5'), ('permutation', 'seed')]:
+        spec = registry.get(algo)
+        assert spec.seekable
+        full = spec.byte_stream_cipher(key).update(data)
+        assert spec.byte_stream_cipher(key, offset=1000).update(data[1000:]) == full[1000:]
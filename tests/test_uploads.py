@@ -0,0 +1,102 @@
+# tests/test_uploads.py
+import io
+import sys, os
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from cipher import registry, uploads
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, 'MIN_UPLOAD_CHUNK_SIZE', 1)  # small chunks keep the tests fast
+    return uploads.UploadStore(str(tmp_path))
+
+@pytest.mark.parametrize("algo,key", [("shift", "3"), ("affine", "5,8"), ("permutation", "pk")])
+def test_chunks_encrypted_on_arrival_match_whole_file(store, algo, key):
+    data = os.urandom(2500)
+    session = store.create('a.bin', algo, key, 'encrypt', len(data), chunk_size=1000)
+    assert session.chunk_count == 3
+    for n in (2, 0, 1, 0):  # any order, re-sent chunks replace the old part
+        session.write_chunk(n, io.BytesIO(data[n * 1000:(n + 1) * 1000]), read_size=64)
+    with session.finalize() as reader:
+        assert reader.read() == registry.get(algo).byte_stream_cipher(key).update(data)
+    assert not os.path.exists(session.folder)
+
+def test_decrypt_session_stores_chunks_as_received(store):
+    data = os.urandom(300)
+    session = store.create('a.bin.enc', 'shift', '3', 'decrypt', len(data), chunk_size=128)
+    for n in range(3):
+        session.write_chunk(n, io.BytesIO(data[n * 128:(n + 1) * 128]))
+    reader = session.finalize()
+    reader.seek(200)
+    assert reader.read(50) == data[200:250]
+    assert reader.seek(0, os.SEEK_END) == 300 and reader.read() == b''
+    reader.close()
+
+def test_chunk_validation_and_missing(store):
+    session = store.create('a.bin', 'shift', '3', 'encrypt', 10, chunk_size=4)
+    with pytest.raises(ValueError):
+        session.write_chunk(0, io.BytesIO(b'abc'))  # short
+    with pytest.raises(ValueError):
+        session.write_chunk(2, io.BytesIO(b'abcd'))  # last chunk is 2 bytes
+    with pytest.raises(ValueError):
+        session.write_chunk(3, io.BytesIO(b'ab'))
+    session.write_chunk(2, io.BytesIO(b'ab'))
+    assert session.missing() == [0, 1] and sorted(os.listdir(session.folder)) == ['2.part']
+    with pytest.raises(ValueError):
+        session.finalize()
+    session.write_chunk(0, io.BytesIO(b'abcd'))
+    session.write_chunk(1, io.BytesIO(b'efgh'))
+    session.finalize().close()
+    with pytest.raises(RuntimeError):
+        session.write_chunk(0, io.BytesIO(b'abcd'))
+
+def test_invalid_sessions_rejected(store):
+    with pytest.raises(ValueError):
+        store.create('a', 'vigenere', 'KEY', 'encrypt', 10)
+    with pytest.raises(ValueError):
+        store.create('a', 'affine', '2,3', 'encrypt', 10)
+    with pytest.raises(ValueError):
+        store.create('a', 'shift', '3', 'encrypt', 10, chunk_size=0)
+    with pytest.raises(ValueError):
+        store.create('a', 'shift', '3', 'encrypt', None)
+
+def test_chunk_size_and_count_limits(tmp_path):
+    store = uploads.UploadStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.create('a', 'shift', '3', 'encrypt', 10 ** 7, chunk_size=1)
+    with pytest.raises(ValueError):
+        store.create('a', 'shift', '3', 'encrypt', uploads.MAX_UPLOAD_CHUNKS * uploads.MIN_UPLOAD_CHUNK_SIZE + 1,
+                     chunk_size=uploads.MIN_UPLOAD_CHUNK_SIZE)
+    session = store.create('a', 'shift', '3', 'encrypt', 5 * uploads.MIN_UPLOAD_CHUNK_SIZE - 7,
+                           chunk_size=uploads.MIN_UPLOAD_CHUNK_SIZE)
+    session.write_chunk(4, io.BytesIO(b'x' * (uploads.MIN_UPLOAD_CHUNK_SIZE - 7)))
+    assert session.missing() == [0, 1, 2, 3] and session.remaining() == 4
+    assert session.to_dict()['bytes_received'] == uploads.MIN_UPLOAD_CHUNK_SIZE - 7
+
+def test_prune_discards_idle_sessions(store):
+    session = store.create('a', 'shift', '3', 'encrypt', 10)
+    assert store.prune(now=session.updated_at + store.max_age + 1) == [session.id]
+    assert store.get(session.id) is None and not os.path.exists(session.folder)
+
+def test_keystream_parts_encrypted_in_order_without_seeks(store, monkeypatch):
+    from cipher import ciphers
+    data = os.urandom(5000)
+    seeks = []
+    real_seek = ciphers.PermutationKeystream.seek
+    monkeypatch.setattr(ciphers.PermutationKeystream, 'seek', lambda self, offset: (seeks.append(offset), real_seek(self, offset)))
+    session = store.create('a.bin', 'permutation', 'pk', 'encrypt', len(data), chunk_size=1000)
+    for n in (3, 1, 0, 4, 2):
+        session.write_chunk(n, io.BytesIO(data[n * 1000:(n + 1) * 1000]))
+    assert not any(seeks)  # every part was ciphered by the session cursor
+    session.write_chunk(1, io.BytesIO(data[1000:2000]))  # re-sent behind the cursor
+    assert seeks[-1] == 1000
+    with session.finalize() as reader:
+        assert reader.read() == ciphers.permutation_encrypt_bytes(data, 'pk')
+
+def test_orphaned_session_dirs_are_swept_on_start(store, tmp_path):
+    session = store.create('a', 'permutation', 'pk', 'encrypt', 10, chunk_size=4)
+    session.write_chunk(2, io.BytesIO(b'ab'))  # plaintext part waiting for the cursor
+    (tmp_path / 'keep.txt').write_text('not a session')
+    restarted = uploads.UploadStore(str(tmp_path))
+    assert restarted.get(session.id) is None and not os.path.exists(session.folder)
+    assert os.path.exists(tmp_path / 'keep.txt')